@@ -0,0 +1,88 @@
+"""
+Benchmark of AnalyzerEngine.__remove_duplicates on synthetic documents with
+thousands of overlapping results, against the quadratic implementation it
+replaced (tests/test_analyzer_engine.py checks that their outputs match).
+Run from api/app:
+
+    python -m benchmarks.remove_duplicates
+"""
+import random
+import time
+
+from datamanagement.pii.analyzer import AnalyzerEngine, RecognizerResult
+
+ENTITY_TYPES = ("PERSON", "LOCATION", "PHONE_NUMBER", "US_SSN",
+                "EMAIL_ADDRESS", "DOMAIN_NAME")
+SCORES = (0, 0.05, 0.3, 0.5, 0.6, 0.85, 1.0)
+SIZES = (1000, 2000, 5000, 10000)
+
+
+def quadratic_remove_duplicates(results):
+    """ The previous implementation, scanning every kept result """
+    results = sorted(results,
+                     key=lambda x: (-x.score, x.start, x.end - x.start))
+    filtered_results = []
+
+    for result in results:
+        if result.score == 0:
+            continue
+
+        valid_result = True
+        if result not in filtered_results:
+            for filtered in filtered_results:
+                if result.start >= filtered.start \
+                        and result.end <= filtered.end \
+                        and result.entity_type == filtered.entity_type:
+                    valid_result = False
+                    break
+
+        if valid_result:
+            filtered_results.append(result)
+
+    return filtered_results
+
+
+def synthetic_results(num_results, seed=0):
+    """
+    Results spread over a document of 8 characters per result, so spans
+    overlap, nest and repeat within and across entity types
+    """
+    rand = random.Random(seed)
+    length = num_results * 8
+    results = []
+    for _ in range(num_results):
+        start = rand.randrange(length)
+        end = min(length, start + rand.randint(1, 40))
+        results.append(RecognizerResult(rand.choice(ENTITY_TYPES), start, end,
+                                        rand.choice(SCORES)))
+    # Some recognizers report the same result object twice
+    results.extend(rand.sample(results, num_results // 100))
+    return results
+
+
+def best_time(func, results, repeat=3):
+    timings = []
+    for _ in range(repeat):
+        start_time = time.perf_counter()
+        func(list(results))
+        timings.append(time.perf_counter() - start_time)
+    return min(timings)
+
+
+def main(sizes=SIZES):
+    remove_duplicates = AnalyzerEngine._AnalyzerEngine__remove_duplicates
+
+    print("{:>8} {:>8} {:>12} {:>12} {:>8}".format(
+        "results", "kept", "quadratic", "indexed", "speedup"))
+    for size in sizes:
+        results = synthetic_results(size)
+        kept = remove_duplicates(list(results))
+        quadratic_time = best_time(quadratic_remove_duplicates, results)
+        indexed_time = best_time(remove_duplicates, results)
+        print("{:>8} {:>8} {:>11.4f}s {:>11.4f}s {:>7.1f}x".format(
+            len(results), len(kept), quadratic_time, indexed_time,
+            quadratic_time / indexed_time))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,9 +1,11 @@
 
 
+import click
 from flask import Flask
 
 from datamanagement.configuration import key
 from datamanagement.configuration import paths
+from datamanagement.configuration.variables import WARM_UP_ON_START
 
 from datamanagement.controllers.utils import regex_replace
 
@@ -28,15 +30,30 @@ def create_app():
     from datamanagement.main.routes import main
     from datamanagement.pii.routes import pii
     from datamanagement.controllers.routes import controller
+    from datamanagement.jobs.routes import jobs
     # from datamanagement.data_lineage.routes import lineage
     # app.register_blueprint(manageDB)
     # app.register_blueprint(qualityCheck)
     app.register_blueprint(main)
     app.register_blueprint(pii)
     app.register_blueprint(controller)
+    app.register_blueprint(jobs)
     # app.register_blueprint(lineage)
 
     from datamanagement.angular_routes import angular_routes
     app.register_blueprint(angular_routes)
 
+    from datamanagement.jobs.warmup import warm_up, submit_warm_up, format_warm_up_report
+
+    @app.cli.command('warm-up')
+    def warm_up_command():
+        """Generate the missing artifacts of all example datasets"""
+        click.echo(format_warm_up_report(warm_up()))
+
+    if WARM_UP_ON_START:
+        # Queued rather than waited on, so serving starts right away; `flask warm-up`
+        # building the app first then waits on these same jobs instead of new ones
+        job_ids = submit_warm_up()
+        app.logger.info("Warm-up queued jobs %s", ', '.join(f'{title} {job_id}' for title, job_id in job_ids.items()))
+
     return app
@@ -10,6 +10,11 @@ GRAPHS_SUBFOLDER = "/graphs/"
 DATASETS = os.path.join(EXAMPLES_FOLDER, "datasets.csv")
 DATASETS_JSON = os.path.join(EXAMPLES_FOLDER, "datasets.json")
 
+# Content-addressed store of generated JSON artifacts
+ARTIFACT_STORE_FOLDER = os.path.join(APP_ROOT, "artifact_store")
+JOBS_FOLDER = os.path.join(ARTIFACT_STORE_FOLDER, "jobs")
+PII_VERDICT_CACHE = os.path.join(ARTIFACT_STORE_FOLDER, "pii_verdicts.sqlite")
+
 # Graph types
 FILE_BARCHART = "_bar.png"
 FILE_BOXCHART = "_box.png"
@@ -20,14 +25,20 @@ FILE_HISTOGRAM = "_hist.png"
 # File endings
 SUMMARY_SUFFIX = "summary.json"
 FEATURES_SUFFIX = "features.json"
+FEATURES_SKETCH_SUFFIX = "features_sketch.json"
+SUMMARY_STATE_SUFFIX = "summary_state.json"
 INTERACTIONS_SUFFIX = "interactions.json"
 PII_SUFFIX = "pii.json"
 PII_FLARE_SUFFIX = "pii_flare.json"
+PII_JSON_SUFFIX = "pii_json.json"
 ERRORS_SUFFIX = "errors.json"
 FREQUENCY_SUFFIX = "frequency_stats.json"
 
 PROFILING_REPORT = "profiling_report.html"
 
+# Typed columnar copy of the uploaded file, written next to it
+COLUMNAR_CACHE_SUFFIX = ".parquet"
+
 FREQUENCY_CSV_SUFFIX = "frequency_stats.csv"
 FEATURES_CSV_SUFFIX = "features.csv"
 PII_CSV_SUFFIX = "pii.csv"
@@ -2,3 +2,81 @@ LIMIT_TO_TOP_N_ROWS = 1000
 LIMIT_TO_FIRST_N_COLUMNS = 10
 
 PII_THRESHOLD = 0.2
+
+# Adaptive PII scan: score columns on random batches of rows, starting at
+# PII_SAMPLE_FIRST_BATCH and doubling, until is_pii and the most likely type are
+# settled at PII_SAMPLE_Z standard errors
+PII_SAMPLING = False
+PII_SAMPLE_FIRST_BATCH = 50
+PII_SAMPLE_Z = 2.576
+PII_SAMPLE_SEED = 0
+
+# Streaming mode scans every row with the regexes, and runs NER on a uniform
+# sample of this many rows per column
+PII_NER_SAMPLE_ROWS = 1000
+
+# PiiAnalyzer keeps at most this many example matches of each kind (None keeps all)
+PII_MAX_EXAMPLES = 100
+
+# Streaming mode: profile the whole file chunk by chunk instead of the top N rows
+STREAMING_MODE = False
+STREAM_CHUNK_SIZE = 100000
+STREAM_MAX_TRACKED_VALUES = 100000
+
+# Process-wide cache of loaded DataFrames shared by all controllers
+FRAME_CACHE_MAX_BYTES = 512 * 1024 * 1024
+
+# Parallel per-column profiling; 1 keeps features.json generation serial
+PROFILE_WORKERS = 1
+PROFILE_PARALLEL_MIN_COLUMNS = 50
+
+# Mergeable sketches back the streaming profile of files at least this large
+SKETCH_MIN_FILE_BYTES = 256 * 1024 * 1024
+KLL_SKETCH_K = 200
+HLL_PRECISION = 12
+HEAVY_HITTERS_CAPACITY = 100
+
+# Appended rows are detected by hashing the profiled prefix in blocks of this many bytes
+PREFIX_HASH_BLOCK_BYTES = 1024 * 1024
+
+# Generated artifacts are indexed in a SQLite file. At most every ARTIFACT_STORE_GC_SECONDS
+# a process drops those of older code, then the oldest ones past ARTIFACT_STORE_MAX_BYTES
+ARTIFACT_STORE_MAX_BYTES = 2 * 1024 ** 3
+ARTIFACT_STORE_GC_SECONDS = 3600
+
+# Background jobs (uploads, PII scans) run in this many worker processes
+JOB_WORKERS = 2
+JOB_POLL_SECONDS = 0.2
+# Longest a request waits on a background job before giving up
+JOB_WAIT_TIMEOUT_SECONDS = 600
+
+# Queue the generation of the artifacts of every example dataset in create_app,
+# without waiting on it (`flask warm-up` generates them and waits)
+WARM_UP_ON_START = False
+
+# spaCy model for PII entity recognition, loaded once per process; NER runs over
+# the distinct values of a column in batches of NER_BATCH_SIZE
+SPACY_MODEL = 'en_core_web_sm'
+NER_BATCH_SIZE = 256
+NER_PROCESSES = 1
+
+# usaddress parse results are memoized per normalized value; columns with at
+# least STREET_ADDRESS_PARALLEL_MIN_VALUES candidates are parsed in a process pool
+STREET_ADDRESS_CACHE_SIZE = 100000
+STREET_ADDRESS_WORKERS = 1
+STREET_ADDRESS_PARALLEL_MIN_VALUES = 5000
+
+# Regex/usaddress and NER verdicts are cached per distinct value across datasets
+# and processes, in a SQLite file holding at most PII_VERDICT_CACHE_MAX_ENTRIES
+PII_VERDICT_CACHE = True
+PII_VERDICT_CACHE_MAX_ENTRIES = 1000000
+# Each process counts hits and misses in memory and adds them to the file at most this often
+PII_VERDICT_STATS_FLUSH_SECONDS = 60
+
+# The analyzer asks the recognizers store whether custom recognizers changed
+# at most once per RECOGNIZERS_HASH_TTL_SECONDS
+RECOGNIZERS_HASH_TTL_SECONDS = 30
+
+# Columns are scanned for PII in a pool of this many worker processes, each
+# loading the detectors once; 1 keeps the scan serial
+PII_WORKERS = 1
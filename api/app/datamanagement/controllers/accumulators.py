@@ -0,0 +1,417 @@
+import math
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+from datamanagement.configuration import const_types
+from datamanagement.configuration.variables import STREAM_MAX_TRACKED_VALUES
+from datamanagement.controllers.sketches import KllSketch, HyperLogLog, SpaceSaving
+
+# Plain attributes saved by to_state() for later merges
+STATE_FIELDS = ['name', 'max_tracked_values', 'sketch', 'count', 'nulls',
+                'seen_values', 'numeric', 'integer', 'binary',
+                'sum', 'sum_squares', 'mean', 'm2', 'm3', 'm4', 'min', 'max',
+                'min_length', 'max_length', 'all_strings', 'values_overflowed']
+
+# Central sums this close to 0 count as 0, as pandas' _zero_out_fperr does for skew and kurt
+ZERO_TOLERANCE = 1e-14
+
+
+class ColumnAccumulator(object):
+    """Mergeable per-column statistics, folded one chunk at a time.
+
+    Moments are kept as central sums (M2, M3, M4) and combined with the
+    pairwise update formulas so that merging chunks stays numerically stable.
+    Value counts are kept exactly until the column has more than
+    max_tracked_values distinct values, after which they are dropped
+    (max_tracked_values=None keeps them all). With sketch=True, quantile,
+    distinct count and heavy hitter sketches are kept alongside and answer
+    in place of the dropped value counts.
+    """
+
+    def __init__(self, name, max_tracked_values=STREAM_MAX_TRACKED_VALUES, sketch=False):
+        self.name = name
+        self.max_tracked_values = max_tracked_values
+        self.sketch = sketch
+
+        self.count = 0
+        self.nulls = 0
+
+        # Data type decision, narrowed as chunks come in
+        self.seen_values = False
+        self.numeric = True
+        self.integer = True
+        self.binary = True
+
+        # Numeric only
+        self.sum = 0.0
+        self.sum_squares = 0.0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.m3 = 0.0
+        self.m4 = 0.0
+        self.min = None
+        self.max = None
+
+        # Non-numeric only, lengths are only reported when every value is a str
+        self.min_length = None
+        self.max_length = None
+        self.all_strings = True
+
+        self.value_counts = pd.Series(dtype='int64')
+        self.values_overflowed = False
+
+        self.quantiles = KllSketch() if sketch else None
+        self.distinct = HyperLogLog() if sketch else None
+        self.heavy_hitters = SpaceSaving() if sketch else None
+
+    def update(self, column):
+        non_null = column.dropna()
+        self.nulls += int(len(column) - len(non_null))
+
+        if len(non_null) == 0:
+            if not self.seen_values and column.dtype.kind not in 'iufb':
+                # An all-null object column is a string column, as DataDriver.get_data_type has it
+                self.numeric = self.integer = self.binary = False
+            return self
+
+        kind = non_null.dtype.kind
+        chunk = ColumnAccumulator(self.name, self.max_tracked_values, self.sketch)
+        chunk.count = int(len(non_null))
+        chunk.seen_values = True
+        chunk.numeric = kind in 'iufb'
+        chunk.integer = kind in 'iub'
+
+        if chunk.numeric:
+            values = non_null.astype('float64')
+            chunk.binary = chunk.integer and bool(values.isin([0, 1]).all())
+            chunk.sum = float(values.sum())
+            chunk.sum_squares = float((values ** 2).sum())
+            chunk.mean = chunk.sum / chunk.count
+            deviations = values - chunk.mean
+            chunk.m2 = float((deviations ** 2).sum())
+            chunk.m3 = float((deviations ** 3).sum())
+            chunk.m4 = float((deviations ** 4).sum())
+            chunk.min = float(values.min())
+            chunk.max = float(values.max())
+            chunk.all_strings = False
+            if self.sketch:
+                chunk.quantiles.update(values.values)
+                chunk.distinct.update(values)
+        else:
+            chunk.binary = False
+            lengths = non_null.astype(str).str.len()
+            chunk.min_length = int(lengths.min())
+            chunk.max_length = int(lengths.max())
+            chunk.all_strings = pd.api.types.infer_dtype(non_null, skipna=False) == 'string'
+            if self.sketch:
+                chunk.distinct.update(non_null)
+
+        chunk.value_counts = non_null.value_counts()
+        if self.sketch:
+            chunk.heavy_hitters.update(chunk.value_counts)
+        return self.merge(chunk)
+
+    def merge(self, other):
+        """Fold another accumulator for the same column into this one."""
+        if other.seen_values:
+            if self.seen_values:
+                self.numeric = self.numeric and other.numeric
+                self.integer = self.integer and other.integer
+                self.binary = self.binary and other.binary
+                self.all_strings = self.all_strings and other.all_strings
+            else:
+                self.numeric = other.numeric
+                self.integer = other.integer
+                self.binary = other.binary
+                self.all_strings = other.all_strings
+            self.seen_values = True
+
+        self._merge_moments(other)
+        self.count += other.count
+        self.nulls += other.nulls
+        self.sum += other.sum
+        self.sum_squares += other.sum_squares
+        self.min = _merge_bound(self.min, other.min, min)
+        self.max = _merge_bound(self.max, other.max, max)
+        self.min_length = _merge_bound(self.min_length, other.min_length, min)
+        self.max_length = _merge_bound(self.max_length, other.max_length, max)
+
+        if self.values_overflowed or other.values_overflowed:
+            self._drop_value_counts()
+        elif len(other.value_counts):
+            if len(self.value_counts):
+                self.value_counts = self.value_counts.add(other.value_counts, fill_value=0).astype('int64')
+            else:
+                # Keeps the order of Series.value_counts(), which breaks ties in the most and least common
+                self.value_counts = other.value_counts
+            if self.max_tracked_values is not None and len(self.value_counts) > self.max_tracked_values:
+                self._drop_value_counts()
+
+        if self.sketch and other.sketch:
+            self.quantiles.merge(other.quantiles)
+            self.distinct.merge(other.distinct)
+            self.heavy_hitters.merge(other.heavy_hitters)
+
+        return self
+
+    def _merge_moments(self, other):
+        n_a, n_b = self.count, other.count
+        if n_b == 0:
+            return
+        if n_a == 0:
+            self.mean, self.m2, self.m3, self.m4 = other.mean, other.m2, other.m3, other.m4
+            return
+
+        n = n_a + n_b
+        delta = other.mean - self.mean
+        delta_n = delta / n
+
+        m2 = self.m2 + other.m2 + delta * delta_n * n_a * n_b
+        m3 = (self.m3 + other.m3
+              + delta * delta_n ** 2 * n_a * n_b * (n_a - n_b)
+              + 3 * delta_n * (n_a * other.m2 - n_b * self.m2))
+        m4 = (self.m4 + other.m4
+              + delta * delta_n ** 3 * n_a * n_b * (n_a * n_a - n_a * n_b + n_b * n_b)
+              + 6 * delta_n ** 2 * (n_a * n_a * other.m2 + n_b * n_b * self.m2)
+              + 4 * delta_n * (n_a * other.m3 - n_b * self.m3))
+
+        self.mean = self.mean + delta_n * n_b
+        self.m2, self.m3, self.m4 = m2, m3, m4
+
+    def _drop_value_counts(self):
+        self.value_counts = pd.Series(dtype='int64')
+        self.values_overflowed = True
+
+    def _frequent_counts(self):
+        # Exact counts while tracked, then the heavy hitters estimate if sketching
+        if not self.values_overflowed:
+            return self.value_counts
+        if self.heavy_hitters is not None:
+            return self.heavy_hitters.counts
+        return None
+
+    def to_state(self):
+        """JSON-serializable state, restored with from_state() to keep merging later chunks"""
+        state = {field: getattr(self, field) for field in STATE_FIELDS}
+        state['value_counts'] = {'values': self.value_counts.index.tolist(),
+                                 'counts': self.value_counts.tolist()}
+        if self.sketch:
+            state['quantiles'] = self.quantiles.to_state()
+            state['distinct'] = self.distinct.to_state()
+            state['heavy_hitters'] = self.heavy_hitters.to_state()
+        return state
+
+    @classmethod
+    def from_state(cls, state):
+        accumulator = cls(state['name'], state['max_tracked_values'], state['sketch'])
+        for field in STATE_FIELDS:
+            # States saved before a field was added keep its default
+            setattr(accumulator, field, state.get(field, getattr(accumulator, field)))
+        accumulator.value_counts = pd.Series(state['value_counts']['counts'],
+                                             index=state['value_counts']['values'], dtype='int64')
+        if accumulator.sketch:
+            accumulator.quantiles = KllSketch.from_state(state['quantiles'])
+            accumulator.distinct = HyperLogLog.from_state(state['distinct'])
+            accumulator.heavy_hitters = SpaceSaving.from_state(state['heavy_hitters'])
+        return accumulator
+
+    @property
+    def total(self):
+        return self.count + self.nulls
+
+    def get_data_type(self):
+        if not self.seen_values and self.numeric:
+            return const_types.DATATYPE_FLOAT
+        if self.binary:
+            return const_types.DATATYPE_BOOLEAN
+        if self.integer:
+            return const_types.DATATYPE_INTEGER
+        if self.numeric:
+            return const_types.DATATYPE_FLOAT
+        return const_types.DATATYPE_STRING
+
+    def is_numeric(self):
+        return self.get_data_type() in [const_types.DATATYPE_INTEGER, const_types.DATATYPE_FLOAT]
+
+    def get_count_unique(self):
+        # Mirrors Series.unique(), which counts NaN as a value of its own
+        if not self.values_overflowed:
+            count_unique = len(self.value_counts)
+        elif self.distinct is not None:
+            count_unique = self.distinct.estimate()
+        else:
+            return None
+        return count_unique + (1 if self.nulls else 0)
+
+    def get_percent_unique(self):
+        count_unique = self.get_count_unique()
+        if count_unique is None or self.count == 0:
+            return None
+        return float(count_unique) / self.count
+
+    def get_percent_missing(self):
+        if self.total == 0:
+            return 0.0
+        return 100 * self.nulls / float(self.total)
+
+    # The numeric getters return what the pandas Series methods do, NaN included
+
+    def get_average(self):
+        return self.mean if self.count else float('nan')
+
+    def get_min(self):
+        return float('nan') if self.min is None else self.min
+
+    def get_max(self):
+        return float('nan') if self.max is None else self.max
+
+    def get_variance(self):
+        if self.count < 2:
+            return float('nan')
+        return self.m2 / (self.count - 1)
+
+    def get_stddev(self):
+        return math.sqrt(self.get_variance())
+
+    def get_skew(self):
+        # Adjusted Fisher-Pearson coefficient, as in Series.skew()
+        n = self.count
+        if n < 3:
+            return float('nan')
+        if abs(self.m2) < ZERO_TOLERANCE:
+            return 0
+        g1 = math.sqrt(n) * self.m3 / self.m2 ** 1.5
+        return math.sqrt(n * (n - 1)) / (n - 2) * g1
+
+    def get_kurtosis(self):
+        # Fisher's excess kurtosis with bias correction, as in Series.kurt()
+        n = self.count
+        if n < 4:
+            return float('nan')
+        if abs((n - 2) * (n - 3) * self.m2 ** 2) < ZERO_TOLERANCE:
+            return 0
+        g2 = n * self.m4 / self.m2 ** 2 - 3
+        return (n - 1) / ((n - 2) * (n - 3)) * ((n + 1) * g2 + 6)
+
+    def get_min_length(self):
+        # len() of a NaN or a non-str value fails in DataUnivariate.get_min_length
+        if self.nulls or not self.all_strings:
+            return None
+        return self.min_length
+
+    def get_max_length(self):
+        if self.nulls or not self.all_strings:
+            return None
+        return self.max_length
+
+    def get_quantile(self, q):
+        """Exact quantile (linear interpolation) from the tracked value counts."""
+        if not self.is_numeric():
+            return None
+        if not self.count:
+            return float('nan')
+        if self.values_overflowed:
+            return self.quantiles.get_quantile(q) if self.quantiles is not None else None
+        counts = self.value_counts.sort_index()
+        values = counts.index.values.astype('float64')
+        cumulative = counts.values.cumsum()
+
+        position = q * (self.count - 1)
+        lower = int(math.floor(position))
+        upper = int(math.ceil(position))
+        lower_value = values[cumulative.searchsorted(lower, side='right')]
+        upper_value = values[cumulative.searchsorted(upper, side='right')]
+        return lower_value + (upper_value - lower_value) * (position - lower)
+
+    def get_count_between(self, lower_bound, upper_bound):
+        if lower_bound is None or upper_bound is None:
+            return None
+        if self.values_overflowed:
+            if self.quantiles is None:
+                return None
+            fraction = self.quantiles.get_rank(upper_bound) - self.quantiles.get_rank(lower_bound, inclusive=False)
+            return int(round(fraction * self.count))
+        values = self.value_counts.index.values.astype('float64')
+        mask = (values >= lower_bound) & (values <= upper_bound)
+        return int(self.value_counts.values[mask].sum())
+
+    def get_mode(self):
+        counts = self._frequent_counts()
+        if counts is None or not len(counts):
+            return None
+        top = list(counts[counts == counts.max()].index)
+        try:
+            top = sorted(top)
+        except TypeError:
+            pass
+        return "".join(str(m) + " " for m in top)
+
+    def get_mostcommon(self):
+        values, counts = self.get_n_mostcommon(1)
+        if values is None:
+            return None
+        return str("%s (%s)" % (values[0], counts[0]))
+
+    def get_leastcommon(self):
+        # Rare values cannot be recovered from a sketch
+        if self.values_overflowed or not len(self.value_counts):
+            return None
+        ordered = self.value_counts.sort_values(ascending=False, kind='mergesort')
+        least = ordered[ordered == ordered.min()]
+        return str("%s (%d)" % (least.index[0], least.iloc[0]))
+
+    def get_n_mostcommon(self, n):
+        counts = self._frequent_counts()
+        if counts is None or not len(counts):
+            return None, None
+        top = counts.sort_values(ascending=False, kind='mergesort').iloc[:n]
+        return list(top.index), list(top.map(str))
+
+    def get_n_leastcommon(self, n):
+        if self.values_overflowed or not len(self.value_counts):
+            return None, None
+        bottom = self.value_counts.sort_values(ascending=False, kind='mergesort').iloc[-n:]
+        return list(bottom.index), list(bottom.map(str))
+
+
+def _merge_bound(current, new, pick):
+    if current is None:
+        return new
+    if new is None:
+        return current
+    return pick(current, new)
+
+
+class RowsMissingAccumulator(object):
+    """Mergeable histogram of how many rows are missing 0, 1, 2, ... columns."""
+
+    def __init__(self):
+        self.counts = np.zeros(0, dtype='int64')
+
+    def update(self, frame):
+        missing_per_row = frame.isnull().sum(axis=1).values.astype('int64')
+        return self._add_counts(np.bincount(missing_per_row))
+
+    def merge(self, other):
+        return self._add_counts(other.counts)
+
+    def _add_counts(self, counts):
+        if len(counts) > len(self.counts):
+            self.counts, counts = counts.astype('int64'), self.counts
+        self.counts = self.counts.copy()
+        self.counts[:len(counts)] += counts
+        return self
+
+    def to_dict(self):
+        return OrderedDict((num_missing, int(num_rows)) for num_missing, num_rows in enumerate(self.counts))
+
+    def to_state(self):
+        return self.counts.tolist()
+
+    @classmethod
+    def from_state(cls, state):
+        accumulator = cls()
+        accumulator.counts = np.asarray(state, dtype='int64')
+        return accumulator
@@ -0,0 +1,233 @@
+import os
+import json
+import time
+import hashlib
+import sqlite3
+import tempfile
+import threading
+from contextlib import contextmanager
+
+from datamanagement.configuration import paths
+from datamanagement.configuration.variables import ARTIFACT_STORE_MAX_BYTES, ARTIFACT_STORE_GC_SECONDS
+
+# fcntl is POSIX only: without it writers are only serialized within a process
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+# Any change to the code under these packages yields new artifact keys
+GENERATOR_PACKAGES = ('configuration', 'controllers', 'model', 'pii')
+
+_generator_version = None
+
+
+def get_generator_version():
+    """Hash of the generator source code, computed once per process"""
+    global _generator_version
+    if _generator_version is None:
+        digest = hashlib.sha256()
+        for package in GENERATOR_PACKAGES:
+            for folder, subfolders, files in os.walk(os.path.join(paths.APP_ROOT, package)):
+                subfolders[:] = sorted(subfolder for subfolder in subfolders if subfolder != '__pycache__')
+                for filename in sorted(files):
+                    if filename.endswith('.py'):
+                        digest.update(os.path.relpath(os.path.join(folder, filename), paths.APP_ROOT).encode())
+                        with open(os.path.join(folder, filename), 'rb') as source:
+                            digest.update(source.read())
+        _generator_version = digest.hexdigest()
+    return _generator_version
+
+
+def hash_content(content):
+    if isinstance(content, str):
+        content = content.encode()
+    return hashlib.sha256(content).hexdigest()
+
+
+def atomic_write(path, content):
+    """Write content to a temporary file next to path, then move it into place"""
+    folder = os.path.dirname(os.path.abspath(path))
+    os.makedirs(folder, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=folder, prefix='.tmp-')
+    try:
+        with os.fdopen(fd, 'w') as tmp_file:
+            tmp_file.write(content)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+@contextmanager
+def file_lock(lock_path):
+    """Exclusive lock on lock_path, held across processes for the duration of the block"""
+    if fcntl is None:
+        yield
+        return
+
+    os.makedirs(os.path.dirname(lock_path), exist_ok=True)
+    with open(lock_path, 'a') as lock_file:
+        fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+
+
+class ArtifactStore(object):
+    """
+    Generated JSON artifacts keyed by (dataset content hash, artifact kind,
+    generator version, parameters). Objects live under objects/<key[:2]>/ and
+    are indexed in index.sqlite, one row per artifact. The index also records
+    which key each legacy <folder>/<title>/<kind> file was last published from,
+    so that file is reused (with any edits made to it) until its key changes.
+    Every gc_seconds a process drops the artifacts of older generator versions,
+    then the oldest ones past max_bytes.
+    """
+
+    def __init__(self, root=paths.ARTIFACT_STORE_FOLDER, max_bytes=ARTIFACT_STORE_MAX_BYTES,
+                 gc_seconds=ARTIFACT_STORE_GC_SECONDS):
+        self.root = root
+        self.max_bytes = max_bytes
+        self.gc_seconds = gc_seconds
+        self._local = threading.local()
+        self._collected_at = time.monotonic()
+
+    @property
+    def index_path(self):
+        return os.path.join(self.root, 'index.sqlite')
+
+    def connect(self):
+        # sqlite3 connections may not cross threads or forks, so each thread of each process opens its own
+        if getattr(self._local, 'key', None) != (os.getpid(), self.index_path):
+            os.makedirs(self.root, exist_ok=True)
+            connection = sqlite3.connect(self.index_path, timeout=30)
+            connection.execute('PRAGMA journal_mode=WAL')
+            with connection:
+                connection.execute('CREATE TABLE IF NOT EXISTS artifacts (key TEXT PRIMARY KEY, kind TEXT, '
+                                   'params TEXT, version TEXT NOT NULL, bytes INTEGER NOT NULL, '
+                                   'created REAL NOT NULL)')
+                connection.execute('CREATE INDEX IF NOT EXISTS artifacts_created ON artifacts (created)')
+                connection.execute('CREATE TABLE IF NOT EXISTS published (target TEXT PRIMARY KEY, key TEXT NOT NULL)')
+                connection.execute('CREATE TABLE IF NOT EXISTS sources (path TEXT PRIMARY KEY, size INTEGER NOT NULL, '
+                                   'mtime_ns INTEGER NOT NULL, content_hash TEXT NOT NULL)')
+            self._local.connection = connection
+            self._local.key = (os.getpid(), self.index_path)
+        return self._local.connection
+
+    def get_object_path(self, key):
+        return os.path.join(self.root, 'objects', key[:2], key + '.json')
+
+    def make_key(self, content_hash, kind, params=None):
+        payload = json.dumps({'content': content_hash,
+                              'kind': kind,
+                              'version': get_generator_version(),
+                              'params': params or {}}, sort_keys=True, default=str)
+        return hash_content(payload)
+
+    def get_content_hash(self, filepath):
+        # Hashes are remembered per (size, mtime) so unchanged files are read only once
+        filepath = os.path.abspath(str(filepath))
+        stat = os.stat(filepath)
+
+        connection = self.connect()
+        source = connection.execute('SELECT size, mtime_ns, content_hash FROM sources WHERE path = ?',
+                                    (filepath,)).fetchone()
+        if source is not None and source[:2] == (stat.st_size, stat.st_mtime_ns):
+            return source[2]
+
+        digest = hashlib.sha256()
+        with open(filepath, 'rb') as data_file:
+            for block in iter(lambda: data_file.read(1024 * 1024), b''):
+                digest.update(block)
+        content_hash = digest.hexdigest()
+
+        with connection:
+            connection.execute('INSERT OR REPLACE INTO sources VALUES (?, ?, ?, ?)',
+                               (filepath, stat.st_size, stat.st_mtime_ns, content_hash))
+        return content_hash
+
+    def get(self, key):
+        try:
+            with open(self.get_object_path(key), 'r') as object_file:
+                return object_file.read()
+        except OSError:
+            return None
+
+    def get_artifact(self, key):
+        """Index row of key as a dict, None when it is not stored"""
+        row = self.connect().execute('SELECT kind, params, version, bytes, created FROM artifacts WHERE key = ?',
+                                     (key,)).fetchone()
+        if row is None:
+            return None
+        return {'kind': row[0], 'params': json.loads(row[1]), 'version': row[2], 'bytes': row[3], 'created': row[4]}
+
+    def put(self, key, content, kind=None, params=None):
+        atomic_write(self.get_object_path(key), content)
+
+        connection = self.connect()
+        with connection:
+            connection.execute('INSERT OR REPLACE INTO artifacts VALUES (?, ?, ?, ?, ?, ?)',
+                               (key, kind, json.dumps(params, sort_keys=True, default=str), get_generator_version(),
+                                len(content), time.time()))
+
+        if time.monotonic() - self._collected_at >= self.gc_seconds:
+            self.collect_garbage()
+
+    def publish(self, key, content, target_path):
+        atomic_write(target_path, content)
+
+        connection = self.connect()
+        with connection:
+            connection.execute('INSERT OR REPLACE INTO published VALUES (?, ?)',
+                               (os.path.abspath(str(target_path)), key))
+
+    def is_published(self, key, target_path):
+        target_path = os.path.abspath(str(target_path))
+        if not os.path.isfile(target_path):
+            return False
+        row = self.connect().execute('SELECT key FROM published WHERE target = ?', (target_path,)).fetchone()
+        return row is not None and row[0] == key
+
+    def collect_garbage(self):
+        """
+        Drop the artifacts of other generator versions (their keys can no longer
+        be made), then the oldest ones until the rest fit in max_bytes, and the
+        published targets and sources whose files are gone. Returns the number of
+        artifacts dropped.
+        """
+        self._collected_at = time.monotonic()
+        connection = self.connect()
+
+        dropped = [key for key, in connection.execute('SELECT key FROM artifacts WHERE version != ?',
+                                                       (get_generator_version(),))]
+        total_bytes = connection.execute('SELECT TOTAL(bytes) FROM artifacts WHERE version = ?',
+                                         (get_generator_version(),)).fetchone()[0]
+        if total_bytes > self.max_bytes:
+            for key, size in connection.execute('SELECT key, bytes FROM artifacts WHERE version = ? '
+                                                'ORDER BY created, rowid', (get_generator_version(),)).fetchall():
+                if total_bytes <= self.max_bytes:
+                    break
+                dropped.append(key)
+                total_bytes -= size
+
+        # Rows go first, so a concurrent get of a dropped key finds neither the row nor the object
+        with connection:
+            connection.executemany('DELETE FROM artifacts WHERE key = ?', [(key,) for key in dropped])
+            connection.executemany('DELETE FROM published WHERE target = ?',
+                                   [(target,) for target, in connection.execute('SELECT target FROM published')
+                                    .fetchall() if not os.path.isfile(target)])
+            connection.executemany('DELETE FROM sources WHERE path = ?',
+                                   [(path,) for path, in connection.execute('SELECT path FROM sources')
+                                    .fetchall() if not os.path.isfile(path)])
+        for key in dropped:
+            try:
+                os.remove(self.get_object_path(key))
+            except FileNotFoundError:
+                pass
+        return len(dropped)
+
+
+artifact_store = ArtifactStore()
@@ -0,0 +1,132 @@
+import os
+import json
+import logging
+
+import pandas as pd
+
+from datamanagement.configuration import paths
+from datamanagement.configuration.variables import LIMIT_TO_TOP_N_ROWS, STREAM_CHUNK_SIZE
+
+# pyarrow is optional: without it every read falls back to the raw file
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+    pq = None
+
+SOURCE_METADATA_KEY = b'datamanagement.source'
+
+
+def get_cache_path(filepath):
+    return str(filepath) + paths.COLUMNAR_CACHE_SUFFIX
+
+
+def get_source_stamp(filepath):
+    stat = os.stat(filepath)
+    return {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns}
+
+
+def read_source_head(filepath, nrows=LIMIT_TO_TOP_N_ROWS):
+    """Parse the first nrows rows of the raw file with the same options DataDriver.read_data uses"""
+    filepath = str(filepath)
+    if filepath.endswith("csv"):
+        return pd.read_csv(filepath, nrows=nrows, keep_default_na=False, low_memory=False, skipinitialspace=True)
+    if filepath.endswith("tsv"):
+        return pd.read_csv(filepath, nrows=nrows, keep_default_na=False, low_memory=False, skipinitialspace=True,
+                           sep='\t')
+    if filepath.endswith("xls") or filepath.endswith("xlsx"):
+        return pd.read_excel(filepath, nrows=nrows, keep_default_na=False)
+    return None
+
+
+def iter_source(filepath, dtypes, chunksize=STREAM_CHUNK_SIZE):
+    """Yield the whole raw file as DataFrames of at most chunksize rows, parsed as dtypes"""
+    filepath = str(filepath)
+    if filepath.endswith("csv") or filepath.endswith("tsv"):
+        sep = '\t' if filepath.endswith("tsv") else ','
+        yield from pd.read_csv(filepath, chunksize=chunksize, sep=sep, dtype=dtypes,
+                               keep_default_na=False, skipinitialspace=True)
+    elif filepath.endswith("xls") or filepath.endswith("xlsx"):
+        # Excel files cannot be read incrementally, so slice the loaded sheet instead
+        sheet = pd.read_excel(filepath, keep_default_na=False).astype(dtypes)
+        for start in range(0, len(sheet), chunksize):
+            yield sheet.iloc[start:start + chunksize]
+
+
+def write_columnar_cache(filepath, chunksize=STREAM_CHUNK_SIZE):
+    """
+    Convert the raw file into a typed Parquet file next to it, chunk by chunk.
+    Column types are those DataDriver.read_data infers from the top N rows,
+    so reading the cache gives the same frame as parsing the file; a file
+    whose later rows do not fit them gets no cache.
+    The source size and mtime are stored in the schema metadata so that
+    a replaced upload is detected as stale.
+    Returns the cache path, or None if the cache could not be written.
+    """
+    if pq is None or not os.path.isfile(filepath):
+        return None
+
+    stamp = get_source_stamp(filepath)
+    head = read_source_head(filepath)
+    if head is None:
+        return None
+
+    cache_path = get_cache_path(filepath)
+    # Write to a temporary file first so readers never see a partial cache
+    tmp_path = cache_path + '.tmp'
+    try:
+        schema = pa.Schema.from_pandas(head, preserve_index=False)
+        metadata = dict(schema.metadata or {})
+        metadata[SOURCE_METADATA_KEY] = json.dumps(stamp).encode()
+        schema = schema.with_metadata(metadata)
+
+        with pq.ParquetWriter(tmp_path, schema) as writer:
+            for chunk in iter_source(filepath, head.dtypes.to_dict(), chunksize):
+                writer.write_table(pa.Table.from_pandas(chunk, schema=schema, preserve_index=False))
+        os.replace(tmp_path, cache_path)
+    except (pa.ArrowException, ValueError, TypeError, OSError) as err:
+        logging.warning("Could not write the columnar cache for %s: %s", filepath, err)
+        if os.path.isfile(tmp_path):
+            os.remove(tmp_path)
+        return None
+
+    return cache_path
+
+
+def is_cache_fresh(filepath):
+    if pq is None:
+        return False
+
+    cache_path = get_cache_path(filepath)
+    if not os.path.isfile(cache_path) or not os.path.isfile(filepath):
+        return False
+
+    try:
+        metadata = pq.read_schema(cache_path, memory_map=True).metadata or {}
+    except (pa.ArrowException, OSError):
+        return False
+
+    stamp = metadata.get(SOURCE_METADATA_KEY)
+    return stamp is not None and json.loads(stamp.decode()) == get_source_stamp(filepath)
+
+
+def read_columnar_cache(filepath, max_columns=None, nrows=None):
+    """Read the first max_columns columns and nrows rows from the memory-mapped cache"""
+    parquet_file = pq.ParquetFile(get_cache_path(filepath), memory_map=True)
+    columns = parquet_file.schema_arrow.names[:max_columns]
+
+    if nrows is None:
+        return parquet_file.read(columns=columns, use_pandas_metadata=True).to_pandas()
+
+    first_batch = next(parquet_file.iter_batches(batch_size=nrows, columns=columns), None)
+    if first_batch is None:
+        return parquet_file.schema_arrow.empty_table().select(columns).to_pandas()
+    return pa.Table.from_batches([first_batch]).to_pandas()
+
+
+def iter_columnar_cache(filepath, chunksize):
+    """Yield the cached file as DataFrames of at most chunksize rows"""
+    parquet_file = pq.ParquetFile(get_cache_path(filepath), memory_map=True)
+    for batch in parquet_file.iter_batches(batch_size=chunksize):
+        yield batch.to_pandas()
@@ -9,11 +9,17 @@ matplotlib.use('Agg')  # avoid tkinter issues
 import seaborn as sns
 
 from datamanagement.configuration import paths, const_types
-from datamanagement.configuration.variables import LIMIT_TO_FIRST_N_COLUMNS, LIMIT_TO_TOP_N_ROWS
+from datamanagement.controllers.artifact_store import artifact_store, atomic_write
+from datamanagement.controllers.columnar_cache import is_cache_fresh, read_columnar_cache, iter_columnar_cache
+from datamanagement.controllers.frame_cache import frame_cache
+from datamanagement.controllers.single_flight import single_flight
+from datamanagement.controllers.source_prefix import find_appended_offset
+from datamanagement.configuration.variables import (LIMIT_TO_FIRST_N_COLUMNS, LIMIT_TO_TOP_N_ROWS,
+                                                    STREAMING_MODE, STREAM_CHUNK_SIZE, PII_THRESHOLD, PII_SAMPLING)
 
 
 class DataDriver:
-  def __init__(self, selected_dataset):
+  def __init__(self, selected_dataset, streaming=STREAMING_MODE):
     self.file = selected_dataset[0]
     self.title = selected_dataset[1]
     self.id_column = selected_dataset[2]
@@ -27,36 +33,94 @@ class DataDriver:
 
     self.data = None
     self.error_code = None
+    self.streaming = streaming
 
   def load_data(self, replace_empty_stings_with_NaNs = True):
     try:
-      if str(self.file).endswith("csv"):
-        try:
-          self.data = pd.read_csv(self.filepath, nrows= LIMIT_TO_TOP_N_ROWS, usecols=list(range(LIMIT_TO_FIRST_N_COLUMNS)),
-                            keep_default_na=False, low_memory=False, skipinitialspace=True)
-        except ValueError as e:
-          self.data = pd.read_csv(self.filepath, nrows= LIMIT_TO_TOP_N_ROWS,
-                            keep_default_na=False, low_memory=False, skipinitialspace=True)
-      elif str(self.file).endswith("tsv"):
-        try:
-          self.data = pd.read_csv(self.filepath, nrows= LIMIT_TO_TOP_N_ROWS, usecols=list(range(LIMIT_TO_FIRST_N_COLUMNS)),
-                            keep_default_na=False, sep='\t', skipinitialspace=True)
-        except ValueError as e:
-          self.data = pd.read_csv(self.filepath, nrows= LIMIT_TO_TOP_N_ROWS,
-                            keep_default_na=False, low_memory=False, skipinitialspace=True)
-      elif str(self.file).endswith("xls") or str(self.file).endswith("xlsx"):
-        self.data = pd.read_excel(self.filepath, nrows= LIMIT_TO_TOP_N_ROWS, usecols=list(range(LIMIT_TO_FIRST_N_COLUMNS)),
-                          keep_default_na=False, skipinitialspace=True)
-
-      if replace_empty_stings_with_NaNs:
-        self.data = self.data.replace(r'^\s*$', np.NaN, regex=True) #replace empty strings with NaNs
-
+      # Every controller built for the same file shares one parsed frame per process
+      load_options = (replace_empty_stings_with_NaNs, LIMIT_TO_TOP_N_ROWS, LIMIT_TO_FIRST_N_COLUMNS)
+      self.data = frame_cache.get_or_load(self.filepath, load_options,
+                                          lambda: self.read_data(replace_empty_stings_with_NaNs))
       return True
 
     except ValueError as err:
       self.error_code = str("{0}".format(err))
       return False
 
+  def read_data(self, replace_empty_stings_with_NaNs = True):
+    data = None
+
+    # Prefer the typed columnar cache written at upload time, unless the file changed since
+    if is_cache_fresh(self.filepath):
+      data = read_columnar_cache(self.filepath, max_columns=LIMIT_TO_FIRST_N_COLUMNS,
+                                 nrows=LIMIT_TO_TOP_N_ROWS)
+    elif str(self.file).endswith("csv"):
+      try:
+        data = pd.read_csv(self.filepath, nrows= LIMIT_TO_TOP_N_ROWS, usecols=list(range(LIMIT_TO_FIRST_N_COLUMNS)),
+                          keep_default_na=False, low_memory=False, skipinitialspace=True)
+      except ValueError as e:
+        data = pd.read_csv(self.filepath, nrows= LIMIT_TO_TOP_N_ROWS,
+                          keep_default_na=False, low_memory=False, skipinitialspace=True)
+    elif str(self.file).endswith("tsv"):
+      try:
+        data = pd.read_csv(self.filepath, nrows= LIMIT_TO_TOP_N_ROWS, usecols=list(range(LIMIT_TO_FIRST_N_COLUMNS)),
+                          keep_default_na=False, sep='\t', skipinitialspace=True)
+      except ValueError as e:
+        data = pd.read_csv(self.filepath, nrows= LIMIT_TO_TOP_N_ROWS,
+                          keep_default_na=False, low_memory=False, skipinitialspace=True)
+    elif str(self.file).endswith("xls") or str(self.file).endswith("xlsx"):
+      data = pd.read_excel(self.filepath, nrows= LIMIT_TO_TOP_N_ROWS, usecols=list(range(LIMIT_TO_FIRST_N_COLUMNS)),
+                        keep_default_na=False, skipinitialspace=True)
+
+    if replace_empty_stings_with_NaNs:
+      data = data.replace(r'^\s*$', np.NaN, regex=True) #replace empty strings with NaNs
+
+    return data
+
+  def iter_chunks(self, chunksize=STREAM_CHUNK_SIZE, replace_empty_stings_with_NaNs=True):
+    """Yield the whole file (all rows, all columns) as DataFrames of at most chunksize rows"""
+    if is_cache_fresh(self.filepath):
+      chunks = iter_columnar_cache(self.filepath, chunksize)
+    elif str(self.file).endswith("csv") or str(self.file).endswith("tsv"):
+      sep = '\t' if str(self.file).endswith("tsv") else ','
+      chunks = pd.read_csv(self.filepath, chunksize=chunksize, sep=sep,
+                           keep_default_na=False, skipinitialspace=True)
+    elif str(self.file).endswith("xls") or str(self.file).endswith("xlsx"):
+      # Excel files cannot be read incrementally, so slice the loaded sheet instead
+      sheet = pd.read_excel(self.filepath, keep_default_na=False)
+      chunks = (sheet.iloc[start:start + chunksize] for start in range(0, len(sheet), chunksize))
+    else:
+      return
+
+    for chunk in chunks:
+      if replace_empty_stings_with_NaNs:
+        chunk = chunk.replace(r'^\s*$', np.NaN, regex=True) #replace empty strings with NaNs
+      yield chunk
+
+  def iter_appended_chunks(self, offset, columns, chunksize=STREAM_CHUNK_SIZE, replace_empty_stings_with_NaNs=True):
+    """Yield the rows appended to a csv/tsv file after byte offset, under the already profiled columns"""
+    if os.path.getsize(self.filepath) <= offset:
+      return
+
+    sep = '\t' if str(self.file).endswith("tsv") else ','
+    with open(self.filepath, 'rb') as source:
+      source.seek(offset)
+      try:
+        chunks = pd.read_csv(source, chunksize=chunksize, sep=sep, header=None, names=columns,
+                             keep_default_na=False, skipinitialspace=True)
+      except pd.errors.EmptyDataError:
+        return
+      for chunk in chunks:
+        if replace_empty_stings_with_NaNs:
+          chunk = chunk.replace(r'^\s*$', np.NaN, regex=True) #replace empty strings with NaNs
+        yield chunk
+
+  def get_appended_offset(self, saved_state):
+    """Byte offset of the rows not folded into saved_state yet, or None to profile the file from the start"""
+    if saved_state is None:
+      return None
+    return find_appended_offset(self.filepath, saved_state.get('source'))
+
   def save_graph(self, plot, filename):
     folder_path = paths.EXAMPLES_FOLDER
     relative_path = paths.EXAMPLES_RELATIVE
@@ -148,22 +212,20 @@ class DataDriver:
   def get_error_msg(self):
     return self.error_code
 
-  def save_json(self, json_to_write, suffix):
+  def get_json_path(self, suffix):
     folder_path = paths.EXAMPLES_FOLDER
 
     if self.file_uploaded:
       folder_path = paths.UPLOAD_FOLDER
 
-    with open(os.path.join(folder_path, self.title, suffix), 'w') as file:
-      file.write(json_to_write)
+    return os.path.join(folder_path, self.title, suffix)
 
-  def load_json(self, json_suffix):
-    folder_path = paths.EXAMPLES_FOLDER
-
-    if self.file_uploaded:
-      folder_path = paths.UPLOAD_FOLDER
+  def save_json(self, json_to_write, suffix):
+    # Readers never see a half-written file
+    atomic_write(self.get_json_path(suffix), json_to_write)
 
-    absolute_filename = os.path.join(folder_path, self.title, json_suffix)
+  def load_json(self, json_suffix):
+    absolute_filename = self.get_json_path(json_suffix)
 
     # Check if the JSON file exists and if not, generate it
     if not os.path.isfile(absolute_filename):
@@ -175,3 +237,64 @@ class DataDriver:
         json_str = serialized_file.read()
         deserialized_json = jsonpickle.decode(json_str)
       return deserialized_json
+
+  def artifact_params(self):
+    # Everything besides the file content and the code that changes a generated artifact
+    return {'title': self.title,
+            'id_column': self.id_column,
+            'label_column': self.label_column,
+            'streaming': self.streaming,
+            'top_n_rows': LIMIT_TO_TOP_N_ROWS,
+            'first_n_columns': LIMIT_TO_FIRST_N_COLUMNS,
+            'pii_threshold': PII_THRESHOLD,
+            'pii_sampling': PII_SAMPLING}
+
+  def get_artifact_key(self, kind):
+    if not os.path.isfile(self.filepath):
+      return None
+    return artifact_store.make_key(artifact_store.get_content_hash(self.filepath), kind, self.artifact_params())
+
+  def load_artifact(self, kind):
+    """Load a generated JSON artifact, or None if it has to be generated for this file, code and parameters"""
+    key = self.get_artifact_key(kind)
+    if key is None:
+      return self.load_json(kind)
+
+    # Reuse the published file as is, or restore it from the store (e.g. an identical re-upload)
+    json_path = self.get_json_path(kind)
+    if not artifact_store.is_published(key, json_path):
+      stored_json = artifact_store.get(key)
+      if stored_json is None:
+        return None
+      artifact_store.publish(key, stored_json, json_path)
+
+    return self.load_json(kind)
+
+  def load_or_generate_artifact(self, kind, generate, flight_kind=None):
+    """
+    Load an artifact, running generate() to create it if needed. Concurrent
+    requests for the same artifact (flight_kind names a generator writing
+    several) wait for one generation instead of each running their own.
+    """
+    artifact = self.load_artifact(kind)
+    if artifact is not None:
+      return artifact
+
+    def generate_once():
+      # Another process may have generated it while we waited for the lock
+      if self.load_artifact(kind) is None:
+        generate()
+
+    flight_kind = flight_kind or kind
+    flight_name = self.get_artifact_key(flight_kind) or self.get_json_path(flight_kind)
+    single_flight.run(flight_name, generate_once)
+    return self.load_artifact(kind)
+
+  def save_artifact(self, json_to_write, kind):
+    key = self.get_artifact_key(kind)
+    if key is None:
+      self.save_json(json_to_write, kind)
+      return
+
+    artifact_store.put(key, json_to_write, kind=kind, params=self.artifact_params())
+    artifact_store.publish(key, json_to_write, self.get_json_path(kind))
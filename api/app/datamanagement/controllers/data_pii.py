@@ -1,114 +1,210 @@
 import os
-from collections import defaultdict,Counter
+from collections import defaultdict, Counter, OrderedDict
 from more_itertools import one
 import functools, operator
 import jsonpickle
+import numpy as np
+import pandas as pd
 
 from datamanagement.configuration import paths
-from datamanagement.configuration.variables import PII_THRESHOLD
+from datamanagement.configuration.variables import (PII_THRESHOLD, PII_SAMPLING, PII_SAMPLE_FIRST_BATCH,
+                                                    PII_SAMPLE_Z, PII_SAMPLE_SEED, PII_NER_SAMPLE_ROWS,
+                                                    STREAMING_MODE)
 from datamanagement.controllers.data_driver import DataDriver
+from datamanagement.controllers.sketches import ReservoirSample
 from datamanagement.model.feature_pii import FeaturePii
 from datamanagement.model.feature_piis import FeaturePiis
 
-from datamanagement.pii.commonregex import CommonRegex, regexes
+from datamanagement.pii.scan_pool import scan_columns_pii
+from datamanagement.pii.scanner import count_values, count_matches, scan_value_counts
+from datamanagement.pii.spacy_models import count_entity_labels
+from datamanagement.pii.utils import save_pii_json
 
-import usaddress
-import spacy
-# nlp = spacy.load('en_core_web_sm')
+# Scores of these types count only above NEGLECT_THRESHOLD
+NEGLECTED_PII_TYPES = ('zip_codes', 'dates', 'QUANTITY')
+NEGLECT_THRESHOLD = 80
 
 class DataPii(DataDriver):
-    def __init__(self, selected_dataset):
-        DataDriver.__init__(self, selected_dataset)
-        self._nlp = spacy.load('en_core_web_sm')
+    def __init__(self, selected_dataset, sampling=PII_SAMPLING, streaming=STREAMING_MODE):
+        DataDriver.__init__(self, selected_dataset, streaming=streaming)
         self._num_of_rows = 30
-        self._parser = CommonRegex()
+        self.sampling = sampling
 
     def load_pii_json(self):
-        pii_json = self.load_json(paths.PII_SUFFIX)
-
-        if pii_json is None:
-            self.generate_pii_json()
-            pii_json = self.load_json(paths.PII_SUFFIX)
-
-        return pii_json
+        return self.load_or_generate_artifact(paths.PII_SUFFIX, self.generate_pii_json)
 
     def load_pii_flare_json(self):
-        pii_json = self.load_json(paths.PII_FLARE_SUFFIX)
-
-        if pii_json is None:
-            self.generate_pii_json()
-            pii_json = self.load_json(paths.PII_FLARE_SUFFIX)
-
-        return pii_json
+        # generate_pii_json writes both files, so share its flight with load_pii_json
+        return self.load_or_generate_artifact(paths.PII_FLARE_SUFFIX, self.generate_pii_json,
+                                              flight_kind=paths.PII_SUFFIX)
 
     def generate_pii_json(self):
-        load_sucess = True
-
-        if self.data is None and os.path.isfile(self.filepath):
-            load_success = self.load_data()
-
-        if load_success:
-            feature_pii_collection = []
-            feature_pii_collection_flare = []
-            self._total_rows = self.data.shape[0]
-            feature_index = 0
-
-            for feat_name in self.data.columns.values:
-                feature_pii = self.get_pii(feat_name, feature_index)
-                feature_pii_collection.append(feature_pii)
-                feature_pii_collection_flare.append(feature_pii.to_flare())
-                feature_index += 1
-
-            feature_piis = FeaturePiis(self.title, feature_pii_collection)
-            feature_piis_json = jsonpickle.encode(feature_piis, unpicklable=False)
+        # Streaming mode scans every row of the file without loading it at once
+        if self.streaming and os.path.isfile(self.filepath):
+            feature_pii_collection = self.get_streaming_piis()
+        else:
+            load_success = True
 
-            self.save_json(json_to_write=feature_piis_json, suffix=paths.PII_SUFFIX)
+            if self.data is None and os.path.isfile(self.filepath):
+                load_success = self.load_data()
 
-            feature_piis_flare = FeaturePiis(self.title, feature_pii_collection_flare)
-            feature_piis_flare_json = jsonpickle.encode(feature_piis_flare.to_flare(),
-                                                      unpicklable=False)
+            if not load_success:
+                return
 
-            self.save_json(json_to_write=feature_piis_flare_json, suffix=paths.PII_FLARE_SUFFIX)
+            self._total_rows = self.data.shape[0]
+            feature_pii_collection = self.get_piis()
+
+        feature_pii_collection_flare = [feature_pii.to_flare() for feature_pii in feature_pii_collection]
+
+        feature_piis = FeaturePiis(self.title, feature_pii_collection)
+        feature_piis_json = jsonpickle.encode(feature_piis, unpicklable=False)
+
+        self.save_artifact(json_to_write=feature_piis_json, kind=paths.PII_SUFFIX)
+
+        feature_piis_flare = FeaturePiis(self.title, feature_pii_collection_flare)
+        feature_piis_flare_json = jsonpickle.encode(feature_piis_flare.to_flare(),
+                                                  unpicklable=False)
+
+        self.save_artifact(json_to_write=feature_piis_flare_json, kind=paths.PII_FLARE_SUFFIX)
+
+    def get_streaming_piis(self):
+        # Regex hit counters and an NER sample per column, so memory does not grow with the file
+        num_records = 0
+        regex_counts = OrderedDict()
+        samples = OrderedDict()
+        for chunk in self.iter_chunks():
+            num_records += chunk.shape[0]
+            for feat_name in chunk.columns.values:
+                if feat_name not in regex_counts:
+                    regex_counts[feat_name] = Counter()
+                    samples[feat_name] = ReservoirSample(PII_NER_SAMPLE_ROWS, seed=PII_SAMPLE_SEED)
+                regex_counts[feat_name].update(count_matches(count_values(chunk[feat_name])))
+                samples[feat_name].update(chunk[feat_name].astype(str).values)
+        self._total_rows = num_records
+
+        feature_pii_collection = []
+        pii_json = {}
+        for feat_name, counts in regex_counts.items():
+            regex_scores = {key: count / num_records for key, count in counts.items()}
+            sample = samples[feat_name].values
+            spacy_counts = count_entity_labels(count_values(pd.Series(sample, dtype=object)))
+
+            scores = self.combine_scores(regex_scores, spacy_counts, spacy_rows=len(sample))
+            feature_pii_collection.append(self.make_feature_pii(feat_name, scores, num_records))
+
+            # Same counters, in the shares-per-type layout of pii.utils.write_pii
+            column_json = dict(regex_scores)
+            column_json.update({label: count / len(sample) for label, count in spacy_counts.items()})
+            for ent in NEGLECTED_PII_TYPES:
+                if ent in column_json and not column_json[ent] > NEGLECT_THRESHOLD / 100:
+                    column_json[ent] = 0
+            pii_json[feat_name] = column_json
+
+        save_pii_json(self.file, self.file_uploaded, pii_json, streaming=True)
+        return feature_pii_collection
+
+    def get_piis(self):
+        if self.sampling:
+            return [self.get_pii(feat_name, feature_index)
+                    for feature_index, feat_name in enumerate(self.data.columns.values)]
+
+        # Full scans of the columns are independent, so they may run in the PII pool
+        feat_names = self.data.columns.values
+        results = scan_columns_pii([(count_values(self.data[feat_name]), None) for feat_name in feat_names])
+        return [self.make_feature_pii(feat_name,
+                                      self.combine_scores({key: count / self._total_rows for key, count in matches.items()},
+                                                          spacy_counts),
+                                      self._total_rows)
+                for feat_name, (matches, spacy_counts) in zip(feat_names, results)]
 
     def get_pii(self, feat_name, feature_index):
-        var__pii_types_and_scores = self.pii_scores(feat_name)
+        if self.sampling:
+            var__pii_types_and_scores, var__rows_examined = self.sampled_pii_scores(feat_name)
+        else:
+            var__pii_types_and_scores, var__rows_examined = self.pii_scores(feat_name), self._total_rows
+        return self.make_feature_pii(feat_name, var__pii_types_and_scores, var__rows_examined)
+
+    def make_feature_pii(self, feat_name, var__pii_types_and_scores, var__rows_examined):
         var__most_likely_pii_type = dict(Counter(var__pii_types_and_scores).most_common(1))
         var__is_pii = one(var__most_likely_pii_type.values()) > PII_THRESHOLD
 
         feature_pii = FeaturePii(feat_name=feat_name,
                                  is_pii=var__is_pii,
                                  most_likely_pii_type=var__most_likely_pii_type,
-                                 pii_types_and_scores=var__pii_types_and_scores)
+                                 pii_types_and_scores=var__pii_types_and_scores,
+                                 rows_examined=var__rows_examined)
         return feature_pii
 
 
     def pii_scores(self, feat_name):
-        pii_types_and_scores = defaultdict(lambda: "Not Present")
-
+        value_counts = count_values(self.data[feat_name])
+        return self.combine_scores(scan_value_counts(value_counts, self._total_rows),
+                                   count_entity_labels(value_counts))
+
+    def sampled_pii_scores(self, feat_name):
+        """
+        Estimate pii_scores from random batches of rows that double in size,
+        stopping once is_pii and the most likely type are settled. Returns the
+        scores and the number of rows examined.
+        """
         colData = self.data[feat_name]
         total_num = self._total_rows
-        for key in regexes.keys():
-            if not key in ['street_addresses']:
-                pii_types_and_scores[key] = colData.astype(str).apply(lambda x: True if getattr(self._parser, key)(x) else False).values.sum() / total_num
-                pii_types_and_scores[key] = int(pii_types_and_scores[key] * 100) #convert from scores(float) to percentage(int)
-
-            else:
-                pii_types_and_scores[key] = colData.astype(str).apply(lambda x: len(set([t[1] for t in usaddress.parse(x)])) >= 3).values.sum() / total_num
-                pii_types_and_scores[key] = int(pii_types_and_scores[key] * 100) #convert from scores(float) to percentage(int)
-
+        rows = np.random.RandomState(PII_SAMPLE_SEED).permutation(total_num)
+
+        regex_counts = Counter()
+        spacy_counts = Counter()
+        rows_examined = 0
+        batch_size = PII_SAMPLE_FIRST_BATCH
+        while rows_examined < total_num:
+            value_counts = count_values(colData.iloc[rows[rows_examined:rows_examined + batch_size]])
+            regex_counts.update(count_matches(value_counts))
+            spacy_counts.update(count_entity_labels(value_counts))
+            rows_examined = min(rows_examined + batch_size, total_num)
+            batch_size *= 2
+            if self.is_settled(regex_counts, spacy_counts, rows_examined):
+                break
+
+        # Entities are counted over the whole column in pii_scores, so extrapolate them
+        scale = total_num / rows_examined
+        scores = self.combine_scores({key: count / rows_examined for key, count in regex_counts.items()},
+                                     {label: count * scale for label, count in spacy_counts.items()})
+        return scores, rows_examined
+
+    def is_settled(self, regex_counts, spacy_counts, rows_examined):
+        """Whether is_pii and the most likely type hold across the confidence intervals of the scores"""
+        spacy_scale = 100 * self._total_rows / self._num_of_rows
+        bounds = {key: [100 * bound for bound in wilson_interval(count, rows_examined)]
+                  for key, count in regex_counts.items()}
+        bounds.update({label: [spacy_scale * bound for bound in wilson_interval(min(count, rows_examined), rows_examined)]
+                       for label, count in spacy_counts.items()})
+
+        for ent in NEGLECTED_PII_TYPES:
+            if ent in bounds:
+                low, high = bounds[ent]
+                bounds[ent] = [low if low > NEGLECT_THRESHOLD else 0, high if high > NEGLECT_THRESHOLD else 0]
+
+        # No type can reach the threshold, whichever of them is most likely
+        if all(high <= PII_THRESHOLD for low, high in bounds.values()):
+            return True
+
+        leader = max(bounds, key=lambda key: bounds[key][0])
+        leader_low = bounds[leader][0]
+        return leader_low > PII_THRESHOLD and all(high < leader_low for key, (low, high) in bounds.items()
+                                                  if key != leader)
+
+    def combine_scores(self, regex_scores, spacy_counts, spacy_rows=None):
+        pii_types_and_scores = defaultdict(lambda: "Not Present")
+        for key, score in regex_scores.items():
+            pii_types_and_scores[key] = int(score * 100) #convert from scores(float) to percentage(int)
 
-        spacy_results = defaultdict(lambda: "Not Present")
-        spacy_results = sum_over_dict_list(colData.astype(str)
-                                    .apply(lambda x: [ent.label_ for ent in self._nlp(x).ents
-                                        if ent.label_ not in ['CARDINAL', 'DATE']]).tolist())
-        spacy_results = {k:int(v * 100 / self._num_of_rows)
-            for k, v in spacy_results.items()}
+        spacy_rows = spacy_rows or self._num_of_rows
+        spacy_results = {k:int(v * 100 / spacy_rows)
+            for k, v in spacy_counts.items()}
 
         comb_dict = combDict(pii_types_and_scores, spacy_results)
         # st.write(comb_dict)
-        comb_dict = neglect(comb_dict, 'zip_codes', 80)
-        comb_dict = neglect(comb_dict, 'dates', 80)
-        comb_dict = neglect(comb_dict, 'QUANTITY', 80)
+        for ent in NEGLECTED_PII_TYPES:
+            comb_dict = neglect(comb_dict, ent, NEGLECT_THRESHOLD)
 
         return comb_dict
 
@@ -116,6 +212,14 @@ class DataPii(DataDriver):
 def makehash():
     return defaultdict(list)
 
+def wilson_interval(count, n, z=PII_SAMPLE_Z):
+    ''' Wilson score interval of a proportion seen count times in n rows'''
+    p = count / n
+    denominator = 1 + z ** 2 / n
+    center = (p + z ** 2 / (2 * n)) / denominator
+    margin = z * np.sqrt(p * (1 - p) / n + z ** 2 / (4 * n ** 2)) / denominator
+    return max(0.0, center - margin), min(1.0, center + margin)
+
 def sum_over_dict_list(dict_list):
     return dict(functools.reduce(operator.add, map(Counter, dict_list)))
 
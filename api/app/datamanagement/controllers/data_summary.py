@@ -1,30 +1,29 @@
 import os
-from collections import OrderedDict
 import jsonpickle
-import pandas as pd
 
 from datamanagement.configuration import paths
+from datamanagement.configuration.variables import STREAMING_MODE
+from datamanagement.controllers.accumulators import RowsMissingAccumulator
 from datamanagement.controllers.data_driver import DataDriver
+from datamanagement.controllers.source_prefix import get_prefix_stamp
 from datamanagement.model.summary import Summary
 
 
 class DataSummary(DataDriver):
-    def __init__(self, selected_dataset):
-        DataDriver.__init__(self, selected_dataset)
+    def __init__(self, selected_dataset, streaming=STREAMING_MODE):
+        DataDriver.__init__(self, selected_dataset, streaming=streaming)
 
     def load_summary_json(self):
-        # Try to load an existing JSON file
-        summary_json = self.load_json(paths.SUMMARY_SUFFIX)
-
-        # If the file doesn't exist, generate it
-        if summary_json is None:
-            self.generate_summary_json()
-            summary_json = self.load_json(paths.SUMMARY_SUFFIX)
-
-        # Return the JSON
-        return summary_json
+        # Load the JSON for this exact file, code and parameters, generating it once if needed
+        return self.load_or_generate_artifact(paths.SUMMARY_SUFFIX, self.generate_summary_json)
 
     def generate_summary_json(self):
+        # Streaming mode summarizes every row of the file without loading it at once
+        if self.streaming and os.path.isfile(self.filepath):
+            summary = self.get_streaming_summary()
+            self.save_artifact(json_to_write=jsonpickle.encode(summary), kind=paths.SUMMARY_SUFFIX)
+            return
+
         load_success = True
 
         # Check if the data file exists, and if so, load the data as needed
@@ -36,7 +35,7 @@ class DataSummary(DataDriver):
             summary_json = jsonpickle.encode(summary)
 
             # Save the serialized JSON to a file
-            self.save_json(json_to_write=summary_json, suffix=paths.SUMMARY_SUFFIX)
+            self.save_artifact(json_to_write=summary_json, kind=paths.SUMMARY_SUFFIX)
 
     def get_summary(self):
         # Get summary stats about the data and serialize it as JSON
@@ -64,6 +63,59 @@ class DataSummary(DataDriver):
                           sample_list=sample_list)
         return summary
 
+    def get_streaming_summary(self):
+        # Fold the summary stats over the file one chunk at a time
+        num_records = 0
+        rows_missing = RowsMissingAccumulator()
+        features_list = []
+        sample_list = []
+
+        # If rows were only appended since the saved summary, fold in just the new rows
+        saved_state = self.load_json(paths.SUMMARY_STATE_SUFFIX)
+        offset = self.get_appended_offset(saved_state)
+        source = get_prefix_stamp(self.filepath, saved_state['source'] if offset is not None else None)
+        if offset is not None:
+            num_records = saved_state['num_records']
+            rows_missing = RowsMissingAccumulator.from_state(saved_state['rows_missing'])
+            features_list = saved_state['features_list']
+            sample_list = saved_state['sample_list']
+            chunks = self.iter_appended_chunks(offset, features_list)
+        else:
+            chunks = self.iter_chunks()
+
+        for chunk in chunks:
+            self.data = chunk
+            num_chunk_records = self.get_num_records()
+
+            # Sample data comes from the first chunk
+            if not features_list:
+                features_list = self.get_features_list()
+                sample_list = self.get_sample(num_chunk_records, features_list)
+
+            num_records += num_chunk_records
+            rows_missing.update(chunk)
+
+        # Don't keep the last chunk around as if it was the whole data set
+        self.data = None
+
+        summary_state = {'source': source,
+                         'num_records': num_records,
+                         'rows_missing': rows_missing.to_state(),
+                         'features_list': features_list,
+                         'sample_list': sample_list}
+        self.save_json(json_to_write=jsonpickle.encode(summary_state, unpicklable=False),
+                       suffix=paths.SUMMARY_STATE_SUFFIX)
+
+        summary = Summary(name=self.title,
+                          num_records=num_records,
+                          num_features=len(features_list),
+                          index_column=self.id_column,
+                          label_column=self.label_column,
+                          rows_missing=rows_missing.to_dict(),
+                          features_list=features_list,
+                          sample_list=sample_list)
+        return summary
+
     def get_num_records(self):
         return self.data.shape[0]
 
@@ -71,30 +123,9 @@ class DataSummary(DataDriver):
         return self.data.shape[1]
 
     def count_missing(self, num_records):
-        # Count the number of columns missing for each row
-        count_missing = self.data.apply(lambda x: sum(x.isnull().values), axis=1)
-        self.data["num_missing"] = pd.Series(count_missing)
-
-        num_rows_missing = {}
-        cumulative_row_sum = 0
-
-        for i in range(0, num_records):
-            # Count the number of missing rows and add it to the list
-            num_rows_i_missing = int(sum(self.data["num_missing"] == i))
-            num_rows_missing[i] = num_rows_i_missing
-            cumulative_row_sum += num_rows_i_missing
-
-            # If we reached the point where we have accounted for all rows, stop looking for rows
-            if cumulative_row_sum == num_records:
-                break
-
-        # Sort the dictionary
-        num_rows_missing = OrderedDict(sorted(num_rows_missing.items()))
-
-        # Remove the added column
-        self.data.drop("num_missing", axis=1, inplace=True)
-
-        return num_rows_missing
+        # Count the number of columns missing for each row, as a histogram
+        # {number of missing columns: number of rows}, in one vectorized pass
+        return RowsMissingAccumulator().update(self.data).to_dict()
 
     def get_sample(self, num_records, features_list):
         num_samples = 5
@@ -4,131 +4,172 @@ import seaborn as sns
 
 from datamanagement.configuration import const_types
 from datamanagement.configuration import paths
+from datamanagement.configuration.variables import (STREAMING_MODE, PROFILE_WORKERS, PROFILE_PARALLEL_MIN_COLUMNS,
+                                                    SKETCH_MIN_FILE_BYTES)
+from datamanagement.controllers.accumulators import ColumnAccumulator
+from datamanagement.controllers.profiling_pool import profile_columns
+from datamanagement.controllers.source_prefix import get_prefix_stamp
 from datamanagement.controllers.data_driver import DataDriver
 from datamanagement.controllers.data_pii import DataPii
 from datamanagement.model.feature import Feature
 from datamanagement.model.features import Features
 
-from collections import defaultdict
+from collections import defaultdict, OrderedDict
 import pandas as pd
 import numpy as np
 
 
 class DataUnivariate(DataDriver):
-    def __init__(self, selected_dataset):
-        DataDriver.__init__(self, selected_dataset)
+    def __init__(self, selected_dataset, streaming=STREAMING_MODE, workers=PROFILE_WORKERS):
+        DataDriver.__init__(self, selected_dataset, streaming=streaming)
+        self.workers = workers
         self.pii_data = DataPii(selected_dataset).load_pii_json()
 
     def load_features_json(self):
-        features_json = self.load_json(paths.FEATURES_SUFFIX)
-
-        # If the file doesn't exist, generate it
-        if features_json is None:
-            self.generate_features_json()
-            features_json = self.load_json(paths.FEATURES_SUFFIX)
-
-        # Return the JSON
-        return features_json
+        # Load the JSON for this exact file, code and parameters, generating it once if needed
+        return self.load_or_generate_artifact(paths.FEATURES_SUFFIX, self.generate_features_json)
 
     def generate_features_json(self):
-        load_success = True
-
-        # Check if the data file exists, and if so, load the data as needed
-        if self.data is None and os.path.isfile(self.filepath):
-            load_success = self.load_data()
-
-        if load_success:
-            features_collection = []
-            feature_index = 0
-
-            for feat_physical_name in self.data.columns.values:
-                feature = self.get_feature(feat_physical_name, feature_index)
-                features_collection.append(feature)
-                feature_index += 1
-
-            # Create object holding features collection and save as JSON
-            features = Features(self.title, features_collection)
-            features_json = jsonpickle.encode(features, unpicklable=False,)
-
-            # Save the serialized JSON to a file
-            self.save_json(json_to_write=features_json, suffix=paths.FEATURES_SUFFIX)
+        # Streaming mode profiles every row and column of the file without loading it at once
+        if self.streaming and os.path.isfile(self.filepath):
+            features_collection = self.get_streaming_features()
+        else:
+            load_success = True
+
+            # Check if the data file exists, and if so, load the data as needed
+            if self.data is None and os.path.isfile(self.filepath):
+                load_success = self.load_data()
+
+            if not load_success:
+                return
+
+            if self.workers > 1 and len(self.data.columns) >= PROFILE_PARALLEL_MIN_COLUMNS:
+                # Columns are independent, so profile them across a process pool
+                features_collection = [self.get_accumulated_feature(accumulator, feature_index)
+                                       for feature_index, accumulator
+                                       in enumerate(profile_columns(self.data, self.workers))]
+            else:
+                features_collection = []
+                feature_index = 0
+
+                for feat_physical_name in self.data.columns.values:
+                    feature = self.get_feature(feat_physical_name, feature_index)
+                    features_collection.append(feature)
+                    feature_index += 1
+
+        # Create object holding features collection and save as JSON
+        features = Features(self.title, features_collection)
+        features_json = jsonpickle.encode(features, unpicklable=False,)
+
+        # Save the serialized JSON to a file
+        self.save_artifact(json_to_write=features_json, kind=paths.FEATURES_SUFFIX)
+
+    def get_streaming_features(self):
+        # Fold every chunk of the file into one accumulator per column
+        accumulators = OrderedDict()
+
+        # If rows were only appended since the saved profile, fold in just the new rows
+        saved_state = self.load_json(paths.FEATURES_SKETCH_SUFFIX)
+        offset = self.get_appended_offset(saved_state)
+        source = get_prefix_stamp(self.filepath, saved_state['source'] if offset is not None else None)
+
+        # Large files keep mergeable sketches for when exact value counts overflow
+        sketch = source['offset'] >= SKETCH_MIN_FILE_BYTES
+        if offset is not None:
+            for column_state in saved_state['columns']:
+                accumulator = ColumnAccumulator.from_state(column_state)
+                accumulators[accumulator.name] = accumulator
+            chunks = self.iter_appended_chunks(offset, list(accumulators))
+        else:
+            chunks = self.iter_chunks()
+
+        for chunk in chunks:
+            for feat_physical_name in chunk.columns.values:
+                if feat_physical_name not in accumulators:
+                    accumulators[feat_physical_name] = ColumnAccumulator(feat_physical_name, sketch=sketch)
+                accumulators[feat_physical_name].update(chunk[feat_physical_name])
+
+        self.save_sketch_state(list(accumulators.values()), source)
+
+        return [self.get_accumulated_feature(accumulator, feature_index)
+                for feature_index, accumulator in enumerate(accumulators.values())]
+
+    def save_sketch_state(self, accumulators, source):
+        # Stored next to features.json, with the profiled prefix of the file,
+        # so appended rows can be merged in later without a rescan
+        sketch_state = {'title': self.title,
+                        'source': source,
+                        'columns': [accumulator.to_state() for accumulator in accumulators]}
+        self.save_json(json_to_write=jsonpickle.encode(sketch_state, unpicklable=False),
+                       suffix=paths.FEATURES_SKETCH_SUFFIX)
 
     def get_feature(self, feat_physical_name, feature_index):
-        var_datatype = self.get_data_type(feat_physical_name)
-        var_vartype = self.get_vartype_formatted(feat_physical_name)
-        var_count = self.get_count(feat_physical_name)
-        var_missing = self.get_missing_formatted(feat_physical_name)
-        var_unique = self.get_count_unique(feat_physical_name)
-
-        # Numeric only
-        var_avg = self.format_rounded_string(self.get_average(feat_physical_name))
-        var_median = self.get_median(feat_physical_name)
-        var_mode = self.get_mode(feat_physical_name)
-        var_max = self.get_max(feat_physical_name)
-        var_min = self.get_min(feat_physical_name)
-        var_stddev = self.format_rounded_string(self.get_stddev(feat_physical_name))
-        var_variance = self.format_rounded_string(self.get_variance(feat_physical_name))
-        var_quantile25 = self.format_rounded_string(self.get_quantile25(feat_physical_name))
-        var_quantile75 = self.format_rounded_string(self.get_quantile75(feat_physical_name))
-        var_iqr = self.format_rounded_string(self.get_iqr(feat_physical_name))
-        var_skew = self.format_rounded_string(self.get_skew(feat_physical_name))
-        var_kurtosis = self.format_rounded_string(self.get_kurtosis(feat_physical_name))
-        var_outlier_score = self.get_outlier_score(feat_physical_name)
-
-        # Non-numeric only
-        var_mostcommon = self.get_mostcommon(feat_physical_name)
-        var_5_mostcommon_values, var_5_mostcommon_counts = self.get_n_mostcommon(feat_physical_name, 5)
-        var_leastcommon = self.get_leastcommon(feat_physical_name)
-        var_5_leastcommon_values, var_5_leastcommon_counts = self.get_n_leastcommon(feat_physical_name, 5)
-        var_max_length = self.get_max_length(feat_physical_name)
-        var_min_length = self.get_min_length(feat_physical_name)
-
-
-
-        # Graphs
-        # graph_histogram = self.get_histogram(feat_physical_name)
-        # graph_countplot = self.get_countplot(feat_physical_name)
+        # Profile the column in one fused pass: a single dropna, value_counts, sort and
+        # dtype decision feed every statistic, instead of one pass per getter below
+        accumulator = ColumnAccumulator(feat_physical_name, max_tracked_values=None)
+        accumulator.update(self.data[feat_physical_name])
+        return self.get_accumulated_feature(accumulator, feature_index)
+
+    def get_accumulated_feature(self, accumulator, feature_index):
+        feat_physical_name = accumulator.name
+        is_numeric = accumulator.is_numeric()
+
+        var_quantile25 = accumulator.get_quantile(0.25) if is_numeric else None
+        var_quantile75 = accumulator.get_quantile(0.75) if is_numeric else None
+        var_iqr = var_quantile75 - var_quantile25 if var_quantile25 is not None and var_quantile75 is not None else None
+        var_median = accumulator.get_quantile(0.5) if is_numeric else None
+        # Nothing of a non-numeric column lies between the missing quartiles
+        var_outlier_score = accumulator.get_count_between(var_quantile25, var_quantile75) if is_numeric else 0
+
+        if is_numeric:
+            var_5_mostcommon_values, var_5_mostcommon_counts = None, None
+            var_5_leastcommon_values, var_5_leastcommon_counts = None, None
+        else:
+            var_5_mostcommon_values, var_5_mostcommon_counts = accumulator.get_n_mostcommon(5)
+            var_5_leastcommon_values, var_5_leastcommon_counts = accumulator.get_n_leastcommon(5)
 
         # Errors, warnings, and info
-        feat_errors = self.get_errors(feat_physical_name)
-        feat_warnings = self.get_warnings(feat_physical_name)
-        feat_notes = self.get_notes(feat_physical_name)
+        percent_missing = accumulator.get_percent_missing()
+        feat_warnings = []
+        if accumulator.get_percent_unique() == 1:
+            feat_warnings.append("This feature has all unique values")
+        if percent_missing >= 50:
+            feat_warnings.append("This feature is missing in 50% or more rows")
+        feat_notes = []
+        if percent_missing == 0:
+            feat_notes.append("This feature is not missing any values")
 
         # Pii information
-        var__is_pii = self.pii_data['piis'][feature_index]['is_pii']
-        var__pii_type = self.pii_data['piis'][feature_index]['most_likely_pii_type']
+        var__is_pii, var__pii_type = self.get_pii_info(feature_index)
 
-        # Save the feature stats
         feature = Feature(feat_physical_name=feat_physical_name,
                           feat_index=feature_index,
-                          feat_datatype=var_datatype,
-                          feat_vartype=var_vartype,
-                          feat_count=var_count,
-                          feat_missing=var_missing,
-                          feat_unique=var_unique,
-                          feat_average=var_avg,
-                          feat_median=var_median,
-                          feat_mode=var_mode,
-                          feat_max=var_max,
-                          feat_max_length=var_max_length,
-                          feat_min=var_min,
-                          feat_min_length=var_min_length,
-                          feat_stddev=var_stddev,
-                          feat_variance=var_variance,
-                          feat_quantile25=var_quantile25,
-                          feat_quantile75=var_quantile75,
-                          feat_iqr=var_iqr,
-                          feat_skew=var_skew,
-                          feat_kurtosis=var_kurtosis,
-                          feat_mostcommon=var_mostcommon,
+                          feat_datatype=accumulator.get_data_type(),
+                          feat_vartype=self.get_accumulated_vartype_formatted(accumulator),
+                          feat_count=accumulator.count,
+                          feat_missing=str("%s (%.3f%%)" % (accumulator.nulls, percent_missing)),
+                          feat_unique=accumulator.get_count_unique(),
+                          feat_average=self.format_rounded_string(accumulator.get_average() if is_numeric else None),
+                          feat_median=None if var_median is None else float(var_median),
+                          feat_mode=accumulator.get_mode(),
+                          feat_max=accumulator.get_max() if is_numeric else None,
+                          feat_max_length=None if is_numeric else accumulator.get_max_length(),
+                          feat_min=accumulator.get_min() if is_numeric else None,
+                          feat_min_length=None if is_numeric else accumulator.get_min_length(),
+                          feat_stddev=self.format_rounded_string(accumulator.get_stddev() if is_numeric else None),
+                          feat_variance=self.format_rounded_string(accumulator.get_variance() if is_numeric else None),
+                          feat_quantile25=self.format_rounded_string(var_quantile25),
+                          feat_quantile75=self.format_rounded_string(var_quantile75),
+                          feat_iqr=self.format_rounded_string(var_iqr),
+                          feat_skew=self.format_rounded_string(accumulator.get_skew() if is_numeric else None),
+                          feat_kurtosis=self.format_rounded_string(accumulator.get_kurtosis() if is_numeric else None),
+                          feat_mostcommon=None if is_numeric else accumulator.get_mostcommon(),
                           feat_5_mostcommon_values=var_5_mostcommon_values,
                           feat_5_mostcommon_counts=var_5_mostcommon_counts,
-                          feat_leastcommon=var_leastcommon,
+                          feat_leastcommon=None if is_numeric else accumulator.get_leastcommon(),
                           feat_5_leastcommon_values=var_5_leastcommon_values,
                           feat_5_leastcommon_counts=var_5_leastcommon_counts,
-                        #   graph_histogram=graph_histogram,
-                        #   graph_countplot=graph_countplot,
-                          feat_errors=feat_errors,
+                          feat_errors=None,
                           feat_warnings=feat_warnings,
                           feat_notes=feat_notes,
                           feat_outlierscore=var_outlier_score,
@@ -136,6 +177,31 @@ class DataUnivariate(DataDriver):
                           feat_pii_type=var__pii_type)
         return feature
 
+    def get_accumulated_vartype_formatted(self, accumulator):
+        var_datatype = accumulator.get_data_type()
+        var_vartype = const_types.VARTYPE_UNKNOWN
+
+        if var_datatype == const_types.DATATYPE_BOOLEAN:
+            var_vartype = const_types.VARTYPE_BINARY
+        elif var_datatype == const_types.DATATYPE_STRING or var_datatype == const_types.DATATYPE_DATE:
+            var_vartype = const_types.VARTYPE_CATEGORICAL
+        elif var_datatype == const_types.DATATYPE_INTEGER or var_datatype == const_types.DATATYPE_FLOAT:
+            # Too many distinct values to track means the feature is not categorical
+            percent_unique = accumulator.get_percent_unique()
+            if percent_unique is not None and percent_unique < 0.10:
+                var_vartype = const_types.VARTYPE_CATEGORICAL
+            else:
+                var_vartype = const_types.VARTYPE_CONTINUOUS
+
+        return self.label_vartype(accumulator.name, var_vartype)
+
+    def get_pii_info(self, feature_index):
+        # The PII scan may cover fewer columns than the profile (e.g. in streaming mode)
+        piis = self.pii_data['piis']
+        if feature_index >= len(piis):
+            return None, None
+        return piis[feature_index]['is_pii'], piis[feature_index]['most_likely_pii_type']
+
     def get_count(self, feat_physical_name):
         return int(self.data[feat_physical_name].count())
 
@@ -152,7 +218,9 @@ class DataUnivariate(DataDriver):
 
     def get_vartype_formatted(self, feat_physical_name):
         vartype = self.get_variable_type(feat_physical_name)
+        return self.label_vartype(feat_physical_name, vartype)
 
+    def label_vartype(self, feat_physical_name, vartype):
         # Denote label and index, if applicable
         if self.id_column is not None and feat_physical_name == self.id_column:
             vartype += " (ID)"
@@ -334,15 +402,8 @@ class DataUnivariate(DataDriver):
         return self.load_data()
 
     def load_frequency_json(self):
-        frequency_json = self.load_json(paths.FREQUENCY_SUFFIX)
-
-        # If the file doesn't exist, generate it
-        if frequency_json is None:
-            self.generate_frequencies_json()
-            frequency_json = self.load_json(paths.FREQUENCY_SUFFIX)
-
-        # Return the JSON
-        return frequency_json
+        # Load the JSON for this exact file, code and parameters, generating it once if needed
+        return self.load_or_generate_artifact(paths.FREQUENCY_SUFFIX, self.generate_frequencies_json)
 
     @staticmethod
     def nest(d: dict) -> dict:
@@ -375,6 +436,6 @@ class DataUnivariate(DataDriver):
       frequency_nested_dict = DataUnivariate.df_to_nested_dict(d)
       frequency_json = jsonpickle.encode(frequency_nested_dict)
       # Save the serialized JSON to a file
-      self.save_json(json_to_write=frequency_json, suffix=paths.FREQUENCY_SUFFIX)
+      self.save_artifact(json_to_write=frequency_json, kind=paths.FREQUENCY_SUFFIX)
         # d.to_pickle("./frequency.pkl")
         # self.save_csv(d, paths.FREQUENCY_CSV_SUFFIX)
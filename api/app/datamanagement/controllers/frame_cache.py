@@ -0,0 +1,83 @@
+import os
+import threading
+from collections import OrderedDict
+
+from datamanagement.configuration.variables import FRAME_CACHE_MAX_BYTES
+
+
+class FrameCache(object):
+    """
+    Process-wide LRU cache of loaded DataFrames, keyed by
+    (filepath, mtime, size, load options) so a changed file is never served.
+    Callers get a shallow copy: adding or dropping columns on it leaves the
+    cached frame untouched, while the column buffers themselves are shared.
+    """
+
+    def __init__(self, max_bytes=FRAME_CACHE_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self.current_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._frames = OrderedDict()
+        self._lock = threading.RLock()
+
+    @staticmethod
+    def make_key(filepath, options):
+        stat = os.stat(filepath)
+        return (os.path.abspath(str(filepath)), stat.st_mtime_ns, stat.st_size, options)
+
+    def get_or_load(self, filepath, options, loader):
+        """Return the frame for (filepath, options), calling loader() on a miss"""
+        try:
+            key = self.make_key(filepath, options)
+        except OSError:
+            # Let the loader raise the usual error for a missing file
+            return loader()
+
+        with self._lock:
+            if key in self._frames:
+                self._frames.move_to_end(key)
+                self.hits += 1
+                return self._frames[key][0].copy(deep=False)
+            self.misses += 1
+
+        frame = loader()
+        if frame is not None:
+            self.put(key, frame)
+            return frame.copy(deep=False)
+        return frame
+
+    def put(self, key, frame):
+        nbytes = int(frame.memory_usage(index=True, deep=True).sum())
+        if nbytes > self.max_bytes:
+            return
+
+        with self._lock:
+            if key in self._frames:
+                self.current_bytes -= self._frames.pop(key)[1]
+            self._frames[key] = (frame, nbytes)
+            self.current_bytes += nbytes
+
+            # Evict the least recently used frames until we are back under budget
+            while self.current_bytes > self.max_bytes:
+                _, (_, evicted_bytes) = self._frames.popitem(last=False)
+                self.current_bytes -= evicted_bytes
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._frames.clear()
+            self.current_bytes = 0
+
+    def stats(self):
+        with self._lock:
+            return {'entries': len(self._frames),
+                    'bytes': self.current_bytes,
+                    'max_bytes': self.max_bytes,
+                    'hits': self.hits,
+                    'misses': self.misses,
+                    'evictions': self.evictions}
+
+
+frame_cache = FrameCache()
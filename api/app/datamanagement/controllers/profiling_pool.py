@@ -0,0 +1,97 @@
+import os
+import sys
+import atexit
+import logging
+import tempfile
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+from datamanagement.controllers.accumulators import ColumnAccumulator
+
+# pyarrow is optional: without it each column is pickled to its worker instead
+try:
+    import pyarrow as pa
+except ImportError:
+    pa = None
+
+_executors = {}
+_executors_lock = threading.Lock()
+
+
+def get_executor(workers, initializer=None):
+    """
+    Process pools are created once per size (and initializer) and reused
+    across requests. The initializer runs once in each worker process; before
+    Python 3.7 it cannot be passed, so tasks relying on it must call it too.
+    """
+    key = (workers, initializer)
+    with _executors_lock:
+        if key not in _executors:
+            if initializer is not None and sys.version_info >= (3, 7):
+                _executors[key] = ProcessPoolExecutor(max_workers=workers, initializer=initializer)
+            else:
+                _executors[key] = ProcessPoolExecutor(max_workers=workers)
+        return _executors[key]
+
+
+@atexit.register
+def shutdown_executors():
+    with _executors_lock:
+        for executor in _executors.values():
+            executor.shutdown(wait=False)
+        _executors.clear()
+
+
+def write_shared_table(data):
+    """
+    Write the frame once as an Arrow IPC file (in /dev/shm when available) so
+    workers can memory-map the column buffers instead of unpickling them.
+    Returns the file path, or None if the frame cannot be converted.
+    """
+    if pa is None:
+        return None
+
+    shm_dir = '/dev/shm' if os.path.isdir('/dev/shm') else None
+    fd, path = tempfile.mkstemp(suffix='.arrow', dir=shm_dir)
+    os.close(fd)
+    try:
+        table = pa.Table.from_pandas(data, preserve_index=False)
+        with pa.OSFile(path, 'wb') as sink:
+            with pa.ipc.new_file(sink, table.schema) as writer:
+                writer.write_table(table)
+    except (pa.ArrowException, ValueError, TypeError, OSError) as err:
+        logging.info("Falling back to pickled columns for parallel profiling: %s", err)
+        os.remove(path)
+        return None
+    return path
+
+
+def profile_shared_column(task):
+    path, column_index, feat_physical_name = task
+    with pa.memory_map(path, 'r') as source:
+        column = pa.ipc.open_file(source).read_all().column(column_index).to_pandas()
+    return ColumnAccumulator(feat_physical_name, max_tracked_values=None).update(column)
+
+
+def profile_pickled_column(task):
+    feat_physical_name, column = task
+    return ColumnAccumulator(feat_physical_name, max_tracked_values=None).update(column)
+
+
+def profile_columns(data, workers):
+    """Fan the columns of data out to a process pool, returning accumulators in column order"""
+    executor = get_executor(workers)
+    chunksize = max(1, len(data.columns) // (workers * 4))
+
+    path = write_shared_table(data)
+    try:
+        if path is not None:
+            tasks = [(path, column_index, feat_physical_name)
+                     for column_index, feat_physical_name in enumerate(data.columns.values)]
+            return list(executor.map(profile_shared_column, tasks, chunksize=chunksize))
+
+        tasks = [(feat_physical_name, data[feat_physical_name]) for feat_physical_name in data.columns.values]
+        return list(executor.map(profile_pickled_column, tasks, chunksize=chunksize))
+    finally:
+        if path is not None:
+            os.remove(path)
@@ -7,7 +7,6 @@ from collections import defaultdict
 from flask import (render_template, request,
                     jsonify, Blueprint, flash)
 
-from datamanagement.controllers.data_driver import DataDriver
 from datamanagement.controllers.data_summary import DataSummary
 from datamanagement.controllers.data_univariate import DataUnivariate
 # from datamanagement.controllers.data_bivariate import DataBivariate
@@ -21,7 +20,7 @@ from datamanagement.pii.utils import check_pii
 from datamanagement.main.utils import getuploadeddataset, selecteddataset
 from datamanagement.main.routes import getmenu
 
-from datamanagement.configuration.paths import EXAMPLES_FOLDER, UPLOAD_FOLDER
+from datamanagement.configuration.paths import EXAMPLES_FOLDER, UPLOAD_FOLDER, PII_JSON_SUFFIX
 from datamanagement.controllers.utils import (write_bussiness_terms,
                                                add_to_match_col, get_features,
                                                get_summary, get_errors)
@@ -130,13 +129,11 @@ def business_to_physical(selected_dataset, uploaded_dataset):
 
     folder = UPLOAD_FOLDER if selected_dataset[-1] else EXAMPLES_FOLDER
 
-    pii_file_path = Path(folder) / Path(selected_dataset[1]) / "pii_json.json"
+    pii_file_path = Path(folder) / Path(selected_dataset[1]) / PII_JSON_SUFFIX
 
-    if not Path.exists(pii_file_path):
-        driver = DataDriver(selected_dataset)
-        driver.load_data()
-        data = driver.data
-        pii_data = check_pii(selected_dataset[0], data, uploaded_dataset[-1])
+    # check_pii regenerates the file only if the dataset file changed since it was written,
+    # keying on its hash and reading it only for a new scan
+    pii_data = check_pii(selected_dataset[0], None, uploaded_dataset[-1])
     # breakpoint()
     with open(pii_file_path) as fin:
         pairs = json.load(fin)
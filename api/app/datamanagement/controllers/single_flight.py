@@ -0,0 +1,51 @@
+import os
+import threading
+from concurrent.futures import Future
+
+from datamanagement.configuration import paths
+from datamanagement.controllers.artifact_store import file_lock, hash_content
+
+
+class SingleFlight(object):
+    """
+    Run at most one generation per name at a time. Threads of this process
+    asking for a name already in flight wait on the same future; other
+    processes wait on the per-name file lock. The generator should check
+    again whether its result exists, since a waiter from another process
+    only gets the lock after the owner finished.
+    """
+
+    def __init__(self, lock_folder):
+        self.lock_folder = lock_folder
+        self._futures = {}
+        self._lock = threading.Lock()
+
+    def get_lock_path(self, name):
+        return os.path.join(self.lock_folder, hash_content(name) + '.lock')
+
+    def run(self, name, generate):
+        with self._lock:
+            future = self._futures.get(name)
+            is_owner = future is None
+            if is_owner:
+                future = Future()
+                self._futures[name] = future
+
+        if not is_owner:
+            return future.result()
+
+        try:
+            with file_lock(self.get_lock_path(name)):
+                result = generate()
+        except BaseException as err:
+            future.set_exception(err)
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            with self._lock:
+                del self._futures[name]
+
+
+single_flight = SingleFlight(os.path.join(paths.ARTIFACT_STORE_FOLDER, 'locks'))
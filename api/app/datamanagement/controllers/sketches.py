@@ -0,0 +1,236 @@
+import math
+import base64
+import random
+
+import numpy as np
+import pandas as pd
+
+from datamanagement.configuration.variables import (KLL_SKETCH_K, HLL_PRECISION, HEAVY_HITTERS_CAPACITY,
+                                                    PII_NER_SAMPLE_ROWS)
+
+
+class KllSketch(object):
+    """KLL quantile sketch over floats.
+
+    Level h holds items of weight 2**h. A level that outgrows its capacity is
+    sorted and every other item (from a random offset) is promoted to the next
+    level, so the sketch stays O(k log(n / k)) however many values it has seen.
+    The offsets come from a private generator, seeded by seed when given.
+    """
+
+    def __init__(self, k=KLL_SKETCH_K, seed=None):
+        self.k = k
+        self.count = 0
+        self.levels = [np.empty(0)]
+        self._random = random.Random(seed)
+
+    def update(self, values):
+        values = np.asarray(values, dtype='float64')
+        if len(values) == 0:
+            return self
+        self.levels[0] = np.concatenate([self.levels[0], values])
+        self.count += len(values)
+        self._compress()
+        return self
+
+    def merge(self, other):
+        self.k = max(self.k, other.k)
+        while len(self.levels) < len(other.levels):
+            self.levels.append(np.empty(0))
+        for level, items in enumerate(other.levels):
+            self.levels[level] = np.concatenate([self.levels[level], items])
+        self.count += other.count
+        self._compress()
+        return self
+
+    def _capacity(self, level):
+        depth = len(self.levels) - 1 - level
+        return max(2, int(math.ceil(self.k * (2.0 / 3.0) ** depth)))
+
+    def _compress(self):
+        level = 0
+        while level < len(self.levels):
+            if len(self.levels[level]) > self._capacity(level):
+                if level + 1 == len(self.levels):
+                    self.levels.append(np.empty(0))
+
+                items = np.sort(self.levels[level])
+                # An odd item out stays behind so that no weight is lost
+                if len(items) % 2:
+                    self.levels[level], items = items[-1:], items[:-1]
+                else:
+                    self.levels[level] = np.empty(0)
+
+                promoted = items[self._random.getrandbits(1)::2]
+                self.levels[level + 1] = np.concatenate([self.levels[level + 1], promoted])
+            level += 1
+
+    def _weighted_items(self):
+        items = np.concatenate(self.levels)
+        weights = np.concatenate([np.full(len(level_items), 2 ** level, dtype='int64')
+                                  for level, level_items in enumerate(self.levels)])
+        order = np.argsort(items, kind='mergesort')
+        return items[order], weights[order]
+
+    def get_quantile(self, q):
+        if self.count == 0:
+            return None
+        items, weights = self._weighted_items()
+        cumulative = weights.cumsum()
+        position = cumulative.searchsorted(q * cumulative[-1], side='left')
+        return float(items[min(position, len(items) - 1)])
+
+    def get_rank(self, value, inclusive=True):
+        """Estimated fraction of values <= value (< value when not inclusive)"""
+        if self.count == 0:
+            return None
+        items, weights = self._weighted_items()
+        side = 'right' if inclusive else 'left'
+        return float(weights[:items.searchsorted(value, side=side)].sum()) / weights.sum()
+
+    def to_state(self):
+        return {'k': self.k, 'count': self.count, 'levels': [items.tolist() for items in self.levels]}
+
+    @classmethod
+    def from_state(cls, state):
+        sketch = cls(state['k'])
+        sketch.count = state['count']
+        sketch.levels = [np.asarray(items, dtype='float64') for items in state['levels']]
+        return sketch
+
+
+class HyperLogLog(object):
+    """HyperLogLog distinct count over 64-bit pandas value hashes."""
+
+    def __init__(self, precision=HLL_PRECISION):
+        self.precision = precision
+        self.registers = np.zeros(1 << precision, dtype='uint8')
+
+    def update(self, values):
+        if len(values) == 0:
+            return self
+        hashes = pd.util.hash_pandas_object(pd.Series(values), index=False).values
+        register_index = (hashes >> np.uint64(64 - self.precision)).astype('intp')
+        remainder = hashes << np.uint64(self.precision)
+        rank = np.minimum(_leading_zeros(remainder) + 1, 64 - self.precision + 1)
+        np.maximum.at(self.registers, register_index, rank.astype('uint8'))
+        return self
+
+    def merge(self, other):
+        if other.precision != self.precision:
+            raise ValueError("Cannot merge HyperLogLog sketches of different precision")
+        self.registers = np.maximum(self.registers, other.registers)
+        return self
+
+    def estimate(self):
+        m = float(len(self.registers))
+        alpha = 0.7213 / (1 + 1.079 / m)
+        raw = alpha * m * m / np.sum(2.0 ** -self.registers.astype('float64'))
+
+        # Linear counting is more accurate while many registers are still empty
+        empty_registers = int((self.registers == 0).sum())
+        if raw <= 2.5 * m and empty_registers:
+            return int(round(m * math.log(m / empty_registers)))
+        return int(round(raw))
+
+    def to_state(self):
+        return {'precision': self.precision,
+                'registers': base64.b64encode(self.registers.tobytes()).decode('ascii')}
+
+    @classmethod
+    def from_state(cls, state):
+        sketch = cls(state['precision'])
+        sketch.registers = np.frombuffer(base64.b64decode(state['registers']), dtype='uint8').copy()
+        return sketch
+
+
+def _leading_zeros(words):
+    # Split into 32-bit halves so the float64 log2 below is exact
+    high = (words >> np.uint64(32)).astype('float64')
+    low = (words & np.uint64(0xFFFFFFFF)).astype('float64')
+    with np.errstate(divide='ignore'):
+        high_bits = np.floor(np.log2(high))
+        low_bits = np.floor(np.log2(low))
+    zeros = np.where(high > 0, 31 - high_bits, np.where(low > 0, 63 - low_bits, 64))
+    return zeros.astype('int64')
+
+
+class SpaceSaving(object):
+    """Mergeable Space-Saving summary of the most common values.
+
+    Counts are upper bounds; errors holds how much each count may be over.
+    A value missing from a full summary may still have occurred up to its
+    smallest count, which is what a merge charges it.
+    """
+
+    def __init__(self, capacity=HEAVY_HITTERS_CAPACITY):
+        self.capacity = capacity
+        self.counts = pd.Series(dtype='int64')
+        self.errors = pd.Series(dtype='int64')
+
+    def update(self, value_counts):
+        """Fold in the exact value counts of one chunk"""
+        chunk = SpaceSaving(self.capacity)
+        chunk.counts = value_counts.sort_values(ascending=False, kind='mergesort').iloc[:self.capacity].astype('int64')
+        chunk.errors = pd.Series(0, index=chunk.counts.index, dtype='int64')
+        return self.merge(chunk)
+
+    def merge(self, other):
+        self_floor, other_floor = self._floor(), other._floor()
+        values = self.counts.index.append(other.counts.index).unique()
+
+        counts = (self.counts.reindex(values, fill_value=self_floor)
+                  + other.counts.reindex(values, fill_value=other_floor))
+        errors = (self.errors.reindex(values, fill_value=self_floor)
+                  + other.errors.reindex(values, fill_value=other_floor))
+
+        self.counts = counts.sort_values(ascending=False, kind='mergesort').iloc[:self.capacity].astype('int64')
+        self.errors = errors[self.counts.index].astype('int64')
+        return self
+
+    def _floor(self):
+        if len(self.counts) < self.capacity:
+            return 0
+        return int(self.counts.min())
+
+    def to_state(self):
+        return {'capacity': self.capacity,
+                'values': self.counts.index.tolist(),
+                'counts': self.counts.tolist(),
+                'errors': self.errors.tolist()}
+
+    @classmethod
+    def from_state(cls, state):
+        sketch = cls(state['capacity'])
+        sketch.counts = pd.Series(state['counts'], index=state['values'], dtype='int64')
+        sketch.errors = pd.Series(state['errors'], index=state['values'], dtype='int64')
+        return sketch
+
+
+class ReservoirSample(object):
+    """Uniform random sample of at most size values of a stream (algorithm R).
+
+    The n-th value seen replaces a random slot with probability size / n, so
+    every value seen so far is in the sample with the same probability.
+    """
+
+    def __init__(self, size=PII_NER_SAMPLE_ROWS, seed=None):
+        self.size = size
+        self.count = 0
+        self.values = []
+        self._random = np.random.RandomState(seed)
+
+    def update(self, values):
+        values = np.asarray(values, dtype=object)
+        fill = min(len(values), self.size - len(self.values))
+        self.values.extend(values[:fill].tolist())
+
+        rest = values[fill:]
+        if len(rest):
+            seen = self.count + fill + np.arange(1, len(rest) + 1)
+            slots = (self._random.random_sample(len(rest)) * seen).astype('int64')
+            for position in np.flatnonzero(slots < self.size):
+                self.values[slots[position]] = rest[position]
+
+        self.count += len(values)
+        return self
@@ -0,0 +1,65 @@
+import os
+import hashlib
+
+from datamanagement.configuration.variables import PREFIX_HASH_BLOCK_BYTES
+
+# Only delimited text can be extended by appending bytes
+APPENDABLE_EXTENSIONS = ("csv", "tsv")
+
+
+def iter_block_hashes(source, start, end, block_bytes):
+    """Hash of each block_bytes block of the open file from start (a block boundary) to end"""
+    source.seek(start)
+    while start < end:
+        block = source.read(min(block_bytes, end - start))
+        if not block:
+            return
+        start += len(block)
+        yield hashlib.sha1(block).hexdigest()
+
+
+def get_prefix_stamp(filepath, previous=None, block_bytes=PREFIX_HASH_BLOCK_BYTES):
+    """
+    Byte offset and per-block hashes of the file as it is now, stored with the
+    profile state. previous is a stamp find_appended_offset accepted for this
+    file: its whole blocks are reused, so only the appended bytes are hashed.
+    """
+    offset = os.path.getsize(filepath)
+    block_hashes = []
+    if previous is not None and previous.get('block_bytes') == block_bytes:
+        whole_blocks = previous['offset'] // block_bytes
+        block_hashes = previous['block_hashes'][:whole_blocks]
+
+    with open(filepath, 'rb') as source:
+        block_hashes.extend(iter_block_hashes(source, len(block_hashes) * block_bytes, offset, block_bytes))
+    return {'offset': offset, 'block_bytes': block_bytes, 'block_hashes': block_hashes}
+
+
+def find_appended_offset(filepath, stamp):
+    """
+    Return the offset where new rows start if the file only grew since stamp
+    was taken (equal to the file size when nothing was appended), or None if
+    the file has to be profiled again from the start.
+    """
+    if stamp is None or not str(filepath).endswith(APPENDABLE_EXTENSIONS) or not os.path.isfile(filepath):
+        return None
+
+    offset = stamp['offset']
+    # Stamps without block hashes were taken by an older version
+    if offset <= 0 or 'block_hashes' not in stamp or os.path.getsize(filepath) < offset:
+        return None
+    if len(stamp['block_hashes']) != -(-offset // stamp['block_bytes']):
+        return None
+
+    with open(filepath, 'rb') as source:
+        # The profiled prefix has to end on a row boundary for the tail to parse on its own
+        source.seek(offset - 1)
+        if source.read(1) != b'\n':
+            return None
+
+        # Compare block by block, so an edit anywhere in the prefix is caught as early as possible
+        block_hashes = iter_block_hashes(source, 0, offset, stamp['block_bytes'])
+        if any(block_hash != expected for block_hash, expected in zip(block_hashes, stamp['block_hashes'])):
+            return None
+
+    return offset
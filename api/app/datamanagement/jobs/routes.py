@@ -0,0 +1,21 @@
+from flask import Blueprint, jsonify
+
+from datamanagement.jobs.runner import job_runner
+
+jobs = Blueprint('jobs', __name__)
+
+
+@jobs.route('/jobs/<job_id>')
+def job_status(job_id):
+    job = job_runner.get(job_id)
+    if job is None:
+        return jsonify({'error': f'Unknown job {job_id}'}), 404
+    return jsonify(job)
+
+
+@jobs.route('/jobs/<job_id>/cancel', methods=['POST'])
+def job_cancel(job_id):
+    job = job_runner.cancel(job_id)
+    if job is None:
+        return jsonify({'error': f'Unknown job {job_id}'}), 404
+    return jsonify(job)
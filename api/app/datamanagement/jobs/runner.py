@@ -0,0 +1,279 @@
+import os
+import json
+import time
+import uuid
+import socket
+import atexit
+import logging
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+from datamanagement.configuration import paths
+from datamanagement.configuration.variables import JOB_WORKERS, JOB_POLL_SECONDS
+from datamanagement.controllers.artifact_store import atomic_write, file_lock, hash_content
+
+QUEUED = 'queued'
+RUNNING = 'running'
+SUCCEEDED = 'succeeded'
+FAILED = 'failed'
+CANCELLED = 'cancelled'
+FINISHED_STATUSES = (SUCCEEDED, FAILED, CANCELLED)
+
+
+class JobCancelled(Exception):
+    pass
+
+
+def get_boot_id():
+    # Changes on every reboot, so pids recorded before one are never mistaken for live processes
+    try:
+        with open('/proc/sys/kernel/random/boot_id', 'r') as boot_id_file:
+            return boot_id_file.read().strip()
+    except OSError:
+        return None
+
+
+def get_owner():
+    """Identifies the process whose pool runs the jobs it submits"""
+    return {'host': socket.gethostname(), 'boot_id': get_boot_id(), 'pid': os.getpid()}
+
+
+def is_process_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        # The pid exists but belongs to another user
+        return True
+    return True
+
+
+def is_owner_gone(owner):
+    """
+    Whether the process that submitted a job is known to be gone, taking its
+    queue with it. Owners on another host cannot be checked and count as alive.
+    """
+    if not owner or owner.get('host') != socket.gethostname():
+        return False
+    if owner.get('boot_id') != get_boot_id():
+        return True
+    return not is_process_alive(owner['pid'])
+
+
+class JobStore(object):
+    """
+    Job records kept as one JSON file per job, so that any process (e.g. another
+    web worker answering /jobs/<id>) sees the same status and progress.
+    """
+
+    def __init__(self, folder=paths.JOBS_FOLDER):
+        self.folder = folder
+
+    def get_path(self, job_id, extension='.json'):
+        return os.path.join(self.folder, job_id + extension)
+
+    def get_idempotency_path(self, idempotency_key):
+        return os.path.join(self.folder, 'idempotency', hash_content(idempotency_key) + '.json')
+
+    def get(self, job_id):
+        try:
+            with open(self.get_path(job_id), 'r') as job_file:
+                return json.load(job_file)
+        except (OSError, ValueError):
+            return None
+
+    def create(self, job):
+        atomic_write(self.get_path(job['id']), json.dumps(job))
+
+    def update(self, job_id, **fields):
+        with file_lock(self.get_path(job_id, '.lock')):
+            job = self.get(job_id)
+            if job is None:
+                return None
+            job.update(fields)
+            atomic_write(self.get_path(job_id), json.dumps(job))
+            return job
+
+    def finish(self, job_id, status, **fields):
+        # The first final status wins, e.g. a crash reported after a cancellation is ignored
+        with file_lock(self.get_path(job_id, '.lock')):
+            job = self.get(job_id)
+            if job is None or job['status'] in FINISHED_STATUSES:
+                return job
+            job.update(fields, status=status, finished=time.time())
+            atomic_write(self.get_path(job_id), json.dumps(job))
+            return job
+
+    def request_cancel(self, job_id):
+        atomic_write(self.get_path(job_id, '.cancel'), '')
+
+    def is_cancel_requested(self, job_id):
+        return os.path.isfile(self.get_path(job_id, '.cancel'))
+
+    def fail_if_stale(self, job):
+        """Record as failed an unfinished job whose owner process is gone, and return the job"""
+        if job is None or job['status'] in FINISHED_STATUSES or not is_owner_gone(job.get('owner')):
+            return job
+        return self.finish(job['id'], FAILED, error=f"Owner process {job['owner']['pid']} is gone")
+
+    def find(self, idempotency_key):
+        try:
+            with open(self.get_idempotency_path(idempotency_key), 'r') as index_file:
+                return self.fail_if_stale(self.get(json.load(index_file)['id']))
+        except (OSError, ValueError):
+            return None
+
+    def remember(self, idempotency_key, job_id):
+        atomic_write(self.get_idempotency_path(idempotency_key), json.dumps({'id': job_id}))
+
+
+# Set in a worker process while it runs a job, for report_progress
+_current_job = None
+
+
+def report_progress(progress, message=None):
+    """
+    Record the progress (0 to 1) of the job running in this process, and stop
+    it with JobCancelled if a cancellation was requested. Outside of a job this
+    does nothing, so generators can call it unconditionally.
+    """
+    if _current_job is None:
+        return
+
+    job_store, job_id = _current_job
+    if job_store.is_cancel_requested(job_id):
+        raise JobCancelled(job_id)
+    job_store.update(job_id, progress=round(float(progress), 3), message=message)
+
+
+def run_job(jobs_folder, job_id, func, args, kwargs):
+    """Worker process entry point: run one job and record how it went"""
+    global _current_job
+    job_store = JobStore(jobs_folder)
+
+    if job_store.is_cancel_requested(job_id):
+        job_store.finish(job_id, CANCELLED)
+        return
+
+    job_store.update(job_id, status=RUNNING, started=time.time())
+    _current_job = (job_store, job_id)
+    try:
+        result = func(*args, **kwargs)
+    except JobCancelled:
+        job_store.finish(job_id, CANCELLED)
+    except Exception as err:
+        logging.exception("Job %s failed", job_id)
+        job_store.finish(job_id, FAILED, error=repr(err))
+    else:
+        try:
+            json.dumps(result)
+        except (TypeError, ValueError):
+            result = None
+        job_store.finish(job_id, SUCCEEDED, progress=1.0, result=result)
+    finally:
+        _current_job = None
+
+
+class JobRunner(object):
+    """
+    Queue of jobs run by a process pool. Each job gets an id to poll its status
+    and progress, can be cancelled, and can carry an idempotency key (e.g. the
+    artifact key of a dataset) so submitting the same work again while it is
+    queued or running returns that job, unless the process that submitted it is
+    gone (e.g. a restarted web worker), in which case the job counts as failed
+    and is submitted again. Finished work is not redone anyway:
+    the generators reuse what the artifact store already has.
+    """
+
+    def __init__(self, workers=JOB_WORKERS, folder=paths.JOBS_FOLDER):
+        self.workers = workers
+        self.job_store = JobStore(folder)
+        self._executor = None
+        self._futures = {}
+        self._lock = threading.Lock()
+
+    def get_executor(self):
+        with self._lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(max_workers=self.workers)
+            return self._executor
+
+    def shutdown(self):
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False)
+                self._executor = None
+
+    def submit(self, name, func, *args, idempotency_key=None, **kwargs):
+        """Queue func(*args, **kwargs) in the job pool and return the job id"""
+        with file_lock(os.path.join(self.job_store.folder, 'submit.lock')):
+            if idempotency_key is not None:
+                existing_job = self.job_store.find(idempotency_key)
+                if existing_job is not None and existing_job['status'] not in FINISHED_STATUSES:
+                    return existing_job['id']
+
+            job_id = uuid.uuid4().hex
+            self.job_store.create({'id': job_id,
+                                   'name': name,
+                                   'idempotency_key': idempotency_key,
+                                   'status': QUEUED,
+                                   'progress': 0.0,
+                                   'message': None,
+                                   'error': None,
+                                   'result': None,
+                                   'owner': get_owner(),
+                                   'created': time.time(),
+                                   'started': None,
+                                   'finished': None})
+            if idempotency_key is not None:
+                self.job_store.remember(idempotency_key, job_id)
+
+        future = self.get_executor().submit(run_job, self.job_store.folder, job_id, func, args, kwargs)
+        # Done callbacks run on the executor's thread, or right here when the future is already done,
+        # so _lock guards _futures but is not held while adding one
+        with self._lock:
+            self._futures[job_id] = future
+        future.add_done_callback(lambda done: self._on_done(job_id, done))
+        return job_id
+
+    def _on_done(self, job_id, future):
+        with self._lock:
+            self._futures.pop(job_id, None)
+        if future.cancelled():
+            self.job_store.finish(job_id, CANCELLED)
+        elif future.exception() is not None:
+            # The worker died or the job could not be sent to it
+            self.job_store.finish(job_id, FAILED, error=repr(future.exception()))
+
+    def get(self, job_id):
+        return self.job_store.fail_if_stale(self.job_store.get(job_id))
+
+    def cancel(self, job_id):
+        """Cancel a queued job, or ask a running one to stop at its next progress report"""
+        job = self.get(job_id)
+        if job is None or job['status'] in FINISHED_STATUSES:
+            return job
+
+        self.job_store.request_cancel(job_id)
+        with self._lock:
+            future = self._futures.get(job_id)
+        # Cancelling runs _on_done, which takes _lock, so it is released first
+        if future is not None and future.cancel():
+            self.job_store.finish(job_id, CANCELLED)
+        return self.job_store.get(job_id)
+
+    def wait(self, job_id, timeout=None):
+        """Block until the job finished (or timeout seconds passed) and return its record"""
+        deadline = None if timeout is None else time.time() + timeout
+        job = self.get(job_id)
+        while job is not None and job['status'] not in FINISHED_STATUSES:
+            if deadline is not None and time.time() >= deadline:
+                break
+            time.sleep(JOB_POLL_SECONDS)
+            job = self.get(job_id)
+        return job
+
+
+job_runner = JobRunner()
+atexit.register(job_runner.shutdown)
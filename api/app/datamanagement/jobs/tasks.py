@@ -0,0 +1,66 @@
+import os
+import time
+
+import pandas as pd
+
+from datamanagement.configuration import paths
+from datamanagement.controllers.columnar_cache import is_cache_fresh, write_columnar_cache
+from datamanagement.controllers.data_driver import DataDriver
+from datamanagement.controllers.data_summary import DataSummary
+from datamanagement.controllers.data_pii import DataPii
+from datamanagement.controllers.data_univariate import DataUnivariate
+from datamanagement.jobs.runner import job_runner, report_progress
+from datamanagement.pii.utils import get_pii_json_key, write_pii
+
+# Artifact kind used in the idempotency key of generate_dataset_artifacts
+DATASET_ARTIFACTS_KIND = 'dataset_artifacts'
+
+
+def write_pii_file(keys, filepath, isUploaded):
+    # Read the file in the worker rather than sending its JSON through the pool
+    write_pii(keys, pd.read_csv(filepath).to_json(), isUploaded)
+
+
+def generate_dataset_artifacts(selected_dataset):
+    """
+    Generate the columnar cache and the summary, PII and features JSON of a
+    dataset that are missing, returning seconds per artifact
+    """
+    timings = {}
+
+    # Parse the file once into the columnar cache that DataDriver.read_data reads from
+    report_progress(0, paths.COLUMNAR_CACHE_SUFFIX)
+    started = time.time()
+    filepath = DataDriver(selected_dataset).filepath
+    if os.path.isfile(filepath) and not is_cache_fresh(filepath):
+        write_columnar_cache(filepath)
+    timings[paths.COLUMNAR_CACHE_SUFFIX] = round(time.time() - started, 3)
+
+    report_progress(1 / 4, paths.SUMMARY_SUFFIX)
+    started = time.time()
+    DataSummary(selected_dataset).load_summary_json()
+    timings[paths.SUMMARY_SUFFIX] = round(time.time() - started, 3)
+
+    report_progress(2 / 4, paths.PII_SUFFIX)
+    started = time.time()
+    data_pii = DataPii(selected_dataset)
+    data_pii.load_pii_json()
+    data_pii.load_pii_flare_json()
+    timings[paths.PII_SUFFIX] = round(time.time() - started, 3)
+
+    report_progress(3 / 4, paths.FEATURES_SUFFIX)
+    started = time.time()
+    DataUnivariate(selected_dataset).load_features_json()
+    timings[paths.FEATURES_SUFFIX] = round(time.time() - started, 3)
+
+    return timings
+
+
+def submit_dataset_jobs(selected_dataset, filepath):
+    """Queue the PII scan and profiling of a dataset, returning the job ids by name"""
+    keys, is_uploaded = selected_dataset[0], selected_dataset[4]
+    return {'pii_json': job_runner.submit('pii_json', write_pii_file, keys, filepath, is_uploaded,
+                                          idempotency_key=get_pii_json_key(keys, None, is_uploaded, streaming=False)),
+            'dataset_artifacts': job_runner.submit('dataset_artifacts', generate_dataset_artifacts, selected_dataset,
+                                                   idempotency_key=DataDriver(selected_dataset).get_artifact_key(
+                                                       DATASET_ARTIFACTS_KIND))}
@@ -0,0 +1,81 @@
+import os
+import time
+import logging
+
+import pandas as pd
+
+from datamanagement.configuration import paths
+from datamanagement.configuration.paths import PII_JSON_SUFFIX
+from datamanagement.controllers.data_driver import DataDriver
+from datamanagement.controllers.data_errors import DataErrors, validation_funs
+from datamanagement.jobs.runner import job_runner, report_progress, SUCCEEDED
+from datamanagement.jobs.tasks import generate_dataset_artifacts, write_pii_file
+
+# Artifact kind used in the idempotency key of warm_up_dataset
+WARM_UP_KIND = 'warm_up'
+
+
+def list_example_datasets():
+    """The example datasets of datasets.csv, as selected_dataset lists"""
+    datasets = pd.read_csv(paths.DATASETS)
+    return [[row["FileName"], row["Title"], row["ID"], row["Label"], False] for i, row in datasets.iterrows()]
+
+
+def warm_up_dataset(selected_dataset):
+    """Generate every missing artifact of an example dataset, returning seconds per artifact"""
+    timings = generate_dataset_artifacts(selected_dataset)
+
+    report_progress(0.8, paths.ERRORS_SUFFIX)
+    started = time.time()
+    data_errors = DataErrors(selected_dataset)
+    if data_errors.load_json(paths.ERRORS_SUFFIX) is None:
+        data_errors.save_errors(validation_funs)
+    timings[paths.ERRORS_SUFFIX] = round(time.time() - started, 3)
+
+    report_progress(0.9, PII_JSON_SUFFIX)
+    started = time.time()
+    write_pii_file(selected_dataset[0], data_errors.filepath, False)
+    timings[PII_JSON_SUFFIX] = round(time.time() - started, 3)
+
+    return timings
+
+
+def submit_warm_up(datasets=None):
+    """
+    Queue the generation of the missing artifacts of the example datasets (all
+    of datasets.csv by default) in the job pool, so their first visitors find
+    them ready. Returns the job id of each dataset by title. Several app
+    processes warming up at once share the same jobs.
+    """
+    if datasets is None:
+        datasets = list_example_datasets()
+
+    job_ids = {}
+    for selected_dataset in datasets:
+        driver = DataDriver(selected_dataset)
+        if not os.path.isfile(driver.filepath):
+            logging.info("Warm-up skips %s: %s not found", driver.title, driver.filepath)
+            continue
+        job_ids[driver.title] = job_runner.submit(WARM_UP_KIND, warm_up_dataset, selected_dataset,
+                                                  idempotency_key=driver.get_artifact_key(WARM_UP_KIND))
+    return job_ids
+
+
+def warm_up(datasets=None, timeout=None):
+    """Queue the warm-up jobs, then block until done and return the finished job of each dataset by title"""
+    return {title: job_runner.wait(job_id, timeout=timeout) for title, job_id in submit_warm_up(datasets).items()}
+
+
+def format_warm_up_report(jobs):
+    lines = []
+    for title, job in jobs.items():
+        if job is None:
+            # wait() finds no record when the jobs folder was cleaned meanwhile
+            lines.append(f"{title}: missing")
+        elif job['status'] == SUCCEEDED:
+            took = round(job['finished'] - job['started'], 1)
+            steps = ', '.join(f'{kind} {seconds}s' for kind, seconds in (job['result'] or {}).items())
+            lines.append(f"{title}: {took}s ({steps})")
+        else:
+            lines.append(f"{title}: {job['status']} {job['error'] or ''}".rstrip())
+    return '\n'.join(lines)
@@ -24,7 +24,7 @@ from datamanagement.configuration import paths
 
 from datamanagement.main.utils import datasetuploaded, datatableuploaded #, puttables
 
-from datamanagement.pii.utils import write_pii
+from datamanagement.jobs.tasks import submit_dataset_jobs
 
 from datamanagement.main.firebase import get_files
 
@@ -211,9 +211,10 @@ def upload_file():
             filename = secure_filename(file.filename)
             # breakpoint()
             filepath = Path(paths.UPLOAD_FOLDER) / Path(filename).stem / filename
-            if not filepath.exists():
-              filepath.parent.mkdir(parents=True, exist_ok=True)
-              file.save(filepath)
+            # Always keep the latest upload: artifacts are keyed by content, so an
+            # identical file reuses them and a changed one is profiled again
+            filepath.parent.mkdir(parents=True, exist_ok=True)
+            file.save(filepath)
 
             glossary_filepath = Path(paths.UPLOAD_FOLDER) / Path(filename).stem / 'business_glossary.json'
             if glossary and not glossary_filepath.is_file():
@@ -236,15 +237,17 @@ def upload_file():
 
             # breakpoint()
 
-            # write_pii.delay(filename, pd.read_csv(filepath).to_json(), True)
-            write_pii(filename, pd.read_csv(filepath).to_json(), True)
-
             # Move the file and set metadata
             datasetuploaded(uploaded_file_path=str(filepath),
                             data_title=data_title,
                             data_id=data_id,
                             data_label=data_label)
 
+            # Scan and profile off the request thread; the pages that need the results
+            # wait on these jobs through their idempotency keys
+            submit_dataset_jobs([filename, data_title, data_id, data_label, True],
+                                str(filepath))
+
             # Return to the summary page and show the new data set info
             return redirect(url_for('controller.index'))
     else:
@@ -16,11 +16,12 @@ class Flare():
     self.children = [children] if not isinstance(children, List) else children
 
 class FeaturePii(object):
-  def __init__(self, feat_name, is_pii, most_likely_pii_type, pii_types_and_scores):
+  def __init__(self, feat_name, is_pii, most_likely_pii_type, pii_types_and_scores, rows_examined=None):
     self.feat_name: str = feat_name
     self.is_pii: bool = is_pii
     self.most_likely_pii_type: Dict[str, float] = most_likely_pii_type
     self.pii_types_and_scores: Dict[str, float] = pii_types_and_scores
+    self.rows_examined: int = rows_examined
 
   def to_flare(self ):
     d = Flare(self.feat_name, [])
@@ -36,7 +37,7 @@ class FeaturePii(object):
 
     for attr, value in self.__dict__.items():
       print(attr)
-      if attr != 'feat_name':
+      if attr not in ('feat_name', 'rows_examined'):
         append_children(attr, value, d.children)
 
     return d
@@ -12,6 +12,7 @@ from datamanagement.pii.analyzer.entity_recognizer import EntityRecognizer  # no
 from datamanagement.pii.analyzer.local_recognizer import LocalRecognizer  # noqa: F401
 from datamanagement.pii.analyzer.recognizer_result import RecognizerResult  # noqa: F401
 from datamanagement.pii.analyzer.pattern_recognizer import PatternRecognizer  # noqa: F401
+from datamanagement.pii.analyzer.combined_pattern_matcher import CombinedPatternMatcher  # noqa: F401
 from datamanagement.pii.analyzer.remote_recognizer import RemoteRecognizer  # noqa: F401
 from datamanagement.pii.analyzer.recognizer_registry.recognizer_registry import (  # noqa: F401
     RecognizerRegistry
@@ -1,5 +1,7 @@
 import json
 import uuid
+from bisect import bisect_left, bisect_right
+from collections import defaultdict
 
 import analyze_pb2
 import analyze_pb2_grpc
@@ -7,16 +9,50 @@ import common_pb2
 
 from datamanagement.pii.analyzer.logger import Logger
 from datamanagement.pii.analyzer.app_tracer import AppTracer
+from datamanagement.pii.analyzer.combined_pattern_matcher import \
+    CombinedPatternMatcher
+from datamanagement.pii.analyzer.pattern_recognizer import PatternRecognizer
 
 DEFAULT_LANGUAGE = "en"
 logger = Logger()
 
 
+class KeptSpans:
+
+    def __init__(self, starts):
+        """
+        Spans of the results kept so far for one entity type: a Fenwick
+        tree over the sorted candidate starts, holding the largest end of
+        the kept spans starting at or before each of them
+        :param starts: the starts of all the spans that may be added
+        """
+        self.starts = sorted(set(starts))
+        self.tree = [None] * (len(self.starts) + 1)
+
+    def add(self, start, end):
+        i = bisect_left(self.starts, start) + 1
+        while i < len(self.tree):
+            if self.tree[i] is None or self.tree[i] < end:
+                self.tree[i] = end
+            i += i & -i
+
+    def contains(self, start, end):
+        """
+        :return: whether a kept span contains the span [start, end)
+        """
+        i = bisect_right(self.starts, start)
+        while i > 0:
+            if self.tree[i] is not None and self.tree[i] >= end:
+                return True
+            i -= i & -i
+        return False
+
+
 class AnalyzerEngine(analyze_pb2_grpc.AnalyzeServiceServicer):
 
     def __init__(self, registry=None, nlp_engine=None,
                  app_tracer=None, enable_trace_pii=False,
-                 default_score_threshold=None):
+                 default_score_threshold=None, combine_patterns=False):
         """
         AnalyzerEngine class: Orchestrating the detection of PII entities
         and all related logic
@@ -29,6 +65,8 @@ class AnalyzerEngine(analyze_pb2_grpc.AnalyzeServiceServicer):
         defines whether PII values should be traced or not.
         :param default_score_threshold: Minimum confidence value
         for detected entities to be returned
+        :param combine_patterns: bool, whether the pattern recognizers
+        of the registry are gated by a single CombinedPatternMatcher scan
         """
         if not nlp_engine:
             from datamanagement.pii.analyzer.nlp_engine import SpacyNlpEngine
@@ -55,6 +93,9 @@ class AnalyzerEngine(analyze_pb2_grpc.AnalyzeServiceServicer):
         else:
             self.default_score_threshold = default_score_threshold
 
+        self.combine_patterns = combine_patterns
+        self.pattern_matcher = None
+
     # pylint: disable=unused-argument
     def Apply(self, request, context):
         """
@@ -106,25 +147,32 @@ class AnalyzerEngine(analyze_pb2_grpc.AnalyzeServiceServicer):
         # result as a substring of the other
         results = sorted(results,
                          key=lambda x: (-x.score, x.start, x.end - x.start))
-        filtered_results = []
 
+        # The kept spans of each entity type are indexed by start, so each
+        # result is checked in O(log n) instead of against every kept result
+        starts = defaultdict(list)
+        for result in results:
+            starts[result.entity_type].append(result.start)
+        kept_spans = {entity_type: KeptSpans(entity_starts)
+                      for entity_type, entity_starts in starts.items()}
+
+        filtered_results = []
+        filtered_ids = set()
         for result in results:
             if result.score == 0:
                 continue
 
-            valid_result = True
-            if result not in filtered_results:
-                for filtered in filtered_results:
-                    # If result is equal to or substring of
-                    # one of the other results
-                    if result.start >= filtered.start \
-                            and result.end <= filtered.end \
-                            and result.entity_type == filtered.entity_type:
-                        valid_result = False
-                        break
+            # A result listed twice is kept again once kept
+            if id(result) not in filtered_ids:
+                spans = kept_spans[result.entity_type]
+                # If result is equal to or substring of
+                # one of the other results
+                if spans.contains(result.start, result.end):
+                    continue
+                spans.add(result.start, result.end)
+                filtered_ids.add(id(result))
 
-            if valid_result:
-                filtered_results.append(result)
+            filtered_results.append(result)
 
         return filtered_results
 
@@ -169,6 +217,80 @@ class AnalyzerEngine(analyze_pb2_grpc.AnalyzeServiceServicer):
         :return: an array of the found entities in the text
         """
 
+        recognizers, entities = self.__get_recognizers(entities, language,
+                                                       all_fields)
+
+        # run the nlp pipeline over the given text, store the results in
+        # a NlpArtifacts instance
+        nlp_artifacts = self.nlp_engine.process_text(text, language)
+
+        if self.enable_trace_pii and trace:
+            self.app_tracer.trace(correlation_id, "nlp artifacts:"
+                                  + nlp_artifacts.to_json())
+
+        starts = self.__get_pattern_starts([text])
+
+        results = []
+        for recognizer in recognizers:
+            # analyze using the current recognizer and append the results
+            current_results = self.__analyze_with(
+                recognizer, [text], entities, [nlp_artifacts], starts)[0]
+            if current_results:
+                results.extend(current_results)
+
+        return self.__filter_results(correlation_id, results,
+                                     score_threshold, trace)
+
+    def analyze_batch(self, texts, entities, language, all_fields,
+                      score_threshold=None, correlation_id=None, trace=False):
+        """
+        analyzes each of the given texts like analyze, resolving the
+        recognizers once and running the nlp pipeline over the whole batch
+        :param texts: the texts to analyze
+        :param entities: the entities to search
+        :param language: the language of the texts
+        :param all_fields: a Flag to return all fields
+        of the requested language
+        :param score_threshold: A minimum value for which
+        to return an identified entity
+        :param correlation_id: cross call ID for this request
+        :param trace: Should tracing of the response occur or not
+        :return: a list with the array of found entities of each text
+        """
+        texts = list(texts)
+        if correlation_id is None:
+            correlation_id = str(uuid.uuid4())
+
+        recognizers, entities = self.__get_recognizers(entities, language,
+                                                       all_fields)
+
+        nlp_artifacts_list = self.nlp_engine.process_batch(texts, language)
+
+        if self.enable_trace_pii and trace:
+            for nlp_artifacts in nlp_artifacts_list:
+                self.app_tracer.trace(correlation_id, "nlp artifacts:"
+                                      + nlp_artifacts.to_json())
+
+        starts = self.__get_pattern_starts(texts)
+
+        batch_results = [[] for _ in texts]
+        for recognizer in recognizers:
+            for results, current_results in zip(
+                    batch_results,
+                    self.__analyze_with(recognizer, texts, entities,
+                                        nlp_artifacts_list, starts)):
+                if current_results:
+                    results.extend(current_results)
+
+        return [self.__filter_results(correlation_id, results,
+                                      score_threshold, trace)
+                for results in batch_results]
+
+    def __get_recognizers(self, entities, language, all_fields):
+        """
+        Returns the loaded recognizers of the request, and the entities
+        to search (all those of the recognizers if all_fields is set)
+        """
         recognizers = self.registry.get_recognizers(
             language=language,
             entities=entities,
@@ -185,26 +307,60 @@ class AnalyzerEngine(analyze_pb2_grpc.AnalyzeServiceServicer):
             # over all recognizers
             entities = self.__list_entities(recognizers)
 
-        # run the nlp pipeline over the given text, store the results in
-        # a NlpArtifacts instance
-        nlp_artifacts = self.nlp_engine.process_text(text, language)
-
-        if self.enable_trace_pii and trace:
-            self.app_tracer.trace(correlation_id, "nlp artifacts:"
-                                  + nlp_artifacts.to_json())
-
-        results = []
         for recognizer in recognizers:
             # Lazy loading of the relevant recognizers
             if not recognizer.is_loaded:
                 recognizer.load()
                 recognizer.is_loaded = True
 
-            # analyze using the current recognizer and append the results
-            current_results = recognizer.analyze(text, entities, nlp_artifacts)
-            if current_results:
-                results.extend(current_results)
+        return recognizers, entities
 
+    def __get_pattern_starts(self, texts):
+        """
+        Returns the first position of each text at which a pattern of the
+        registry can match (None if none can), or None if patterns
+        are not combined
+        """
+        if not self.combine_patterns:
+            return None
+
+        # Rebuild the matcher whenever the registry recognizers change
+        pattern_recognizers = [
+            recognizer for recognizer in self.registry.recognizers
+            if isinstance(recognizer, PatternRecognizer)]
+        if self.pattern_matcher is None or \
+                self.pattern_matcher.recognizers != pattern_recognizers:
+            self.pattern_matcher = CombinedPatternMatcher.build(
+                pattern_recognizers)
+            if self.pattern_matcher is None:
+                self.combine_patterns = False
+                return None
+
+        return [self.pattern_matcher.first_match_start(text)
+                for text in texts]
+
+    def __analyze_with(self, recognizer, texts, entities,
+                       nlp_artifacts_list, starts):
+        """
+        Returns the results of the recognizer for each text. Recognizers
+        covered by the pattern matcher skip the texts it does not match
+        and scan the others from their first match
+        """
+        if starts is None or not self.pattern_matcher.covers(recognizer):
+            return recognizer.analyze_batch(texts, entities,
+                                            nlp_artifacts_list)
+
+        return [[] if start is None else
+                recognizer.analyze(text, entities, nlp_artifacts, start=start)
+                for text, nlp_artifacts, start in
+                zip(texts, nlp_artifacts_list, starts)]
+
+    def __filter_results(self, correlation_id, results, score_threshold,
+                         trace):
+        """
+        Traces the raw results of a text, then removes duplicates or
+        low score results
+        """
         if trace:
             self.app_tracer.trace(correlation_id, json.dumps(
                 [result.to_json() for result in results]))
@@ -0,0 +1,50 @@
+from datamanagement.pii.analyzer.logger import Logger
+from datamanagement.pii.analyzer.pattern import Pattern, re
+
+logger = Logger()
+
+
+class CombinedPatternMatcher:
+
+    def __init__(self, recognizers):
+        """
+        A single regex alternating the patterns of the given
+        PatternRecognizers, so a text is scanned once to find where any of
+        them can match. No pattern matches before the first match of the
+        alternation, so recognizers are skipped on texts it does not match
+        and otherwise scan them from that position only.
+        :param recognizers: the PatternRecognizers to combine
+        """
+        self.recognizers = list(recognizers)
+        self.__recognizer_ids = {id(recognizer)
+                                 for recognizer in self.recognizers}
+        self.regex = re.compile(
+            '|'.join('(?:{})'.format(pattern.regex)
+                     for recognizer in self.recognizers
+                     for pattern in recognizer.patterns),
+            flags=Pattern.FLAGS)
+
+    @classmethod
+    def build(cls, recognizers):
+        """
+        Returns a matcher for the given recognizers, or None when their
+        patterns cannot be combined into a single regex
+        """
+        try:
+            return cls(recognizers)
+        except re.error as error:
+            logger.warning("Cannot combine the recognizer patterns: %s",
+                           error)
+            return None
+
+    def covers(self, recognizer):
+        return id(recognizer) in self.__recognizer_ids
+
+    def first_match_start(self, text):
+        """
+        :param text: the text to scan
+        :return: the first position at which any pattern matches,
+        or None if none does
+        """
+        match = self.regex.search(text)
+        return None if match is None else match.start()
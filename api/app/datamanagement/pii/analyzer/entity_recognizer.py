@@ -65,6 +65,19 @@ class EntityRecognizer:
 
         return None
 
+    def analyze_batch(self, texts, entities, nlp_artifacts_list):
+        """
+        Analyzes each of the given texts, one at a time unless the
+        recognizer can do better over the whole batch.
+
+        :param texts: The texts to be analyzed
+        :param entities: The list of entities to be detected
+        :param nlp_artifacts_list: The NlpArtifacts of each text
+        :return: a list of RecognizerResult lists, one per text
+        """
+        return [self.analyze(text, entities, nlp_artifacts) or []
+                for text, nlp_artifacts in zip(texts, nlp_artifacts_list)]
+
     def get_supported_entities(self):
         """
         :return: A list of the supported entities by this recognizer
@@ -12,6 +12,12 @@ class NlpEngine(ABC):
         """ Execute the NLP pipeline on the given text and language
         """
 
+    def process_batch(self, texts, language):
+        """ Execute the NLP pipeline on each of the given texts,
+            returning a list of NlpArtifacts in the same order
+        """
+        return [self.process_text(text, language) for text in texts]
+
     @abstractmethod
     def is_stopword(self, word, language):
         """ returns true if the given word is a stop word
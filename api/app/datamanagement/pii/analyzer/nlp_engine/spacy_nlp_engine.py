@@ -1,8 +1,9 @@
-import spacy
 from spacy.cli import download
 
+from datamanagement.configuration.variables import NER_BATCH_SIZE
 from datamanagement.pii.analyzer.logger import Logger
 from datamanagement.pii.analyzer.nlp_engine import NlpArtifacts, NlpEngine
+from datamanagement.pii.spacy_models import get_model
 logger = Logger()
 
 
@@ -18,8 +19,8 @@ class SpacyNlpEngine(NlpEngine):
 
         # Download model lazily if it wasn't previously installed
         download('en_core_web_sm')
-        self.nlp = {"en": spacy.load("en_core_web_sm",
-                                     disable=['parser', 'tagger'])}
+        self.nlp = {"en": get_model("en_core_web_sm",
+                                    disable=['parser', 'tagger'])}
 
     def process_text(self, text, language):
         """ Execute the SpaCy NLP pipeline on the given text
@@ -28,6 +29,13 @@ class SpacyNlpEngine(NlpEngine):
         doc = self.nlp[language](text)
         return self.doc_to_nlp_artifact(doc, language)
 
+    def process_batch(self, texts, language):
+        """ Execute the SpaCy NLP pipeline on the given texts
+            and language, streaming them through nlp.pipe in batches
+        """
+        return [self.doc_to_nlp_artifact(doc, language) for doc in
+                self.nlp[language].pipe(texts, batch_size=NER_BATCH_SIZE)]
+
     def is_stopword(self, word, language):
         """ returns true if the given word is a stop word
             (within the given language)
@@ -1,4 +1,13 @@
+# Import 're2' regex engine if installed, if not- import 'regex'
+try:
+    import re2 as re
+except ImportError:
+    import regex as re
+
+
 class Pattern:
+    # Flags every pattern is matched with
+    FLAGS = re.IGNORECASE | re.DOTALL | re.MULTILINE
 
     def __init__(self, name, regex, score):
         """
@@ -11,6 +20,26 @@ class Pattern:
         self.regex = regex
         self.score = score
 
+    @property
+    def regex(self):
+        return self._regex
+
+    @regex.setter
+    def regex(self, regex):
+        self._regex = regex
+        self._compiled_regex = None
+
+    @property
+    def compiled_regex(self):
+        """
+        The regex compiled with FLAGS on first use, and again only
+        if the regex is replaced
+        :return: a compiled pattern of the regex engine
+        """
+        if self._compiled_regex is None:
+            self._compiled_regex = re.compile(self.regex, flags=self.FLAGS)
+        return self._compiled_regex
+
     def to_dict(self):
         """
         Turns this instance into a dictionary
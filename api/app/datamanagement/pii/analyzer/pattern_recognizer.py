@@ -1,17 +1,9 @@
-import datetime
-
 from datamanagement.pii.analyzer import LocalRecognizer, \
     Pattern, \
     RecognizerResult, \
     EntityRecognizer, \
     AnalysisExplanation
 
-# Import 're2' regex engine if installed, if not- import 'regex'
-try:
-    import re2 as re
-except ImportError:
-    import regex as re
-
 
 class PatternRecognizer(LocalRecognizer):
 
@@ -54,11 +46,15 @@ class PatternRecognizer(LocalRecognizer):
         pass
 
     # pylint: disable=unused-argument
-    def analyze(self, text, entities, nlp_artifacts=None):
+    def analyze(self, text, entities, nlp_artifacts=None, start=0):
+        """
+        :param start: the position to scan text from, when no pattern can
+        match before it (see CombinedPatternMatcher)
+        """
         results = []
 
         if self.patterns:
-            pattern_result = self.__analyze_patterns(text)
+            pattern_result = self.__analyze_patterns(text, start)
 
             if pattern_result and self.context:
                 # try to improve the results score using the surrounding
@@ -110,30 +106,20 @@ class PatternRecognizer(LocalRecognizer):
                                           validation_result=validation_result)
         return explanation
 
-    def __analyze_patterns(self, text):
+    def __analyze_patterns(self, text, start=0):
         """
         Evaluates all patterns in the provided text, including words in
          the provided blacklist
 
         :param text: text to analyze
+        :param start: the position to scan text from
         :return: A list of RecognizerResult
         """
         results = []
         for pattern in self.patterns:
-            match_start_time = datetime.datetime.now()
-            matches = re.finditer(
-                pattern.regex,
-                text,
-                flags=re.IGNORECASE | re.DOTALL | re.MULTILINE)
-            match_time = datetime.datetime.now() - match_start_time
-            self.logger.debug('--- match_time[%s]: %s.%s seconds',
-                              pattern.name,
-                              match_time.seconds,
-                              match_time.microseconds)
-
-            for match in matches:
-                start, end = match.span()
-                current_match = text[start:end]
+            for match in pattern.compiled_regex.finditer(text, start):
+                match_start, match_end = match.span()
+                current_match = text[match_start:match_end]
 
                 # Skip empty results
                 if current_match == '':
@@ -142,28 +128,27 @@ class PatternRecognizer(LocalRecognizer):
                 score = pattern.score
 
                 validation_result = self.validate_result(current_match)
-                description = PatternRecognizer.build_regex_explanation(
-                    self.name,
-                    pattern.name,
-                    pattern.regex,
-                    score,
-                    validation_result
-                )
-                pattern_result = RecognizerResult(
-                    self.supported_entities[0],
-                    start,
-                    end,
-                    score,
-                    description)
-
                 if validation_result is not None:
                     if validation_result:
-                        pattern_result.score = EntityRecognizer.MAX_SCORE
+                        score = EntityRecognizer.MAX_SCORE
                     else:
-                        pattern_result.score = EntityRecognizer.MIN_SCORE
-
-                if pattern_result.score > EntityRecognizer.MIN_SCORE:
-                    results.append(pattern_result)
+                        score = EntityRecognizer.MIN_SCORE
+
+                # Only results that are kept get an explanation
+                if score > EntityRecognizer.MIN_SCORE:
+                    description = PatternRecognizer.build_regex_explanation(
+                        self.name,
+                        pattern.name,
+                        pattern.regex,
+                        pattern.score,
+                        validation_result
+                    )
+                    results.append(RecognizerResult(
+                        self.supported_entities[0],
+                        match_start,
+                        match_end,
+                        score,
+                        description))
 
         return results
 
@@ -1,6 +1,9 @@
 import time
 import logging
+import threading
+from collections import defaultdict
 
+from datamanagement.configuration.variables import RECOGNIZERS_HASH_TTL_SECONDS
 from datamanagement.pii.analyzer.recognizer_registry import RecognizerStoreApi
 from datamanagement.pii.analyzer.predefined_recognizers import CreditCardRecognizer, \
     SpacyRecognizer, CryptoRecognizer, DomainRecognizer, \
@@ -16,7 +19,7 @@ class RecognizerRegistry:
     """
 
     def __init__(self, recognizer_store_api=RecognizerStoreApi(),
-                 recognizers=None):
+                 recognizers=None, hash_ttl=RECOGNIZERS_HASH_TTL_SECONDS):
         """
         :param recognizer_store_api: An instance of a class that has custom
                recognizers management functionallity (insert, update, get,
@@ -25,6 +28,8 @@ class RecognizerRegistry:
         :param recognizers: An optional list of recognizers that will be
                available in addition to the predefined recognizers and the
                custom recognizers
+        :param hash_ttl: seconds during which the custom recognizers are
+               used without asking the store for its latest hash
         """
         if recognizers:
             self.recognizers = recognizers
@@ -41,6 +46,17 @@ class RecognizerRegistry:
         self.loaded_custom_recognizers = []
         self.store_api = recognizer_store_api
 
+        # the store hash is checked again once hash_ttl has passed since
+        # hash_checked_at (a time.monotonic() value)
+        self.hash_ttl = hash_ttl
+        self.hash_checked_at = None
+        self.__lock = threading.Lock()
+
+        # recognizers by language and by (language, entity), along with the
+        # recognizers they were built from
+        self.__index_source = None
+        self.__index = None
+
     def load_predefined_recognizers(self):
         #   TODO: Change the code to dynamic loading -
         # Task #598:  Support loading of the pre-defined recognizers
@@ -75,22 +91,15 @@ class RecognizerRegistry:
         if entities is None and all_fields is False:
             raise ValueError("No entities provided")
 
-        all_possible_recognizers = self.recognizers.copy()
-        custom_recognizers = self.get_custom_recognizers()
-        all_possible_recognizers.extend(custom_recognizers)
-        logging.info("Found %d (total) custom recognizers",
-                     len(custom_recognizers))
+        by_language, by_entity = self.get_index()
 
         # filter out unwanted recognizers
         to_return = []
         if all_fields:
-            to_return = [rec for rec in all_possible_recognizers if
-                         language == rec.supported_language]
+            to_return = list(by_language.get(language, []))
         else:
             for entity in entities:
-                subset = [rec for rec in all_possible_recognizers if
-                          entity in rec.supported_entities
-                          and language == rec.supported_language]
+                subset = by_entity.get((language, entity), [])
 
                 if not subset:
                     logging.warning("Entity %s doesn't have the corresponding"
@@ -110,10 +119,42 @@ class RecognizerRegistry:
 
         return to_return
 
+    def get_index(self):
+        """
+        Returns the recognizers (predefined and custom, in this order) of
+        each language, and of each (language, entity). The index is rebuilt
+        only when the recognizers change.
+        """
+        custom_recognizers = self.get_custom_recognizers()
+        source = [id(rec) for rec in self.recognizers] + \
+            [id(rec) for rec in custom_recognizers]
+
+        with self.__lock:
+            if source != self.__index_source:
+                logging.info("Indexing %d recognizers (%d custom)",
+                             len(source), len(custom_recognizers))
+                by_language = defaultdict(list)
+                by_entity = defaultdict(list)
+                for rec in self.recognizers + list(custom_recognizers):
+                    by_language[rec.supported_language].append(rec)
+                    for entity in dict.fromkeys(rec.supported_entities):
+                        by_entity[(rec.supported_language, entity)].append(
+                            rec)
+                self.__index = (dict(by_language), dict(by_entity))
+                self.__index_source = source
+            return self.__index
+
     def get_custom_recognizers(self):
         """
-        Returns a list of custom recognizers retrieved from the store object
+        Returns a list of custom recognizers retrieved from the store object.
+        The store is asked for its latest hash at most once per hash_ttl.
         """
+        with self.__lock:
+            now = time.monotonic()
+            if self.hash_checked_at is not None and \
+                    now - self.hash_checked_at < self.hash_ttl:
+                return self.loaded_custom_recognizers
+            self.hash_checked_at = now
 
         if self.loaded_hash is not None:
             logging.info(
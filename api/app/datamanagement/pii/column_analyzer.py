@@ -0,0 +1,107 @@
+from collections import OrderedDict, defaultdict
+from itertools import chain, islice, repeat
+
+import numpy as np
+import pandas as pd
+
+from datamanagement.configuration.variables import PII_MAX_EXAMPLES
+from datamanagement.pii.commonregex import CommonRegex, regexes
+from datamanagement.pii.spacy_models import iter_entities
+
+# dic2 label of each CommonRegex key, in the order they are checked
+REGEX_LABELS = OrderedDict([('emails', 'email'),
+                            ('phones', 'phone_number'),
+                            ('street_addresses', 'street_address'),
+                            ('credit_cards', 'credit_cards'),
+                            ('ips', 'ip'),
+                            ('dates', 'dates'),
+                            ('zip_codes', 'zip_codes'),
+                            ('po_boxes', 'po_boxes'),
+                            ('ssn_number', 'ssn_number'),
+                            ('phones_with_exts', 'phones_with_exts'),
+                            ('btc_addresses', 'btc_addresses')])
+
+# Keys matched against the value with its whitespace removed
+COMPACT_KEYS = ('phones',)
+
+# dic2 label of each spaCy entity label
+ENTITY_LABELS = {'PERSON': 'person', 'GPE': 'location', 'ORG': 'organization'}
+
+# Matches collected in dic, by CommonRegex key or spaCy entity label
+EXAMPLE_KEYS = OrderedDict([('people', 'PERSON'),
+                            ('locations', 'GPE'),
+                            ('organizations', 'ORG'),
+                            ('emails', 'emails'),
+                            ('phone_numbers', 'phones'),
+                            ('street_addresses', 'street_addresses'),
+                            ('credit_cards', 'credit_cards'),
+                            ('ips', 'ips')])
+
+
+class PiiAnalyzer(object):
+    """
+    PII found in the columns of df. Each detector runs once per distinct value
+    of a column, and NER runs over the distinct values in batches.
+    """
+    def __init__(self, df, max_examples=PII_MAX_EXAMPLES):
+        self.df = df
+        self.parser = CommonRegex()
+        self.max_examples = max_examples
+
+    def analysis(self):
+        """
+        Returns dic, mapping each row index to the matches found in df (at most
+        max_examples of each kind, or all of them if None, collected column by
+        column), and dic2, mapping the position of each column with PII to the
+        label of every detection in it, row by row.
+        """
+        examples = OrderedDict((name, []) for name in EXAMPLE_KEYS)
+        dic2 = defaultdict(list)
+        for i, (colName, colData) in enumerate(self.df.iteritems()):
+            labels = self.analyze_column(colData, examples)
+            if labels:
+                dic2[i] = labels
+
+        dic = {j: examples for j in self.df.index}
+        return dic, dic2
+
+    def analyze_column(self, colData, examples):
+        """dic2 labels of a column, row by row; its matches are added to examples"""
+        codes, values = pd.factorize(colData.astype(str))
+        counts = np.bincount(codes, minlength=len(values))
+        values = pd.Series(values, dtype=object)
+        compact_values = values.map(lambda text: "".join(text.split()))
+
+        hits = OrderedDict()
+        for key in REGEX_LABELS:
+            texts = compact_values if key in COMPACT_KEYS else values
+            hits[key] = texts.map(regexes[key].search).notnull().values
+        entities = list(iter_entities(values))
+
+        value_labels = [[label for key, label in REGEX_LABELS.items() if hits[key][k]]
+                        + [ENTITY_LABELS[label] for label, text in entities[k] if label in ENTITY_LABELS]
+                        for k in range(len(values))]
+
+        for name, key in EXAMPLE_KEYS.items():
+            if key in hits:
+                texts = compact_values if key in COMPACT_KEYS else values
+                method = getattr(self.parser, key)
+                rows = np.flatnonzero(hits[key])
+                matches = (method(texts[k]) for k in rows)
+            else:
+                rows = [k for k in range(len(values)) if any(label == key for label, text in entities[k])]
+                matches = ([text for label, text in entities[k] if label == key] for k in rows)
+            self.add_examples(examples[name], matches, counts[rows])
+
+        return [label for code in codes for label in value_labels[code]]
+
+    def add_examples(self, found, matches_per_value, counts):
+        """Extend found with the matches of each value, once per row holding it, up to max_examples"""
+        for matches, count in zip(matches_per_value, counts):
+            if self.max_examples is None:
+                found.extend(matches * count)
+                continue
+            room = self.max_examples - len(found)
+            if room <= 0:
+                return
+            found.extend(islice(chain.from_iterable(repeat(matches, count)), room))
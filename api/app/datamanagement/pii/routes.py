@@ -13,12 +13,12 @@ from datamanagement.main.utils import getuploadeddataset, selecteddataset
 from datamanagement.main.routes import getmenu
 
 from datamanagement.controllers.data_summary import DataSummary
-from datamanagement.controllers.data_driver import DataDriver
 
 from datamanagement.pii.utils import check_pii
+from datamanagement.pii.verdict_cache import verdict_cache
 
 
-from datamanagement.configuration.paths import EXAMPLES_FOLDER, UPLOAD_FOLDER
+from datamanagement.configuration.paths import EXAMPLES_FOLDER, UPLOAD_FOLDER, PII_JSON_SUFFIX
 
 pii = Blueprint('pii', __name__)
 
@@ -30,12 +30,7 @@ def discoverPii():
     dataset_options = getmenu()
     uploaded_dataset = getuploadeddataset()
     # breakpoint()
-    driver = DataDriver(selected_dataset)
-    driver.load_data()
-    data = driver.data
-    error_msg = driver.get_error_msg()
-    # breakpoint()
-    pii_data = check_pii(selected_dataset[0], data.to_json(), selected_dataset[-1])
+    pii_data = check_pii(selected_dataset[0], None, selected_dataset[-1])
     # breakpoint()
     pii_entities = pii_data.index.values
     pii_rows = map(list, pii_data.values)
@@ -64,15 +59,13 @@ def pii_anomalies(selected_dataset):
     # abs_file_path = os.path.join(script_dir, rel_path)
     folder = UPLOAD_FOLDER if selected_dataset[-1] else EXAMPLES_FOLDER
 
-    pii_file_path = Path(folder) / Path(selected_dataset[1]) / "pii_json.json"
+    pii_file_path = Path(folder) / Path(selected_dataset[1]) / PII_JSON_SUFFIX
 
     # abs_file_path = Path(EXAMPLES_FOLDER) / Path(selected_dataset[1]) / "pii_json.json"
 
-    if not os.path.exists(pii_file_path):
-        driver = DataDriver(selected_dataset)
-        driver.load_data()
-        data = driver.data
-        pii_data = check_pii(selected_dataset[0], data, selected_dataset[-1])
+    # check_pii regenerates the file only if the dataset file changed since it was written,
+    # keying on its hash and reading it only for a new scan
+    pii_data = check_pii(selected_dataset[0], None, selected_dataset[-1])
 
     with open(pii_file_path) as fin:
         pairs = json.load(fin)
@@ -101,3 +94,8 @@ def certify():
                            pii_dict=pii_dict)
 
 
+
+
+@pii.route('/piiVerdictCache')
+def pii_verdict_cache():
+    return jsonify(verdict_cache.stats())
@@ -0,0 +1,37 @@
+from datamanagement.configuration.variables import PII_WORKERS
+from datamanagement.controllers.profiling_pool import get_executor
+from datamanagement.pii.scanner import count_matches
+from datamanagement.pii.spacy_models import get_ner_model, count_entity_labels
+
+
+def preload_pii_models():
+    """
+    Pool initializer loading the spaCy model once per worker. The CommonRegex
+    patterns and the usaddress tagger are loaded when the worker imports this
+    module (through pii.scanner).
+    """
+    get_ner_model()
+
+
+def scan_column_pii(task):
+    """
+    Regex hits and entity label counts of a column, where task holds its
+    value_counts and the value_counts of the rows to run NER on (None for all
+    rows)
+    """
+    value_counts, ner_value_counts = task
+    # Python < 3.7 pools take no initializer; a no-op once the model is loaded
+    preload_pii_models()
+    if ner_value_counts is None:
+        ner_value_counts = value_counts
+    return count_matches(value_counts), count_entity_labels(ner_value_counts)
+
+
+def scan_columns_pii(tasks, workers=PII_WORKERS):
+    """scan_column_pii over each column of tasks, in a shared process pool when workers > 1, in column order"""
+    if workers <= 1 or len(tasks) < 2:
+        return [scan_column_pii(task) for task in tasks]
+
+    chunksize = -(-len(tasks) // (workers * 4))
+    return list(get_executor(workers, initializer=preload_pii_models).map(scan_column_pii, tasks,
+                                                                          chunksize=chunksize))
@@ -0,0 +1,142 @@
+import os
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+import usaddress
+
+from datamanagement.configuration.variables import (STREET_ADDRESS_CACHE_SIZE, STREET_ADDRESS_WORKERS,
+                                                    STREET_ADDRESS_PARALLEL_MIN_VALUES)
+from datamanagement.controllers.artifact_store import hash_content
+from datamanagement.controllers.profiling_pool import get_executor
+from datamanagement.pii.commonregex import regexes
+from datamanagement.pii.verdict_cache import verdict_cache, detector_version
+
+# Keys scored by parsing the value rather than by their regex
+PARSED_KEYS = ('street_addresses',)
+
+# usaddress labels each token, so a value needs STREET_ADDRESS_MIN_LABELS tokens to
+# be an address. Each token holds one of these runs (or is a lone # or &).
+STREET_ADDRESS_MIN_LABELS = 3
+STREET_ADDRESS_TOKEN = r'[^\s,;#&()]+|[#&]'
+
+# Name of the regex and usaddress verdicts in the verdict cache
+REGEX_DETECTOR = 'regex'
+
+_regex_version = None
+
+
+def get_regex_version():
+    """Version of the commonregex patterns and the street address test, computed once per process"""
+    global _regex_version
+    if _regex_version is None:
+        usaddress_model = getattr(usaddress, 'MODEL_PATH', None)
+        if usaddress_model is not None and os.path.isfile(usaddress_model):
+            with open(usaddress_model, 'rb') as model_file:
+                usaddress_model = hash_content(model_file.read())
+        _regex_version = detector_version(REGEX_DETECTOR,
+                                          {'patterns': {key: [pattern.pattern, pattern.flags]
+                                                        for key, pattern in regexes.items()},
+                                           'parsed_keys': PARSED_KEYS,
+                                           'street_address_min_labels': STREET_ADDRESS_MIN_LABELS,
+                                           'usaddress_model': usaddress_model})
+    return _regex_version
+
+
+def count_values(colData):
+    """Cast a column to str once and count each distinct value, in order of first appearance"""
+    values = colData.astype(str)
+    return values.groupby(values, sort=False).size()
+
+
+def normalize_value(text):
+    return ' '.join(text.split())
+
+
+@lru_cache(maxsize=STREET_ADDRESS_CACHE_SIZE)
+def is_street_address(text):
+    """Whether usaddress tags the (normalized) text with at least 3 different labels"""
+    return len(set([t[1] for t in usaddress.parse(text)])) >= STREET_ADDRESS_MIN_LABELS
+
+
+def parse_street_addresses(texts):
+    return [is_street_address(text) for text in texts]
+
+
+def may_be_street_address(values):
+    """
+    Vectorized prefilter of the values worth parsing: a street address has a
+    house number, so it holds digits and letters, and enough tokens to get 3
+    labels.
+    """
+    return (values.str.contains(r'\d')
+            & values.str.contains(r'[^\W\d_]')
+            & (values.str.count(STREET_ADDRESS_TOKEN) >= STREET_ADDRESS_MIN_LABELS)).values
+
+
+def detect_street_addresses(values, workers=STREET_ADDRESS_WORKERS):
+    """Whether each of values (a Series of str) is a street address"""
+    hits = np.zeros(len(values), dtype=bool)
+    candidates = may_be_street_address(values)
+    texts = [normalize_value(text) for text in values.values[candidates]]
+
+    if workers > 1 and len(texts) >= STREET_ADDRESS_PARALLEL_MIN_VALUES:
+        chunksize = -(-len(texts) // (workers * 4))
+        chunks = [texts[start:start + chunksize] for start in range(0, len(texts), chunksize)]
+        hits[candidates] = [hit for chunk_hits in get_executor(workers).map(parse_street_addresses, chunks)
+                            for hit in chunk_hits]
+    else:
+        hits[candidates] = parse_street_addresses(texts)
+    return hits
+
+
+def count_matches(value_counts):
+    """
+    Number of rows matching each of the commonregex keys, where value_counts
+    maps each distinct value to its number of rows. Each pattern is searched
+    once per distinct value: a value matches when CommonRegex would find
+    anything in it, so only the first match is looked for.
+    """
+    hits = match_values(pd.Series(value_counts.index, dtype=object))
+    counts = value_counts.values
+    return {key: counts[hits[key]].sum() for key in regexes}
+
+
+def match_values(values):
+    """
+    Whether each of values (a Series of distinct str) matches each of the
+    commonregex keys. Verdicts are read from the verdict cache, and only the
+    values missing from it are scanned.
+    """
+    cached = verdict_cache.get_many(REGEX_DETECTOR, get_regex_version(), values.values)
+    missing = np.array([verdict is None for verdict in cached], dtype=bool)
+    missing_values = values[missing].reset_index(drop=True)
+
+    hits = {}
+    for key, pattern in regexes.items():
+        hits[key] = np.zeros(len(values), dtype=bool)
+        if not len(missing_values):
+            continue
+        if key in PARSED_KEYS:
+            hits[key][missing] = detect_street_addresses(missing_values)
+        else:
+            hits[key][missing] = missing_values.map(pattern.search).notnull().values
+
+    for position in np.flatnonzero(~missing):
+        for key in cached[position]:
+            hits[key][position] = True
+
+    verdict_cache.put_many(get_regex_version(),
+                           ((values.values[position], [key for key in regexes if hits[key][position]])
+                            for position in np.flatnonzero(missing)))
+    return hits
+
+
+def scan_value_counts(value_counts, total_num):
+    """Share of the total_num rows matching each of the commonregex keys"""
+    return {key: count / total_num for key, count in count_matches(value_counts).items()}
+
+
+def scan_column(colData):
+    """Share of the rows of colData matching each of the commonregex keys"""
+    return scan_value_counts(count_values(colData), colData.shape[0])
@@ -0,0 +1,88 @@
+import threading
+from collections import Counter
+
+import spacy
+
+from datamanagement.configuration.variables import SPACY_MODEL, NER_BATCH_SIZE, NER_PROCESSES
+from datamanagement.pii.verdict_cache import verdict_cache, detector_version
+
+# Pipeline components the entity recognizer needs; the rest are removed from NER models
+NER_PIPES = ('tok2vec', 'ner')
+
+# Entity labels the PII scores ignore
+IGNORED_LABELS = ('CARDINAL', 'DATE')
+
+# Name of the entity labels in the verdict cache
+NER_DETECTOR = 'ner'
+
+_models = {}
+_models_lock = threading.Lock()
+
+
+def get_model(name=SPACY_MODEL, disable=()):
+    """spaCy model loaded on first use and shared by the whole process"""
+    key = (name, tuple(disable))
+    with _models_lock:
+        if key not in _models:
+            _models[key] = spacy.load(name, disable=list(disable))
+        return _models[key]
+
+
+def get_ner_model(name=SPACY_MODEL):
+    """Shared spaCy model running only the entity recognizer"""
+    key = (name, NER_PIPES)
+    with _models_lock:
+        if key not in _models:
+            nlp = spacy.load(name)
+            for pipe_name in list(nlp.pipe_names):
+                if pipe_name not in NER_PIPES:
+                    nlp.remove_pipe(pipe_name)
+            _models[key] = nlp
+        return _models[key]
+
+
+def iter_entities(texts, batch_size=NER_BATCH_SIZE, n_process=NER_PROCESSES):
+    """(label, text) of the entities found in each of texts, in order, with the texts batched through nlp.pipe"""
+    # n_process is only passed when asked for, older spaCy versions do not take it
+    pipe_kwargs = {'n_process': n_process} if n_process > 1 else {}
+    for doc in get_ner_model().pipe(texts, batch_size=batch_size, **pipe_kwargs):
+        yield [(ent.label_, ent.text) for ent in doc.ents]
+
+
+def iter_entity_labels(texts, batch_size=NER_BATCH_SIZE, n_process=NER_PROCESSES):
+    """Entity labels found in each of texts, in order"""
+    for entities in iter_entities(texts, batch_size=batch_size, n_process=n_process):
+        yield [label for label, text in entities]
+
+
+def get_ner_version(name=SPACY_MODEL):
+    nlp = get_ner_model(name)
+    return detector_version(NER_DETECTOR, {'model': name,
+                                           'model_version': nlp.meta.get('version'),
+                                           'spacy': spacy.__version__,
+                                           'pipes': nlp.pipe_names})
+
+
+def get_entity_labels(values):
+    """Entity labels found in each of values (distinct str), read from the verdict cache where possible"""
+    version = get_ner_version()
+    labels = verdict_cache.get_many(NER_DETECTOR, version, values)
+    missing = [position for position, value_labels in enumerate(labels) if value_labels is None]
+    for position, value_labels in zip(missing, iter_entity_labels([values[position] for position in missing])):
+        labels[position] = value_labels
+    verdict_cache.put_many(version, ((values[position], labels[position]) for position in missing))
+    return labels
+
+
+def count_entity_labels(value_counts):
+    """
+    Number of entities of each label found in the rows of a column, where
+    value_counts maps each distinct value to its number of rows. NER runs once
+    per distinct value.
+    """
+    label_counts = Counter()
+    for labels, count in zip(get_entity_labels(list(value_counts.index)), value_counts.values):
+        for label in labels:
+            if label not in IGNORED_LABELS:
+                label_counts[label] += int(count)
+    return dict(label_counts)
@@ -5,17 +5,23 @@ import warnings
 from pathlib import Path
 # from pii_analyzer import PiiAnalyzer
 
-from datamanagement.configuration.paths import EXAMPLES_FOLDER, UPLOAD_FOLDER
+from datamanagement.configuration.paths import EXAMPLES_FOLDER, UPLOAD_FOLDER, PII_JSON_SUFFIX
+from datamanagement.configuration.variables import STREAMING_MODE, JOB_WAIT_TIMEOUT_SECONDS
+from datamanagement.controllers.artifact_store import artifact_store, hash_content
+from datamanagement.controllers.single_flight import single_flight
+from datamanagement.jobs.runner import job_runner, SUCCEEDED, FINISHED_STATUSES
 
 from datamanagement.pii.analyzer import AnalyzerEngine
 from datamanagement.pii.analyzer.logger import Logger
 
+from datamanagement.pii.column_analyzer import PiiAnalyzer
 from datamanagement.pii.commonregex import CommonRegex, regexes
+from datamanagement.pii.scan_pool import scan_columns_pii
+from datamanagement.pii.scanner import count_values
+from datamanagement.pii.spacy_models import iter_entity_labels
 # from datamanagement import celery
 
 import usaddress
-import spacy
-nlp = spacy.load('en_core_web_sm')
 
 import collections
 from collections import Counter
@@ -48,133 +54,6 @@ logger = Logger()
 def makehash():
     return collections.defaultdict(makehash)
 
-class PiiAnalyzer(object):
-    def __init__(self, df):
-        self.df = df
-        self.parser = CommonRegex()
-        self.nlp_model = spacy.load('en')
-        # self.standford_ner =  StanfordNERTagger('classifiers/english.conll.4class.distsim.crf.ser.gz') #spacy.load("spacy/spacyNER")
-
-
-    def analysis(self):
-        people = []
-        organizations = []
-        locations = []
-        emails = []
-        phone_numbers = []
-        phones_with_exts = []
-        street_addresses = []
-        btc_addresses = []
-        credit_cards = []
-        ips = []
-        dates = []
-        zip_codes = []
-        po_boxes = []
-        ssn_number = []
-        data = []
-
-        dic = {}
-        dic2 = defaultdict(list)
-
-        # with open(self.filepath, 'rU') as filedata:
-        #     reader = csv.reader(filedata)
-        logger.info(f'the data argument passed to PiiAnalyzer is of the type: {type(self.df)}')
-
-        for j, row in self.df.iterrows():
-            data.extend(row)
-            for i, text in enumerate(row):
-                text = str(text)
-                if self.parser.emails(text):
-                    emails.extend(self.parser.emails(text))
-                    dic2[i].append('email')
-                if self.parser.phones("".join(text.split())):
-                    phone_numbers.extend(self.parser.phones("".join(text.split())))
-                    dic2[i].append('phone_number')
-                if self.parser.street_addresses(text):
-                    street_addresses.extend(self.parser.street_addresses(text))
-                    dic2[i].append('street_address')
-                if self.parser.credit_cards(text):
-                    credit_cards.extend(self.parser.credit_cards(text))
-                    dic2[i].append('credit_cards')
-                if self.parser.ips(text):
-                    ips.extend(self.parser.ips(text))
-                    dic2[i].append('ip')
-                if self.parser.dates(text):
-                    dates.extend(self.parser.ips(text))
-                    dic2[i].append('dates')
-                if self.parser.zip_codes(text):
-                    zip_codes.extend(self.parser.ips(text))
-                    dic2[i].append('zip_codes')
-                if self.parser.po_boxes(text):
-                    po_boxes.extend(self.parser.ips(text))
-                    dic2[i].append('po_boxes')
-                if self.parser.ssn_number(text):
-                    ssn_number.extend(self.parser.ips(text))
-                    dic2[i].append('ssn_number')
-                if self.parser.phones_with_exts(text):
-                    phones_with_exts.extend(self.parser.ips(text))
-                    dic2[i].append('phones_with_exts')
-                if self.parser.btc_addresses(text):
-                    btc_addresses.extend(self.parser.ips(text))
-                    dic2[i].append('btc_addresses')
-
-                parsed_doc = nlp(text)
-                for ent in parsed_doc.ents:
-                    if ent.label_ == 'PERSON':
-                        people.append(ent.text)
-                        dic2[i].append('person')
-                    if ent.label_ == 'GPE':
-                        locations.append(ent.text)
-                        dic2[i].append('location')
-                    if ent.label_ == 'ORG':
-                        organizations.append(ent.text)
-                        dic2[i].append('organization')
-
-            dic[j] = {'people': people, 'locations': locations, 'organizations': organizations,
-                      'emails': emails, 'phone_numbers': phone_numbers, 'street_addresses': street_addresses,
-                      'credit_cards': credit_cards, 'ips': ips,
-                      }
-
-        # for title, tag in self.standford_ner.tag(set(data)):
-        #     if tag == 'PERSON':
-        #         people.append(title)
-        #     if tag == 'LOCATION':
-        #         locations.append(title)
-        #     if tag == 'ORGANIZATION':
-        #         organizations.append(title)
-
-        # for parsed_doc in self.nlp_model.pipe(str(data), batch_size=1, n_threads=4):
-        #     print(parsed_doc)
-        #     for ent in parsed_doc.ents:
-        #         if ent.label_ == 'PERSON':
-        #             people.append(ent.text)
-        #         if ent.label_ == 'LOCATION':
-        #             locations.append(ent.text)
-        #         if ent.label_ == 'ORG':
-        #             organizations.append(ent.text)
-
-        def column_wise_analysis(self):
-            # dic = ['people' : [],
-            # 'organizations' : [],
-            # 'locations' : []]
-            dic = makehash()
-            for (colName, colData) in self.data.iteritems():
-                for key in regexes.keys():
-                    if not key in ['street_addresses']:
-                        dic[colName][key] = colData.apply(lambda x: next(iter(getattr(self.parser, key)(x)))).count()
-                    else:
-                        dic[colName][key] = colData.apply(lambda x: len(set([t[1] for t in usaddress.parse(x)])) >= 3).count()
-
-            st.json(json.dumps(dic))
-            return dic
-
-
-
-
-
-
-        return dic, dic2
-
 # def memory_usage(df):
 #     return round(df.memory_usage(deep=True).sum() / 1024 ** 2, 2)
 #
@@ -395,10 +274,10 @@ def get_pii_columns(df):
     dct = {}
     for key, value in df.iteritems():
         lst = []
-        for parsed_text in nlp.pipe(iter(value), batch_size=1, n_threads=4): #nlp.pipe(iter(value.apply(str)), batch_size=1, n_threads=4):
-            for ent in parsed_text.ents:
-                if not ent.label_ == 'CARDINAL' and not ent.label_ == 'DATE':
-                    lst.append(ent.label_)
+        for labels in iter_entity_labels(value.astype(str)):
+            for label in labels:
+                if not label == 'CARDINAL' and not label == 'DATE':
+                    lst.append(label)
         dct[key] = Counter(lst)
 
     d = mergeDict(analysis3, dct)
@@ -509,49 +388,81 @@ def cleanZerovalues(d):
 
 
 
+def get_dataset_path(keys, isUploaded):
+    folder = EXAMPLES_FOLDER if not isUploaded else UPLOAD_FOLDER
+    return Path(folder) / Path(keys).stem / keys
+
+
+def get_pii_json_key(keys, data, isUploaded, streaming=STREAMING_MODE):
+    # Key on the dataset file when it is there, so callers passing different rows of it
+    # (or none, leaving the scan to read the file) agree
+    dataset_path = get_dataset_path(keys, isUploaded)
+    if dataset_path.is_file():
+        content_hash = artifact_store.get_content_hash(dataset_path)
+    else:
+        content_hash = hash_content(data)
+    # The streaming scan (DataPii in streaming mode) covers the whole file, not the given rows
+    return artifact_store.make_key(content_hash, PII_JSON_SUFFIX, {'streaming': streaming})
+
+
+def save_pii_json(keys, isUploaded, comb_dict, streaming=STREAMING_MODE):
+    """Store and publish a pii_json.json computed outside of write_pii"""
+    folder = EXAMPLES_FOLDER if not isUploaded else UPLOAD_FOLDER
+    abs_file_path = Path(folder) / Path(keys).stem / PII_JSON_SUFFIX
+
+    pii_json_key = get_pii_json_key(keys, None, isUploaded, streaming)
+    comb_json = json.dumps(comb_dict, sort_keys=True, indent=4)
+    artifact_store.put(pii_json_key, comb_json, kind=PII_JSON_SUFFIX)
+    artifact_store.publish(pii_json_key, comb_json, abs_file_path)
+
+
 # @celery.task()
 def write_pii(keys, data, isUploaded):
 
     folder = EXAMPLES_FOLDER if not isUploaded else UPLOAD_FOLDER
-    abs_file_path = Path(folder) / Path(keys).stem / "pii_json.json"
+    abs_file_path = Path(folder) / Path(keys).stem / PII_JSON_SUFFIX
+
+    pii_json_key = get_pii_json_key(keys, data, isUploaded, streaming=False)
+    if artifact_store.is_published(pii_json_key, abs_file_path):
+        return
+
+    # Concurrent requests for the same data wait for a single scan
+    single_flight.run(pii_json_key, lambda: publish_pii_json(pii_json_key, data, abs_file_path,
+                                                             get_dataset_path(keys, isUploaded)))
+
+
+def publish_pii_json(pii_json_key, data, abs_file_path, dataset_path):
+    # Another process may have published it while we waited for the lock
+    if artifact_store.is_published(pii_json_key, abs_file_path):
+        return
 
-    if not abs_file_path.is_file():
+    # The same data seen before (e.g. an identical re-upload) reuses the stored result
+    comb_json = artifact_store.get(pii_json_key)
+    if comb_json is None:
         dic = makehash()
         spacy_results = makehash()
         # dic = NestedDefaultDict(2)
-        parser = CommonRegex()
-        nlp_model = nlp
 
 
-        data = pd.read_json(data) #covert json into dataframe
+        # data is the JSON of the rows to scan, or None to scan the dataset file
+        data = pd.read_json(data) if data is not None else pd.read_csv(dataset_path) #covert json into dataframe
 
         ln_data = len(list(data))
         i = iter(range(0, ln_data))
 
-        for (colName, colData) in data.iteritems(): #list of tuples with colname and its values
-            total_num = colData.shape[0]
-            for key in regexes.keys():
-                # breakpoint()
-                if not key in ['street_addresses']:
-                    dic[colName][key] = colData.astype(str).apply(lambda x: True if getattr(parser, key)(x) else False).values.sum() / total_num
-
-                else:
-                    # st.write("street address now")
-                    dic[colName][key] = colData.astype(str).apply(lambda x: len(set([t[1] for t in usaddress.parse(x)])) >= 3).values.sum() / total_num
-        #     my_progress_bar.progress(int((next(i)+1) / ln_data * 100))
-        # my_progress_bar.empty()
-
-
-
         # st.write(dic)
         d = dict()
 
         # st.write(json.dumps(d))
         num_of_rows = 30
 
-        for (colName, colData) in data.iloc[0:num_of_rows,:].iteritems():
-            spacy_results[colName] = sum_over_dict_list(colData.astype(str).apply(lambda x: [ent.label_ for ent in nlp_model(x).ents if ent.label_ not in ['CARDINAL', 'DATE']]).tolist())
-            spacy_results[colName] = {k:v / num_of_rows for k, v in spacy_results[colName].items()}
+        # Regexes run over every row and NER over the first num_of_rows, column by column in the PII pool
+        tasks = [(count_values(colData), count_values(colData.iloc[0:num_of_rows]))
+                 for (colName, colData) in data.iteritems()] #list of tuples with colname and its values
+        for colName, (matches, label_counts) in zip(data.columns, scan_columns_pii(tasks)):
+            for key, count in matches.items():
+                dic[colName][key] = count / data.shape[0]
+            spacy_results[colName] = {k:v / num_of_rows for k, v in label_counts.items()}
 
         comb_dict = combDict(dic, spacy_results)
         # st.write(comb_dict)
@@ -567,21 +478,30 @@ def write_pii(keys, data, isUploaded):
         # with open(abs_file_path, 'w') as file:
         #     json.dump(comb_dict, file, sort_keys=True, indent=4)
 
-        #write the json to a file
+        comb_json = json.dumps(comb_dict, sort_keys=True, indent=4)
+        artifact_store.put(pii_json_key, comb_json, kind=PII_JSON_SUFFIX)
 
-        with open(abs_file_path, 'w') as file:
-            json.dump(comb_dict, file, sort_keys=True, indent=4)
+    #write the json to a file
+    artifact_store.publish(pii_json_key, comb_json, abs_file_path)
 
 
 def check_pii(keys, data, isUploaded):
 
     folder = EXAMPLES_FOLDER if not isUploaded else UPLOAD_FOLDER
-    abs_file_path = Path(folder) / Path(keys).stem / "pii_json.json"
+    abs_file_path = Path(folder) / Path(keys).stem / PII_JSON_SUFFIX
 
     # breakpoint()
-    if not abs_file_path.is_file():
-        # breakpoint()
-        write_pii.delay(keys, data, isUploaded)
+    pii_json_key = get_pii_json_key(keys, data, isUploaded, streaming=False)
+    if not artifact_store.is_published(pii_json_key, abs_file_path):
+        # Waits on the scan queued by the upload when there is one, instead of starting another
+        job_id = job_runner.submit('pii_json', write_pii, keys, data, isUploaded, idempotency_key=pii_json_key)
+        job = job_runner.wait(job_id, timeout=JOB_WAIT_TIMEOUT_SECONDS)
+        if job is None:
+            raise RuntimeError(f"PII scan of {keys} has no job record {job_id}")
+        if job['status'] not in FINISHED_STATUSES:
+            raise RuntimeError(f"PII scan of {keys} still {job['status']} after {JOB_WAIT_TIMEOUT_SECONDS}s")
+        if job['status'] != SUCCEEDED:
+            raise RuntimeError(f"PII scan of {keys} {job['status']}: {job['error']}")
 
     with open(abs_file_path, 'r') as file:
         comb_dict = json.load(file)
@@ -0,0 +1,198 @@
+import os
+import json
+import time
+import atexit
+import logging
+import sqlite3
+import multiprocessing.util
+import hashlib
+import threading
+from collections import defaultdict
+
+from datamanagement.configuration import paths
+from datamanagement.configuration.variables import (PII_VERDICT_CACHE, PII_VERDICT_CACHE_MAX_ENTRIES,
+                                                    PII_VERDICT_STATS_FLUSH_SECONDS)
+from datamanagement.controllers.artifact_store import hash_content
+
+# Older SQLite versions take at most 999 parameters per statement
+QUERY_BATCH_SIZE = 500
+
+# Past max_entries, this fraction of them is dropped at once (the oldest first),
+# so eviction runs once in a while rather than on every write
+EVICT_FRACTION = 0.1
+
+
+def detector_version(detector, params):
+    """Hash identifying a detector and everything its verdicts depend on (patterns, models, thresholds)"""
+    return hash_content(json.dumps({'detector': detector, 'params': params}, sort_keys=True, default=str))
+
+
+class VerdictCache(object):
+    """
+    Persistent cache of PII detector verdicts per value, shared by every
+    dataset and process. Entries are keyed by a hash of the detector version
+    and the value (the str the detector sees), so a new version never reads
+    verdicts of the old one. Once max_entries is exceeded the oldest entries
+    are dropped. Hits and misses are counted per detector, in distinct values,
+    in memory first and added to the file every flush_seconds.
+    """
+
+    def __init__(self, path=paths.PII_VERDICT_CACHE, max_entries=PII_VERDICT_CACHE_MAX_ENTRIES,
+                 enabled=PII_VERDICT_CACHE, flush_seconds=PII_VERDICT_STATS_FLUSH_SECONDS):
+        self.path = path
+        self.max_entries = max_entries
+        self.enabled = enabled
+        self.flush_seconds = flush_seconds
+        self._local = threading.local()
+
+        # Hits and misses not in the file yet, of the process in counts_pid
+        self._counts_lock = threading.Lock()
+        self._counts = defaultdict(lambda: [0, 0])
+        self._counts_pid = os.getpid()
+        self._flushed_at = time.monotonic()
+
+    def connect(self):
+        # sqlite3 connections may not cross threads or forks, so each thread of each process opens its own
+        if getattr(self._local, 'key', None) != (os.getpid(), self.path):
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            connection = sqlite3.connect(self.path, timeout=30)
+            connection.execute('PRAGMA journal_mode=WAL')
+            with connection:
+                connection.execute('CREATE TABLE IF NOT EXISTS verdicts '
+                                   '(key BLOB PRIMARY KEY, verdict TEXT NOT NULL)')
+                connection.execute('CREATE TABLE IF NOT EXISTS detector_stats '
+                                   '(detector TEXT PRIMARY KEY, hits INTEGER NOT NULL, misses INTEGER NOT NULL)')
+            self._local.connection = connection
+            self._local.key = (os.getpid(), self.path)
+        return self._local.connection
+
+    @staticmethod
+    def make_key(version, value):
+        return hashlib.sha256((version + '\0' + value).encode('utf-8', 'surrogatepass')).digest()
+
+    def get_many(self, detector, version, values):
+        """Cached verdict of each of values (distinct str), None where there is none"""
+        if not self.enabled or not len(values):
+            return [None] * len(values)
+
+        keys = [self.make_key(version, value) for value in values]
+        found = {}
+        try:
+            connection = self.connect()
+            for start in range(0, len(keys), QUERY_BATCH_SIZE):
+                batch = keys[start:start + QUERY_BATCH_SIZE]
+                found.update(connection.execute('SELECT key, verdict FROM verdicts WHERE key IN ({})'
+                                                .format(','.join('?' * len(batch))), batch))
+        except sqlite3.Error as err:
+            # The cache only saves time, so the scan goes on without it
+            logging.warning("Could not read the PII verdict cache %s: %s", self.path, err)
+            return [None] * len(values)
+
+        self.count(detector, len(found), len(keys) - len(found))
+        return [json.loads(found[key]) if key in found else None for key in keys]
+
+    def count(self, detector, hits, misses):
+        with self._counts_lock:
+            if self._counts_pid != os.getpid():
+                # A forked process starts from the counts of its parent, which the parent flushes itself
+                self._counts.clear()
+                self._counts_pid = os.getpid()
+            counts = self._counts[detector]
+            counts[0] += hits
+            counts[1] += misses
+            due = time.monotonic() - self._flushed_at >= self.flush_seconds
+        if due:
+            self.flush_stats()
+
+    def flush_stats(self):
+        """Add the hits and misses counted in this process to the file"""
+        with self._counts_lock:
+            if self._counts_pid != os.getpid():
+                return
+            pending = [(hits, misses, detector) for detector, (hits, misses) in self._counts.items()]
+            self._counts.clear()
+            self._flushed_at = time.monotonic()
+        if not pending:
+            return
+
+        try:
+            connection = self.connect()
+            with connection:
+                connection.executemany('INSERT OR IGNORE INTO detector_stats VALUES (?, 0, 0)',
+                                       [(detector,) for _, _, detector in pending])
+                connection.executemany('UPDATE detector_stats SET hits = hits + ?, misses = misses + ? '
+                                       'WHERE detector = ?', pending)
+        except sqlite3.Error as err:
+            logging.warning("Could not write the PII verdict cache stats %s: %s", self.path, err)
+
+    def put_many(self, version, verdicts):
+        """Store the verdict of each (value, verdict) pair, then drop the oldest entries over max_entries"""
+        if not self.enabled:
+            return
+
+        rows = [(self.make_key(version, value), json.dumps(verdict)) for value, verdict in verdicts]
+        if not rows:
+            return
+        try:
+            connection = self.connect()
+            with connection:
+                connection.executemany('INSERT OR REPLACE INTO verdicts (key, verdict) VALUES (?, ?)', rows)
+                self.evict(connection)
+        except sqlite3.Error as err:
+            logging.warning("Could not write the PII verdict cache %s: %s", self.path, err)
+
+    def evict(self, connection):
+        # Rows are appended with increasing rowids, so the lowest ones are the oldest and the
+        # rowid range bounds the number of entries. MIN and MAX of the rowid are index lookups.
+        first_rowid = connection.execute('SELECT MIN(rowid) FROM verdicts').fetchone()[0]
+        last_rowid = connection.execute('SELECT MAX(rowid) FROM verdicts').fetchone()[0]
+        if last_rowid is None or last_rowid - first_rowid < self.max_entries:
+            return
+
+        keep = self.max_entries - int(self.max_entries * EVICT_FRACTION)
+        connection.execute('DELETE FROM verdicts WHERE rowid <= ?', (last_rowid - keep,))
+
+    def clear(self):
+        """Drop every verdict and stat, returning whether it worked"""
+        with self._counts_lock:
+            self._counts.clear()
+        try:
+            connection = self.connect()
+            with connection:
+                connection.execute('DELETE FROM verdicts')
+                connection.execute('DELETE FROM detector_stats')
+        except sqlite3.Error as err:
+            logging.warning("Could not clear the PII verdict cache %s: %s", self.path, err)
+            return False
+        return True
+
+    def stats(self):
+        if not self.enabled:
+            return {'enabled': False}
+
+        self.flush_stats()
+        try:
+            connection = self.connect()
+            detectors = {}
+            for detector, hits, misses in connection.execute('SELECT detector, hits, misses FROM detector_stats'):
+                detectors[detector] = {'hits': hits,
+                                       'misses': misses,
+                                       'hit_rate': hits / (hits + misses) if hits + misses else None}
+            entries = connection.execute('SELECT COUNT(*) FROM verdicts').fetchone()[0]
+        except sqlite3.Error as err:
+            logging.warning("Could not read the PII verdict cache stats %s: %s", self.path, err)
+            return {'enabled': True, 'error': str(err)}
+        return {'enabled': True,
+                'entries': entries,
+                'max_entries': self.max_entries,
+                'detectors': detectors}
+
+
+def flush_at_worker_exit(cache):
+    # Pool workers leave through multiprocessing, which runs its finalizers but not atexit
+    multiprocessing.util.Finalize(cache, cache.flush_stats, exitpriority=0)
+
+
+verdict_cache = VerdictCache()
+atexit.register(verdict_cache.flush_stats)
+multiprocessing.util.register_after_fork(verdict_cache, flush_at_worker_exit)
@@ -0,0 +1,102 @@
+# Ugly hack to fix imports
+import sys
+import os
+sys.path.insert(0, os.path.abspath('..'))
+
+import numpy as np
+import pandas as pd
+
+from controllers.accumulators import ColumnAccumulator, RowsMissingAccumulator
+from configuration import const_types
+
+
+class TestColumnAccumulator:
+    @classmethod
+    def setup_class(cls):
+        cls.numbers = pd.Series([1.5, 2.0, np.nan, 4.25, 4.25, 8.0, np.nan, 16.5, 3.0, 2.0])
+        cls.numbers_acc = ColumnAccumulator("numbers")
+        for start in range(0, len(cls.numbers), 3):
+            cls.numbers_acc.update(cls.numbers.iloc[start:start + 3])
+
+        cls.strings = pd.Series(["a", "bb", "bb", np.nan, "ccc", "bb", "a"], dtype=object)
+        cls.strings_acc = ColumnAccumulator("strings")
+        cls.strings_acc.update(cls.strings.iloc[:4]).update(cls.strings.iloc[4:])
+
+    def test_count(self):
+        assert self.numbers_acc.count == self.numbers.count()
+
+    def test_nulls(self):
+        assert self.numbers_acc.nulls == 2
+
+    def test_average(self):
+        assert np.isclose(self.numbers_acc.get_average(), self.numbers.mean())
+
+    def test_variance(self):
+        assert np.isclose(self.numbers_acc.get_variance(), self.numbers.var())
+
+    def test_skew(self):
+        assert np.isclose(self.numbers_acc.get_skew(), self.numbers.skew())
+
+    def test_kurtosis(self):
+        assert np.isclose(self.numbers_acc.get_kurtosis(), self.numbers.kurt())
+
+    def test_quantiles(self):
+        for q in [0.25, 0.5, 0.75]:
+            assert np.isclose(self.numbers_acc.get_quantile(q), self.numbers.dropna().quantile(q))
+
+    def test_min_max(self):
+        assert self.numbers_acc.min == 1.5
+        assert self.numbers_acc.max == 16.5
+
+    def test_count_unique_counts_nan(self):
+        assert self.numbers_acc.get_count_unique() == len(self.numbers.unique())
+
+    def test_data_type_string(self):
+        assert self.strings_acc.get_data_type() == const_types.DATATYPE_STRING
+
+    def test_lengths(self):
+        assert self.strings_acc.min_length == 1
+        assert self.strings_acc.max_length == 3
+
+    def test_mostcommon(self):
+        assert self.strings_acc.get_mostcommon() == "bb (3)"
+
+    def test_mostcommon_of_floats(self):
+        assert self.numbers_acc.get_mostcommon() == "2.0 (2)"
+        assert self.numbers_acc.get_n_mostcommon(2) == ([2.0, 4.25], ["2", "2"])
+        assert len(self.numbers_acc.get_n_mostcommon(5)[0]) == 5
+        assert self.numbers_acc.get_n_leastcommon(2) == ([8.0, 16.5], ["1", "1"])
+
+    def test_merge_matches_single_update(self):
+        whole = ColumnAccumulator("numbers").update(self.numbers)
+        assert whole.count == self.numbers_acc.count
+        assert np.isclose(whole.m2, self.numbers_acc.m2)
+        assert np.isclose(whole.m4, self.numbers_acc.m4)
+
+    def test_overflow_drops_value_counts(self):
+        acc = ColumnAccumulator("ids", max_tracked_values=3)
+        acc.update(pd.Series([1, 2, 3, 4, 5]))
+        assert acc.values_overflowed
+        assert acc.get_count_unique() is None
+
+
+class TestRowsMissingAccumulator:
+    @classmethod
+    def setup_class(cls):
+        cls.frame = pd.DataFrame({"a": [1, np.nan, np.nan, 4],
+                                   "b": ["x", None, "z", None],
+                                   "c": [1.0, np.nan, 3.0, 4.0]})
+
+    def test_histogram(self):
+        rows_missing = RowsMissingAccumulator().update(self.frame).to_dict()
+        assert rows_missing == {0: 1, 1: 2, 2: 0, 3: 1}
+
+    def test_update_leaves_frame_untouched(self):
+        RowsMissingAccumulator().update(self.frame)
+        assert list(self.frame.columns) == ["a", "b", "c"]
+
+    def test_merge_matches_single_update(self):
+        first = RowsMissingAccumulator().update(self.frame[:1])
+        second = RowsMissingAccumulator().update(self.frame[1:])
+        whole = RowsMissingAccumulator().update(self.frame)
+        assert first.merge(second).to_dict() == whole.to_dict()
@@ -0,0 +1,189 @@
+# Ugly hack to fix imports
+import sys
+import os
+sys.path.insert(0, os.path.abspath('..'))
+
+import time
+import types
+import random
+
+from pii.analyzer import AnalyzerEngine, RecognizerRegistry, PatternRecognizer, Pattern, RecognizerResult
+from pii.analyzer.nlp_engine import NlpArtifacts, NlpEngine
+
+
+class StubNlpEngine(NlpEngine):
+    def process_text(self, text, language):
+        return NlpArtifacts(entities=[], tokens=text.split(), tokens_indices=[], lemmas=[],
+                            nlp_engine=None, language=language)
+
+    def is_stopword(self, word, language):
+        return False
+
+    def is_punct(self, word, language):
+        return False
+
+
+class StubStore:
+    def __init__(self, latest_hash=None, recognizers=None):
+        self.latest_hash = latest_hash
+        self.recognizers = recognizers or []
+        self.hash_calls = 0
+
+    def get_latest_hash(self):
+        self.hash_calls += 1
+        return self.latest_hash
+
+    def get_all_recognizers(self):
+        return list(self.recognizers)
+
+
+def make_recognizers():
+    # The second pattern matches earlier in the texts than the first one
+    return [PatternRecognizer("ID", name="ids",
+                              patterns=[Pattern("ssn", r"\b\d{3}-\d{2}-\d{4}\b", 0.5),
+                                        Pattern("digits", r"\b\d{9}\b", 0.3)]),
+            PatternRecognizer("WORD", name="words", patterns=[Pattern("word", r"\bsecret\b", 0.8)])]
+
+
+def make_engine(**kwargs):
+    registry = RecognizerRegistry(recognizer_store_api=StubStore(), recognizers=make_recognizers())
+    return AnalyzerEngine(registry=registry, nlp_engine=StubNlpEngine(), **kwargs)
+
+
+def spans(results):
+    return sorted((result.entity_type, result.start, result.end, result.score) for result in results)
+
+
+def quadratic_remove_duplicates(results):
+    """The implementation AnalyzerEngine.__remove_duplicates replaced, scanning every kept result"""
+    results = sorted(results, key=lambda x: (-x.score, x.start, x.end - x.start))
+    filtered_results = []
+    for result in results:
+        if result.score == 0:
+            continue
+        valid_result = True
+        if result not in filtered_results:
+            for filtered in filtered_results:
+                if result.start >= filtered.start and result.end <= filtered.end \
+                        and result.entity_type == filtered.entity_type:
+                    valid_result = False
+                    break
+        if valid_result:
+            filtered_results.append(result)
+    return filtered_results
+
+
+def synthetic_results(num_results, seed):
+    # Overlapping, nested and repeated spans, zero scores, and result objects reported twice
+    rand = random.Random(seed)
+    length = num_results * 4
+    results = []
+    for _ in range(num_results):
+        start = rand.randrange(length)
+        results.append(RecognizerResult(rand.choice(["PERSON", "LOCATION", "US_SSN"]), start,
+                                        min(length, start + rand.randint(1, 20)),
+                                        rand.choice([0, 0.3, 0.5, 0.85, 1.0])))
+    results.extend(rand.sample(results, num_results // 10))
+    return results
+
+
+TEXTS = ["id 123456789 then ssn 078-05-1120",
+         "ssn 078-05-1120 then id 123456789 secret",
+         "nothing to see",
+         ""]
+
+
+class TestAnalyzerEngine:
+    def analyze(self, engine, text, score_threshold=None):
+        return engine.analyze(correlation_id=0, text=text, entities=[], language="en",
+                              all_fields=True, score_threshold=score_threshold)
+
+    def test_every_pattern_scans_the_whole_text(self):
+        results = self.analyze(make_engine(), TEXTS[0])
+        assert spans(results) == [("ID", 3, 12, 0.3), ("ID", 22, 33, 0.5)]
+
+    def test_combined_patterns_give_the_same_results(self):
+        plain = make_engine()
+        combined = make_engine(combine_patterns=True)
+        for text in TEXTS:
+            assert spans(self.analyze(combined, text)) == spans(self.analyze(plain, text))
+
+    def test_analyze_batch_matches_analyze(self):
+        for engine in [make_engine(), make_engine(combine_patterns=True)]:
+            for score_threshold in [None, 0.4, 0.9]:
+                batch = engine.analyze_batch(TEXTS, entities=[], language="en", all_fields=True,
+                                             score_threshold=score_threshold)
+                assert [spans(results) for results in batch] == \
+                    [spans(self.analyze(engine, text, score_threshold)) for text in TEXTS]
+
+            batch = engine.analyze_batch(TEXTS, entities=["WORD"], language="en", all_fields=False)
+            assert [spans(results) for results in batch] == \
+                [spans(engine.analyze(correlation_id=0, text=text, entities=["WORD"], language="en",
+                                      all_fields=False)) for text in TEXTS]
+
+    def test_remove_duplicates_matches_the_quadratic_scan(self):
+        remove_duplicates = AnalyzerEngine._AnalyzerEngine__remove_duplicates
+        for seed in range(200):
+            results = synthetic_results(random.Random(seed).randint(0, 60), seed)
+            kept = remove_duplicates(list(results))
+            assert [id(result) for result in kept] == [id(result) for result in quadratic_remove_duplicates(results)]
+
+
+class TestPattern:
+    def test_compiled_regex_is_reused(self):
+        pattern = Pattern("digits", r"\d+", 0.5)
+        assert pattern.compiled_regex is pattern.compiled_regex
+
+    def test_compiled_regex_follows_a_new_regex(self):
+        pattern = Pattern("word", r"\bsecret\b", 0.8)
+        recognizer = PatternRecognizer("WORD", name="words", patterns=[pattern])
+        compiled = pattern.compiled_regex
+        assert [result.start for result in recognizer.analyze("a secret code", ["WORD"])] == [2]
+
+        pattern.regex = r"\bcode\b"
+        assert pattern.compiled_regex is not compiled
+        assert pattern.compiled_regex.pattern == r"\bcode\b"
+        assert [result.start for result in recognizer.analyze("a secret code", ["WORD"])] == [9]
+
+
+class TestRecognizerRegistry:
+    def setup_method(self):
+        self.now = 0.0
+        clock = types.SimpleNamespace(monotonic=lambda: self.now, time=time.time,
+                                      strftime=time.strftime, localtime=time.localtime)
+        self.registry_module = sys.modules[RecognizerRegistry.__module__]
+        self.registry_module.time, self.time = clock, self.registry_module.time
+
+        self.store = StubStore(latest_hash="1",
+                               recognizers=[PatternRecognizer("ONE", patterns=[Pattern("one", r"\bone\b", 0.5)])])
+        self.registry = RecognizerRegistry(recognizer_store_api=self.store, recognizers=make_recognizers(),
+                                           hash_ttl=30)
+
+    def teardown_method(self):
+        self.registry_module.time = self.time
+
+    def test_store_hash_is_checked_once_per_ttl(self):
+        index = self.registry.get_index()
+        for now in [1, 10, 29.9]:
+            self.now = now
+            assert self.registry.get_index() is index
+        assert self.store.hash_calls == 1
+
+        self.now = 30
+        assert self.registry.get_index() is index
+        assert self.store.hash_calls == 2
+
+    def test_index_is_rebuilt_after_the_hash_changes(self):
+        by_language, by_entity = self.registry.get_index()
+        assert ("en", "ONE") in by_entity and ("en", "TWO") not in by_entity
+
+        self.store.latest_hash = "2"
+        self.store.recognizers = [PatternRecognizer("TWO", patterns=[Pattern("two", r"\btwo\b", 0.5)])]
+        self.now = 10
+        assert ("en", "TWO") not in self.registry.get_index()[1]
+
+        self.now = 40
+        by_language, by_entity = self.registry.get_index()
+        assert ("en", "TWO") in by_entity and ("en", "ONE") not in by_entity
+        assert [rec.supported_entities for rec in by_language["en"]] == [["ID"], ["WORD"], ["TWO"]]
+        assert self.store.hash_calls == 2
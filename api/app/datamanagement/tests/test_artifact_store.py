@@ -0,0 +1,97 @@
+# Ugly hack to fix imports
+import sys
+import os
+sys.path.insert(0, os.path.abspath('..'))
+
+import tempfile
+
+import controllers.artifact_store
+
+from controllers.artifact_store import ArtifactStore, hash_content
+
+
+class TestArtifactStore:
+    def setup_method(self):
+        self.folder = tempfile.mkdtemp()
+        self.store = ArtifactStore(os.path.join(self.folder, "store"))
+        self.dataset = os.path.join(self.folder, "data.csv")
+        with open(self.dataset, 'w') as data_file:
+            data_file.write("a,b\n1,x\n")
+
+    def test_key_depends_on_content_kind_and_params(self):
+        key = self.store.make_key(hash_content("a"), "summary.json", {"pii_threshold": 0.2})
+        assert key == self.store.make_key(hash_content("a"), "summary.json", {"pii_threshold": 0.2})
+        assert key != self.store.make_key(hash_content("b"), "summary.json", {"pii_threshold": 0.2})
+        assert key != self.store.make_key(hash_content("a"), "features.json", {"pii_threshold": 0.2})
+        assert key != self.store.make_key(hash_content("a"), "summary.json", {"pii_threshold": 0.3})
+
+    def test_content_hash_follows_file_changes(self):
+        first_hash = self.store.get_content_hash(self.dataset)
+        assert self.store.get_content_hash(self.dataset) == first_hash
+        with open(self.dataset, 'a') as data_file:
+            data_file.write("2,y\n")
+        assert self.store.get_content_hash(self.dataset) != first_hash
+
+    def test_put_and_get(self):
+        key = self.store.make_key(self.store.get_content_hash(self.dataset), "summary.json")
+        assert self.store.get(key) is None
+        self.store.put(key, '{"num_records": 1}', kind="summary.json")
+        assert self.store.get(key) == '{"num_records": 1}'
+        assert self.store.get_artifact(key)['kind'] == "summary.json"
+
+    def test_publish(self):
+        target = os.path.join(self.folder, "summary.json")
+        self.store.publish("abc", '{}', target)
+        assert self.store.is_published("abc", target)
+        assert not self.store.is_published("def", target)
+        os.remove(target)
+        assert not self.store.is_published("abc", target)
+
+    def test_index_is_shared_by_stores_on_the_same_root(self):
+        key = self.store.make_key(self.store.get_content_hash(self.dataset), "summary.json")
+        target = os.path.join(self.folder, "summary.json")
+        self.store.put(key, '{}', kind="summary.json")
+        self.store.publish(key, '{}', target)
+
+        other = ArtifactStore(self.store.root)
+        assert other.get_artifact(key)['kind'] == "summary.json"
+        assert other.is_published(key, target)
+
+    def test_garbage_collection_drops_older_versions_then_the_oldest(self):
+        keys = ["{:02d}{}".format(i, "a" * 62) for i in range(4)]
+        for key in keys:
+            self.store.put(key, "x" * 10)
+        assert self.store.collect_garbage() == 0
+
+        self.store.max_bytes = 25
+        assert self.store.collect_garbage() == 2
+        assert [self.store.get(key) for key in keys] == [None, None, "x" * 10, "x" * 10]
+        assert self.store.get_artifact(keys[0]) is None
+
+        version = controllers.artifact_store._generator_version
+        controllers.artifact_store._generator_version = "newer"
+        try:
+            assert self.store.collect_garbage() == 2
+        finally:
+            controllers.artifact_store._generator_version = version
+        assert os.listdir(os.path.join(self.store.root, "objects", "02")) == []
+
+    def test_garbage_collection_forgets_files_that_are_gone(self):
+        target = os.path.join(self.folder, "summary.json")
+        self.store.publish("abc", '{}', target)
+        self.store.get_content_hash(self.dataset)
+        os.remove(target)
+        os.remove(self.dataset)
+        self.store.collect_garbage()
+        connection = self.store.connect()
+        assert connection.execute("SELECT COUNT(*) FROM published").fetchone()[0] == 0
+        assert connection.execute("SELECT COUNT(*) FROM sources").fetchone()[0] == 0
+
+    def test_put_collects_garbage_every_gc_seconds(self):
+        self.store.max_bytes = 1
+        self.store.put("aa" + "b" * 62, "x")
+        assert self.store.get("aa" + "b" * 62) == "x"
+        self.store.gc_seconds = 0
+        self.store.put("cc" + "d" * 62, "x")
+        assert self.store.get("aa" + "b" * 62) is None
+        assert self.store.get("cc" + "d" * 62) == "x"
@@ -0,0 +1,30 @@
+# Ugly hack to fix imports
+import sys
+import os
+sys.path.insert(0, os.path.abspath('..'))
+
+from collections import Counter
+
+import pandas as pd
+
+from pii.column_analyzer import PiiAnalyzer
+
+
+class TestColumnAnalyzer:
+    def setup_method(self):
+        self.df = pd.DataFrame({'email': ["john@example.com", "jane@example.com", "john@example.com"] * 10,
+                                'ip': ["192.168.0.1", "10.0.0.1", "hello"] * 10})
+
+    def test_labels_every_row(self):
+        dic, dic2 = PiiAnalyzer(self.df, max_examples=None).analysis()
+        assert Counter(dic2[0])['email'] == 30
+        assert Counter(dic2[1])['ip'] == 20
+        assert list(dic) == list(self.df.index)
+        assert Counter(dic[0]['emails']) == {"john@example.com": 20, "jane@example.com": 10}
+
+    def test_examples_are_capped(self):
+        dic, dic2 = PiiAnalyzer(self.df, max_examples=5).analysis()
+        assert dic[0]['emails'] == ["john@example.com", "john@example.com", "john@example.com",
+                                    "john@example.com", "john@example.com"]
+        assert len(dic[0]['ips']) == 5
+        assert Counter(dic2[0])['email'] == 30
@@ -0,0 +1,43 @@
+# Ugly hack to fix imports
+import sys
+import os
+sys.path.insert(0, os.path.abspath('..'))
+
+import tempfile
+
+import pandas as pd
+
+from controllers.columnar_cache import (write_columnar_cache, is_cache_fresh, read_columnar_cache,
+                                        iter_columnar_cache, read_source_head)
+
+
+class TestColumnarCache:
+    def setup_method(self):
+        self.filepath = os.path.join(tempfile.mkdtemp(), "data.csv")
+
+    def write_csv(self, frame):
+        frame.to_csv(self.filepath, index=False)
+
+    def test_cache_is_written_in_chunks(self):
+        frame = pd.DataFrame({"id": range(250), "ratio": [i / 4 for i in range(250)],
+                              "name": ["row {}".format(i) for i in range(250)]})
+        self.write_csv(frame)
+        assert write_columnar_cache(self.filepath, chunksize=100) is not None
+        assert is_cache_fresh(self.filepath)
+
+        cached = read_columnar_cache(self.filepath)
+        pd.testing.assert_frame_equal(cached, frame)
+        assert [len(chunk) for chunk in iter_columnar_cache(self.filepath, 100)] == [100, 100, 50]
+
+    def test_cache_has_the_types_of_the_top_rows(self):
+        frame = pd.DataFrame({"id": range(50), "name": ["row {}".format(i) for i in range(50)]})
+        self.write_csv(frame)
+        write_columnar_cache(self.filepath, chunksize=10)
+        cached = read_columnar_cache(self.filepath, nrows=20)
+        assert cached.dtypes.to_dict() == read_source_head(self.filepath, nrows=20).dtypes.to_dict()
+
+    def test_no_cache_when_later_rows_do_not_fit_the_types(self):
+        self.write_csv(pd.DataFrame({"id": [str(i) for i in range(2000)] + ["n/a"]}))
+        assert write_columnar_cache(self.filepath, chunksize=500) is None
+        assert not is_cache_fresh(self.filepath)
+        assert os.listdir(os.path.dirname(self.filepath)) == ["data.csv"]
@@ -0,0 +1,58 @@
+# Ugly hack to fix imports
+import sys
+import os
+sys.path.insert(0, os.path.abspath('..'))
+
+import tempfile
+
+import pandas as pd
+
+from controllers.data_pii import DataPii, wilson_interval
+from pii.utils import get_pii_json_key
+# The instance the scanners use, imported through the package like they do
+from datamanagement.pii.verdict_cache import verdict_cache
+
+
+class TestDataPii:
+    @classmethod
+    def setup_class(cls):
+        # Keep verdicts of test data out of the shared cache file
+        cls.verdict_cache_path = verdict_cache.path
+        verdict_cache.path = os.path.join(tempfile.mkdtemp(), 'verdicts.sqlite')
+        cls.data = pd.DataFrame({'phone': ["555-123-{:04d}".format(i) for i in range(1000)],
+                                 'word': ["hello"] * 1000})
+
+    @classmethod
+    def teardown_class(cls):
+        verdict_cache.path = cls.verdict_cache_path
+
+    def get_data_pii(self, sampling):
+        data_pii = DataPii(["pii.csv", "pii", "", "", False], sampling=sampling)
+        data_pii.data = self.data
+        data_pii._total_rows = self.data.shape[0]
+        return data_pii
+
+    def test_wilson_interval(self):
+        low, high = wilson_interval(50, 100)
+        assert low < 0.5 < high
+        assert round(wilson_interval(0, 100)[0], 9) == 0
+        assert round(wilson_interval(100, 100)[1], 9) == 1
+
+    def test_sampling_stops_early_on_obvious_columns(self):
+        feature_pii = self.get_data_pii(sampling=True).get_pii('phone', 0)
+        assert feature_pii.rows_examined < 1000
+        assert feature_pii.is_pii
+        assert feature_pii.most_likely_pii_type == {'phones': 100}
+
+    def test_full_scan_examines_every_row(self):
+        feature_pii = self.get_data_pii(sampling=False).get_pii('phone', 0)
+        assert feature_pii.rows_examined == 1000
+        assert feature_pii.most_likely_pii_type == {'phones': 100}
+
+    def test_streaming_and_row_scans_have_their_own_key(self):
+        data = self.data.to_json()
+        row_key = get_pii_json_key("missing.csv", data, False, streaming=False)
+        streaming_key = get_pii_json_key("missing.csv", data, False, streaming=True)
+        assert row_key != streaming_key
+        assert get_pii_json_key("missing.csv", data, False, streaming=False) == row_key
+        assert get_pii_json_key("missing.csv", self.data.head().to_json(), False, streaming=False) != row_key
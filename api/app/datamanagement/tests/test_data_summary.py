@@ -54,3 +54,31 @@ class TestDataSummary:
         expected = sample_size
         actual = len(sample)
         assert expected == actual
+
+
+class TestDataSummaryStreaming:
+    @classmethod
+    def setup_class(cls):
+        cls.dataset = ['titanic.csv', 'Titanic', 'PassengerId', 'Survived', False]
+        cls.summary = DataSummary(cls.dataset, streaming=True)
+        cls.streaming_summary = cls.summary.get_streaming_summary()
+
+    def test_get_streaming_summary_type(self):
+        expected = Summary
+        actual = type(self.streaming_summary)
+        assert expected == actual
+
+    def test_get_streaming_summary_num_records(self):
+        expected = 891
+        actual = self.streaming_summary.num_records
+        assert expected == actual
+
+    def test_get_streaming_summary_num_features(self):
+        expected = 12
+        actual = self.streaming_summary.num_features
+        assert expected == actual
+
+    def test_get_streaming_summary_rows_missing(self):
+        expected = 891
+        actual = sum(self.streaming_summary.rows_missing.values())
+        assert expected == actual
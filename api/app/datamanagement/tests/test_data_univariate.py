@@ -3,6 +3,11 @@ import sys
 import os
 sys.path.insert(0, os.path.abspath('..'))
 
+import numpy as np
+import pandas as pd
+
+from controllers.accumulators import ColumnAccumulator
+from controllers.data_driver import DataDriver
 from controllers.data_univariate import DataUnivariate
 from model.features import Features
 
@@ -385,4 +390,90 @@ class TestDataUnivariate:
     def test_get_least_common_count_string(self):
         expected = "77"
         actual = self.univariate.get_leastcommon("Embarked")
-        assert expected in actual
\ No newline at end of file
+        assert expected in actual
+
+
+class FrameUnivariate(DataUnivariate):
+    """DataUnivariate over an in-memory frame, without a file or PII scan"""
+
+    def __init__(self, data):
+        DataDriver.__init__(self, ["frame.csv", "frame", None, None, False], streaming=False)
+        self.workers = 1
+        self.pii_data = {'piis': []}
+        self.data = data
+
+
+def strings(values):
+    return pd.Series(values, dtype=object)
+
+
+class TestAccumulatedFeature:
+    """The fused and the chunked profiles against the per-statistic getters they replaced"""
+
+    @classmethod
+    def setup_class(cls):
+        cls.univariate = FrameUnivariate(pd.DataFrame({
+            "ints": [3, 1, 4, 1, 5, 9, 2, 6, 5, 3],
+            "floats": [1.5, np.nan, 2.25, 4.0, np.nan, 8.0, 1.5, 2.25, 3.0, 0.5],
+            "flags": [0, 1, 1, 0, 1, 0, 0, 1, 1, 1],
+            "bools": [True, False, True, True, False, True, True, False, True, True],
+            "single": [np.nan] * 9 + [7.0],
+            "constant": [2.0] * 10,
+            "words": strings(["x", "yy", "x", "zzz", "yy", "x", "w", "zzz", "x", "yy"]),
+            "cities": strings(["Paris", "Rome", np.nan, "Oslo", "Paris", "Rome", np.nan, "Rome", "Paris", "Paris"]),
+            "tied": strings(["b", "a", "b", "a", "c", "c", "d", "e", "e", "d"])}))
+
+    def get_baseline(self, name):
+        univariate = self.univariate
+        mostcommon_values, mostcommon_counts = univariate.get_n_mostcommon(name, 5)
+        leastcommon_values, leastcommon_counts = univariate.get_n_leastcommon(name, 5)
+        return {'feat_datatype': univariate.get_data_type(name),
+                'feat_vartype': univariate.get_vartype_formatted(name),
+                'feat_count': univariate.get_count(name),
+                'feat_missing': univariate.get_missing_formatted(name),
+                'feat_unique': univariate.get_count_unique(name),
+                'feat_average': univariate.format_rounded_string(univariate.get_average(name)),
+                'feat_median': univariate.get_median(name),
+                'feat_mode': univariate.get_mode(name),
+                'feat_max': univariate.get_max(name),
+                'feat_max_length': univariate.get_max_length(name),
+                'feat_min': univariate.get_min(name),
+                'feat_min_length': univariate.get_min_length(name),
+                'feat_stddev': univariate.format_rounded_string(univariate.get_stddev(name)),
+                'feat_variance': univariate.format_rounded_string(univariate.get_variance(name)),
+                'feat_quantile25': univariate.format_rounded_string(univariate.get_quantile25(name)),
+                'feat_quantile75': univariate.format_rounded_string(univariate.get_quantile75(name)),
+                'feat_iqr': univariate.format_rounded_string(univariate.get_iqr(name)),
+                'feat_skew': univariate.format_rounded_string(univariate.get_skew(name)),
+                'feat_kurtosis': univariate.format_rounded_string(univariate.get_kurtosis(name)),
+                'feat_mostcommon': univariate.get_mostcommon(name),
+                'feat_5_mostcommon_values': mostcommon_values,
+                'feat_5_mostcommon_counts': mostcommon_counts,
+                'feat_leastcommon': univariate.get_leastcommon(name),
+                'feat_5_leastcommon_values': leastcommon_values,
+                'feat_5_leastcommon_counts': leastcommon_counts,
+                'feat_warnings': univariate.get_warnings(name),
+                'feat_notes': univariate.get_notes(name),
+                'feat_outlierscore': univariate.get_outlier_score(name)}
+
+    def assert_matches_baseline(self, feature, name):
+        for field, expected in self.get_baseline(name).items():
+            # Feature stores None as ''
+            expected = '' if expected is None else expected
+            actual = getattr(feature, field)
+            if isinstance(expected, float) and np.isnan(expected):
+                assert isinstance(actual, float) and np.isnan(actual), (name, field, actual)
+            else:
+                assert actual == expected, (name, field, actual, expected)
+
+    def test_fused_profile_matches_the_getters(self):
+        for name in self.univariate.data.columns:
+            self.assert_matches_baseline(self.univariate.get_feature(name, 0), name)
+
+    def test_chunked_profile_matches_the_getters(self):
+        # Across chunks, ties in the most and least common are broken by value instead
+        for name in self.univariate.data.columns.drop("tied"):
+            accumulator = ColumnAccumulator(name)
+            for start in range(0, len(self.univariate.data), 3):
+                accumulator.update(self.univariate.data[name].iloc[start:start + 3])
+            self.assert_matches_baseline(self.univariate.get_accumulated_feature(accumulator, 0), name)
@@ -0,0 +1,49 @@
+# Ugly hack to fix imports
+import sys
+import os
+sys.path.insert(0, os.path.abspath('..'))
+
+import pandas as pd
+
+from controllers.frame_cache import FrameCache
+
+
+class TestFrameCache:
+    @classmethod
+    def setup_class(cls):
+        cls.filepath = os.path.abspath(__file__)
+        cls.frame = pd.DataFrame({"a": range(100), "b": ["x"] * 100})
+
+    def test_get_or_load_miss_then_hit(self):
+        cache = FrameCache()
+        cache.get_or_load(self.filepath, ("options",), lambda: self.frame)
+        cache.get_or_load(self.filepath, ("options",), lambda: self.frame)
+        assert cache.misses == 1
+        assert cache.hits == 1
+
+    def test_get_or_load_options_in_key(self):
+        cache = FrameCache()
+        cache.get_or_load(self.filepath, (True,), lambda: self.frame)
+        cache.get_or_load(self.filepath, (False,), lambda: self.frame)
+        assert cache.misses == 2
+
+    def test_get_or_load_copy_is_isolated(self):
+        cache = FrameCache()
+        loaded = cache.get_or_load(self.filepath, (), lambda: self.frame)
+        loaded["num_missing"] = 0
+        reloaded = cache.get_or_load(self.filepath, (), lambda: self.frame)
+        assert "num_missing" not in reloaded.columns
+
+    def test_eviction_over_budget(self):
+        nbytes = int(self.frame.memory_usage(index=True, deep=True).sum())
+        cache = FrameCache(max_bytes=nbytes)
+        cache.get_or_load(self.filepath, (1,), lambda: self.frame)
+        cache.get_or_load(self.filepath, (2,), lambda: self.frame)
+        assert cache.stats()["entries"] == 1
+        assert cache.evictions == 1
+
+    def test_get_or_load_missing_file_calls_loader(self):
+        cache = FrameCache()
+        loaded = cache.get_or_load("does_not_exist.csv", (), lambda: None)
+        assert loaded is None
+        assert cache.stats()["entries"] == 0
@@ -0,0 +1,84 @@
+# Ugly hack to fix imports
+import sys
+import os
+sys.path.insert(0, os.path.abspath('..'))
+
+import time
+import tempfile
+
+from jobs.runner import JobRunner, report_progress, get_owner, SUCCEEDED, FAILED, CANCELLED, QUEUED
+
+
+def add(a, b):
+    return a + b
+
+
+def fail():
+    raise ValueError("bad file")
+
+
+def slow_steps(steps):
+    for step in range(steps):
+        report_progress(step / steps)
+        time.sleep(0.1)
+    return steps
+
+
+class TestJobRunner:
+    def setup_method(self):
+        self.runner = JobRunner(workers=1, folder=tempfile.mkdtemp())
+
+    def teardown_method(self):
+        self.runner.shutdown()
+
+    def test_result_and_progress(self):
+        job = self.runner.wait(self.runner.submit('add', add, 1, 2), timeout=30)
+        assert job['status'] == SUCCEEDED
+        assert job['result'] == 3
+        assert job['progress'] == 1.0
+
+    def test_failure_is_recorded(self):
+        job = self.runner.wait(self.runner.submit('fail', fail), timeout=30)
+        assert job['status'] == FAILED
+        assert 'bad file' in job['error']
+
+    def test_idempotency_key_returns_active_job(self):
+        job_id = self.runner.submit('slow', slow_steps, 20, idempotency_key='data.csv/summary.json')
+        assert self.runner.submit('slow', slow_steps, 20, idempotency_key='data.csv/summary.json') == job_id
+        assert self.runner.submit('slow', slow_steps, 20, idempotency_key='data.csv/pii.json') != job_id
+        self.runner.wait(job_id, timeout=30)
+        assert self.runner.submit('add', add, 1, 2, idempotency_key='data.csv/summary.json') != job_id
+
+    def test_cancel_running_job(self):
+        job_id = self.runner.submit('slow', slow_steps, 100)
+        while self.runner.get(job_id)['status'] != 'running':
+            time.sleep(0.05)
+        self.runner.cancel(job_id)
+        assert self.runner.wait(job_id, timeout=30)['status'] == CANCELLED
+
+    def test_cancel_queued_job(self):
+        # The single worker runs the first job and the pool prefetches the second, so the third stays queued
+        job_ids = [self.runner.submit('slow', slow_steps, 20) for _ in range(3)]
+        assert self.runner.cancel(job_ids[2])['status'] == CANCELLED
+        assert job_ids[2] not in self.runner._futures
+        self.runner.cancel(job_ids[1])
+        self.runner.cancel(job_ids[0])
+
+    def test_job_of_a_gone_process_is_failed_and_resubmitted(self):
+        # A record left queued by a web worker that died before running it (pids never exceed 2 ** 22)
+        self.runner.job_store.create({'id': 'stale', 'status': QUEUED, 'owner': dict(get_owner(), pid=2 ** 22 + 1)})
+        self.runner.job_store.remember('data.csv/pii.json', 'stale')
+
+        assert self.runner.get('stale')['status'] == FAILED
+        job_id = self.runner.submit('add', add, 1, 2, idempotency_key='data.csv/pii.json')
+        assert job_id != 'stale'
+        assert self.runner.wait(job_id, timeout=30)['status'] == SUCCEEDED
+
+    def test_wait_is_bounded(self):
+        job_id = self.runner.submit('slow', slow_steps, 100)
+        assert self.runner.wait(job_id, timeout=0.3)['status'] not in (SUCCEEDED, FAILED, CANCELLED)
+        self.runner.cancel(job_id)
+
+    def test_unknown_job(self):
+        assert self.runner.get('missing') is None
+        assert self.runner.cancel('missing') is None
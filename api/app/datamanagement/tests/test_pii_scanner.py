@@ -0,0 +1,38 @@
+# Ugly hack to fix imports
+import sys
+import os
+sys.path.insert(0, os.path.abspath('..'))
+
+import pandas as pd
+
+from pii.commonregex import CommonRegex, regexes
+from pii.scanner import scan_column, detect_street_addresses, is_street_address, PARSED_KEYS
+
+
+class TestPiiScanner:
+    def setup_method(self):
+        self.column = pd.Series(["john@example.com", "555-123-4567", "192.168.0.1", "hello",
+                                 "john@example.com", "PO Box 12", "123-45-6789", 42, 3.5] * 3)
+
+    def test_matches_commonregex_per_row(self):
+        parser = CommonRegex()
+        scores = scan_column(self.column)
+        assert list(scores) == list(regexes)
+        for key in regexes:
+            if key not in PARSED_KEYS:
+                expected = self.column.astype(str).apply(lambda x: bool(getattr(parser, key)(x))).sum() / len(self.column)
+                assert scores[key] == expected
+
+    def test_duplicates_are_weighted(self):
+        scores = scan_column(self.column)
+        assert scores["emails"] == 2 / 9
+        assert scores["ips"] == 1 / 9
+
+    def test_street_addresses_are_prefiltered_and_memoized(self):
+        is_street_address.cache_clear()
+        values = pd.Series(["42", "john@example.com", "", "Main Street Springfield",
+                            "123 Main St Springfield", "123  Main St  Springfield"])
+        hits = detect_street_addresses(values)
+        assert list(hits) == [False, False, False, False, True, True]
+        assert is_street_address.cache_info().misses == 1
+        assert is_street_address.cache_info().hits == 1
@@ -0,0 +1,58 @@
+# Ugly hack to fix imports
+import sys
+import os
+sys.path.insert(0, os.path.abspath('..'))
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import controllers.profiling_pool as profiling_pool
+from controllers.accumulators import ColumnAccumulator
+
+
+class TestProfilingPool:
+    def setup_method(self):
+        self.data = pd.DataFrame({'id': range(40),
+                                  'ratio': [i / 3 if i % 7 else np.nan for i in range(40)],
+                                  'city': [["Paris", "Lima", None, "Oslo"][i % 4] for i in range(40)],
+                                  'flag': [i % 5 == 0 for i in range(40)]})
+        self.write_shared_table = profiling_pool.write_shared_table
+        self.shared_paths = []
+
+    def teardown_method(self):
+        profiling_pool.write_shared_table = self.write_shared_table
+
+    def record_shared_table(self, data):
+        path = self.write_shared_table(data)
+        self.shared_paths.append(path)
+        return path
+
+    def serial_states(self):
+        return [ColumnAccumulator(feat_physical_name, max_tracked_values=None).update(column).to_state()
+                for feat_physical_name, column in self.data.iteritems()]
+
+    def test_shared_table_profile_matches_serial_profile(self):
+        profiling_pool.write_shared_table = self.record_shared_table
+        accumulators = profiling_pool.profile_columns(self.data, workers=2)
+        assert self.shared_paths[0] is not None
+        assert [accumulator.to_state() for accumulator in accumulators] == self.serial_states()
+        assert not os.path.exists(self.shared_paths[0])
+
+    def test_pickled_profile_matches_serial_profile(self):
+        profiling_pool.write_shared_table = lambda data: None
+        accumulators = profiling_pool.profile_columns(self.data, workers=2)
+        assert [accumulator.to_state() for accumulator in accumulators] == self.serial_states()
+
+    def test_shared_table_is_removed_after_a_worker_error(self):
+        def write_unreadable_table(data):
+            path = self.record_shared_table(data)
+            with open(path, 'wb') as shared_file:
+                shared_file.write(b"not an arrow file")
+            return path
+
+        profiling_pool.write_shared_table = write_unreadable_table
+        with pytest.raises(profiling_pool.pa.ArrowException):
+            profiling_pool.profile_columns(self.data, workers=2)
+        assert self.shared_paths[0] is not None
+        assert not os.path.exists(self.shared_paths[0])
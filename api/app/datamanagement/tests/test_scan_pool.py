@@ -0,0 +1,40 @@
+# Ugly hack to fix imports
+import sys
+import os
+sys.path.insert(0, os.path.abspath('..'))
+
+import tempfile
+
+import pandas as pd
+
+from pii.scanner import count_values
+from pii.scan_pool import scan_columns_pii
+# The instance the scanners use, imported through the package like they do
+from datamanagement.pii.verdict_cache import verdict_cache
+
+
+class TestScanPool:
+    @classmethod
+    def setup_class(cls):
+        # Keep verdicts of test data out of the shared cache file
+        cls.verdict_cache_path = verdict_cache.path
+        verdict_cache.path = os.path.join(tempfile.mkdtemp(), 'verdicts.sqlite')
+
+    @classmethod
+    def teardown_class(cls):
+        verdict_cache.path = cls.verdict_cache_path
+
+    def setup_method(self):
+        data = pd.DataFrame({'email': ["john@example.com", "hello"] * 10,
+                             'phone': ["555-123-4567", "Barack Obama"] * 10,
+                             'address': ["123 Main St Springfield", "42"] * 10})
+        self.tasks = [(count_values(data[feat_name]), count_values(data[feat_name].iloc[0:5]))
+                      for feat_name in data.columns]
+
+    def test_pool_matches_serial_scan_in_column_order(self):
+        serial = scan_columns_pii(self.tasks, workers=1)
+        assert serial[0][0]["emails"] == 10
+        assert serial[1][0]["phones"] == 10
+        assert scan_columns_pii(self.tasks, workers=2) == serial
+        # Workers are reused by later scans
+        assert scan_columns_pii(self.tasks, workers=2) == serial
@@ -0,0 +1,44 @@
+# Ugly hack to fix imports
+import sys
+import os
+sys.path.insert(0, os.path.abspath('..'))
+
+import time
+import tempfile
+import threading
+
+from controllers.single_flight import SingleFlight
+
+
+class TestSingleFlight:
+    def setup_method(self):
+        self.flight = SingleFlight(tempfile.mkdtemp())
+
+    def test_concurrent_calls_generate_once(self):
+        calls = []
+        results = []
+
+        def generate():
+            calls.append(1)
+            time.sleep(0.2)
+            return "summary"
+
+        threads = [threading.Thread(target=lambda: results.append(self.flight.run("summary.json", generate)))
+                   for _ in range(5)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert len(calls) == 1
+        assert results == ["summary"] * 5
+
+    def test_failure_is_not_remembered(self):
+        def fail():
+            raise ValueError("bad file")
+
+        try:
+            self.flight.run("pii.json", fail)
+        except ValueError:
+            pass
+        assert self.flight.run("pii.json", lambda: "pii") == "pii"
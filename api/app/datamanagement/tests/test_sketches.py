@@ -0,0 +1,93 @@
+# Ugly hack to fix imports
+import sys
+import os
+sys.path.insert(0, os.path.abspath('..'))
+
+import json
+
+import numpy as np
+import pandas as pd
+
+from controllers.accumulators import ColumnAccumulator
+from controllers.sketches import KllSketch, HyperLogLog, SpaceSaving, ReservoirSample
+
+
+class TestSketches:
+    @classmethod
+    def setup_class(cls):
+        cls.values = np.random.RandomState(7).normal(size=100000)
+
+    def test_kll_quantiles(self):
+        sketch = KllSketch(seed=7)
+        for start in range(0, len(self.values), 10000):
+            sketch.update(self.values[start:start + 10000])
+        for q in [0.25, 0.5, 0.75]:
+            assert abs(sketch.get_rank(sketch.get_quantile(q)) - q) < 0.02
+            assert abs(sketch.get_quantile(q) - np.quantile(self.values, q)) < 0.05
+
+    def test_kll_seed_makes_compaction_repeatable(self):
+        first = KllSketch(k=50, seed=3).update(self.values[:20000])
+        second = KllSketch(k=50, seed=3).update(self.values[:20000])
+        assert first.to_state() == second.to_state()
+
+    def test_kll_merge_keeps_count(self):
+        first = KllSketch().update(self.values[:30000])
+        second = KllSketch().update(self.values[30000:])
+        assert first.merge(second).count == len(self.values)
+
+    def test_hll_estimate(self):
+        sketch = HyperLogLog().update(pd.Series(np.arange(50000)).astype(str))
+        assert abs(sketch.estimate() - 50000) < 50000 * 0.05
+
+    def test_hll_merge_ignores_repeats(self):
+        first = HyperLogLog().update(pd.Series(np.arange(1000)))
+        second = HyperLogLog().update(pd.Series(np.arange(1000)))
+        assert first.merge(second).estimate() == HyperLogLog().update(pd.Series(np.arange(1000))).estimate()
+
+    def test_space_saving_heavy_hitters(self):
+        values = pd.Series(["common"] * 500 + ["second"] * 300 + [str(i) for i in range(2000)])
+        sketch = SpaceSaving(capacity=20)
+        for start in range(0, len(values), 700):
+            sketch.update(values[start:start + 700].value_counts())
+        assert list(sketch.counts.index[:2]) == ["common", "second"]
+        assert sketch.counts["common"] >= 500
+
+    def test_space_saving_heavy_hitters_of_floats(self):
+        values = pd.Series([0.5] * 500 + [2.25] * 300 + [i + 0.1 for i in range(2000)])
+        sketch = SpaceSaving(capacity=20)
+        for start in range(0, len(values), 700):
+            sketch.update(values[start:start + 700].value_counts())
+        assert len(sketch.counts) == 20
+        assert list(sketch.counts.index[:2]) == [0.5, 2.25]
+        assert sketch.counts[0.5] >= 500
+
+    def test_accumulator_falls_back_to_sketches(self):
+        column = pd.Series(self.values)
+        acc = ColumnAccumulator("values", max_tracked_values=1000, sketch=True)
+        for start in range(0, len(column), 25000):
+            acc.update(column[start:start + 25000])
+        assert acc.values_overflowed
+        assert abs(acc.get_quantile(0.5) - column.median()) < 0.05
+        assert abs(acc.get_count_unique() - len(column)) < len(column) * 0.05
+        assert abs(acc.get_count_between(acc.get_quantile(0.25), acc.get_quantile(0.75)) - 50000) < 2000
+
+    def test_state_round_trip(self):
+        acc = ColumnAccumulator("letters", max_tracked_values=2, sketch=True)
+        acc.update(pd.Series(["a", "b", "c", "a", None]))
+        restored = ColumnAccumulator.from_state(json.loads(json.dumps(acc.to_state())))
+        restored.update(pd.Series(["a", "d"]))
+        assert restored.total == 7
+        assert restored.get_n_mostcommon(1) == (["a"], ["3"])
+
+    def test_reservoir_sample(self):
+        inclusions = np.zeros(100)
+        for seed in range(500):
+            sample = ReservoirSample(10, seed=seed)
+            for start in range(0, 100, 30):
+                sample.update(np.arange(start, min(start + 30, 100)))
+            assert sample.count == 100
+            assert len(set(sample.values)) == 10
+            inclusions[sample.values] += 1
+        # Each value is kept with probability 10 / 100
+        assert abs(inclusions[:50].mean() / 500 - 0.1) < 0.02
+        assert abs(inclusions[50:].mean() / 500 - 0.1) < 0.02
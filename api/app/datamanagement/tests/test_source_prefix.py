@@ -0,0 +1,52 @@
+# Ugly hack to fix imports
+import sys
+import os
+sys.path.insert(0, os.path.abspath('..'))
+
+import tempfile
+
+from controllers.source_prefix import get_prefix_stamp, find_appended_offset
+
+
+class TestSourcePrefix:
+    def setup_method(self):
+        self.folder = tempfile.mkdtemp()
+        self.filepath = os.path.join(self.folder, "data.csv")
+        with open(self.filepath, 'w') as data_file:
+            data_file.write("a,b\n1,x\n2,y\n")
+        self.stamp = get_prefix_stamp(self.filepath)
+
+    def test_unchanged_file(self):
+        assert find_appended_offset(self.filepath, self.stamp) == os.path.getsize(self.filepath)
+
+    def test_appended_rows(self):
+        offset = os.path.getsize(self.filepath)
+        with open(self.filepath, 'a') as data_file:
+            data_file.write("3,z\n")
+        assert find_appended_offset(self.filepath, self.stamp) == offset
+
+    def test_rewritten_file(self):
+        with open(self.filepath, 'w') as data_file:
+            data_file.write("a,b\n9,x\n2,y\n3,z\n")
+        assert find_appended_offset(self.filepath, self.stamp) is None
+
+    def test_truncated_file(self):
+        with open(self.filepath, 'w') as data_file:
+            data_file.write("a,b\n")
+        assert find_appended_offset(self.filepath, self.stamp) is None
+
+    def test_edit_in_the_middle(self):
+        with open(self.filepath, 'w') as data_file:
+            data_file.write("a,b\n" + "".join("{},x\n".format(i) for i in range(100)))
+        stamp = get_prefix_stamp(self.filepath, block_bytes=16)
+        with open(self.filepath, 'r+') as data_file:
+            data_file.seek(200)
+            data_file.write("9")
+        assert find_appended_offset(self.filepath, stamp) is None
+
+    def test_extended_stamp_matches_a_fresh_one(self):
+        stamp = get_prefix_stamp(self.filepath, block_bytes=5)
+        with open(self.filepath, 'a') as data_file:
+            data_file.write("3,z\n4,w\n")
+        assert find_appended_offset(self.filepath, stamp) is not None
+        assert get_prefix_stamp(self.filepath, stamp, block_bytes=5) == get_prefix_stamp(self.filepath, block_bytes=5)
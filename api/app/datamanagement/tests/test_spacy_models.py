@@ -0,0 +1,42 @@
+# Ugly hack to fix imports
+import sys
+import os
+sys.path.insert(0, os.path.abspath('..'))
+
+import tempfile
+
+import pandas as pd
+
+from pii.scanner import count_values
+from pii.spacy_models import get_ner_model, count_entity_labels, NER_PIPES, IGNORED_LABELS
+# The instance the scanners use, imported through the package like they do
+from datamanagement.pii.verdict_cache import verdict_cache
+
+
+class TestSpacyModels:
+    @classmethod
+    def setup_class(cls):
+        # Keep verdicts of test data out of the shared cache file
+        cls.verdict_cache_path = verdict_cache.path
+        verdict_cache.path = os.path.join(tempfile.mkdtemp(), 'verdicts.sqlite')
+
+    @classmethod
+    def teardown_class(cls):
+        verdict_cache.path = cls.verdict_cache_path
+
+    def test_model_is_loaded_once_with_ner_only(self):
+        nlp = get_ner_model()
+        assert get_ner_model() is nlp
+        assert 'ner' in nlp.pipe_names
+        assert set(nlp.pipe_names) <= set(NER_PIPES)
+
+    def test_duplicates_are_weighted(self):
+        column = pd.Series(["Barack Obama visited Paris", "hello", "Barack Obama visited Paris", "42"])
+        label_counts = count_entity_labels(count_values(column))
+        nlp = get_ner_model()
+        expected = {}
+        for text in column:
+            for ent in nlp(text).ents:
+                if ent.label_ not in IGNORED_LABELS:
+                    expected[ent.label_] = expected.get(ent.label_, 0) + 1
+        assert label_counts == expected
@@ -0,0 +1,55 @@
+# Ugly hack to fix imports
+import sys
+import os
+sys.path.insert(0, os.path.abspath('..'))
+
+import sqlite3
+import tempfile
+
+from pii.verdict_cache import VerdictCache, detector_version
+
+
+class TestVerdictCache:
+    def setup_method(self):
+        self.folder = tempfile.mkdtemp()
+        self.cache = VerdictCache(path=os.path.join(self.folder, 'verdicts.sqlite'), max_entries=3)
+        self.version = detector_version('regex', {'patterns': ['a']})
+
+    def test_hits_and_misses_are_counted(self):
+        assert self.cache.get_many('regex', self.version, ['a', 'b']) == [None, None]
+        self.cache.put_many(self.version, [('a', ['emails']), ('b', [])])
+        assert self.cache.get_many('regex', self.version, ['a', 'b', 'c']) == [['emails'], [], None]
+        stats = self.cache.stats()['detectors']['regex']
+        assert (stats['hits'], stats['misses']) == (2, 3)
+        assert stats['hit_rate'] == 2 / 5
+
+    def test_new_version_misses(self):
+        self.cache.put_many(self.version, [('a', ['emails'])])
+        new_version = detector_version('regex', {'patterns': ['b']})
+        assert self.cache.get_many('regex', new_version, ['a']) == [None]
+
+    def test_oldest_entries_are_evicted(self):
+        self.cache.put_many(self.version, [(value, []) for value in 'abcde'])
+        assert self.cache.stats()['entries'] == 3
+        assert self.cache.get_many('regex', self.version, list('abcde')) == [None, None, [], [], []]
+
+    def test_counts_are_kept_in_memory_until_flushed(self):
+        self.cache.flush_seconds = 3600
+        self.cache.get_many('regex', self.version, ['a', 'b'])
+        with sqlite3.connect(self.cache.path) as connection:
+            assert connection.execute('SELECT COUNT(*) FROM detector_stats').fetchone()[0] == 0
+        assert self.cache.stats()['detectors']['regex']['misses'] == 2
+
+    def test_eviction_drops_a_batch_past_the_limit(self):
+        cache = VerdictCache(path=os.path.join(self.folder, 'batch.sqlite'), max_entries=10)
+        cache.put_many(self.version, [(str(value), []) for value in range(10)])
+        assert cache.stats()['entries'] == 10
+        cache.put_many(self.version, [('10', [])])
+        assert cache.stats()['entries'] == 9
+
+    def test_unreadable_file_does_not_raise(self):
+        # A folder cannot be opened as a database
+        cache = VerdictCache(path=self.folder)
+        assert set(cache.stats()) == {'enabled', 'error'}
+        assert cache.clear() is False
+        assert cache.get_many('regex', self.version, ['a']) == [None]
@@ -0,0 +1,28 @@
+# Ugly hack to fix imports
+import sys
+import os
+sys.path.insert(0, os.path.abspath('..'))
+
+import logging
+
+from jobs.warmup import warm_up, submit_warm_up, format_warm_up_report
+
+
+class TestWarmUp:
+    def test_missing_files_are_skipped(self):
+        assert warm_up([["missing.csv", "Missing", "id", "label", False]]) == {}
+
+    def test_skips_are_logged(self, caplog):
+        with caplog.at_level(logging.INFO):
+            assert submit_warm_up([["missing.csv", "Missing", "id", "label", False]]) == {}
+        assert "Warm-up skips Missing" in caplog.text
+
+    def test_report(self):
+        jobs = {"Titanic": {"status": "succeeded", "started": 10.0, "finished": 12.5, "error": None,
+                            "result": {"summary.json": 0.5, "features.json": 2.0}},
+                "Iris": {"status": "failed", "started": 10.0, "finished": 10.1, "error": "ValueError()",
+                         "result": None},
+                "Wine": None}
+        assert format_warm_up_report(jobs) == ("Titanic: 2.5s (summary.json 0.5s, features.json 2.0s)\n"
+                                               "Iris: failed ValueError()\n"
+                                               "Wine: missing")